@@ -67,6 +67,42 @@ class Config:
     UPLOAD_EXTENSIONS = [".epub", ".jpg", ".jpeg", ".png", ".webp"]
     PRESERVE_CONTEXT_ON_EXCEPTION = False
 
+    # Offload de archivos al servidor frontal: "x-accel" (nginx), "x-sendfile" o vacío
+    # Solo lo aplica send_stored_file; USE_X_SENDFILE (global, también /static) queda desactivado
+    FILE_SERVE_MODE = os.getenv("FILE_SERVE_MODE", "")
+    # Location "internal" de nginx que apunta a src/static
+    X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX", "/protected/")
+
+    # =======================
+    # Rate limiting
+    # =======================
+    # "memory://" (por proceso) o "redis://host:6379/0" (compartido entre workers)
+    RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+    # Espera media (segundos) por una conexión del pool a partir de la cual se
+    # rechazan login y envíos con 503
+    DB_POOL_SHED_WAIT = float(os.getenv("DB_POOL_SHED_WAIT", 0.5))
+    # Proxies de confianza delante de la app (nginx = 1). Con 0 se usa la IP de la
+    # conexión; detrás de un proxy todos los clientes compartirían su límite por IP
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # =======================
+    # Live exam streams
+    # =======================
+    # Streams (Server-Sent Events) abiertos por proceso; cada uno ocupa un hilo
+    # de gunicorn, así que debe quedar muy por debajo de GUNICORN_THREADS
+    SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", 8))
+
+    # =======================
+    # Template caching
+    # =======================
+    # Bytecode compilado de las plantillas Jinja, compartido entre workers
+    TEMPLATE_BYTECODE_CACHE = os.getenv("TEMPLATE_BYTECODE_CACHE", "true").lower() == "true"
+    # Vacío usa el directorio privado por usuario de Jinja; uno propio se crea
+    # con permisos 0700 y debe pertenecer al usuario del proceso
+    TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR", "")
+    # TTL por defecto (segundos) de los fragmentos {% cache %}; 0 los desactiva
+    TEMPLATE_FRAGMENT_CACHE_TTL = int(os.getenv("TEMPLATE_FRAGMENT_CACHE_TTL", 300))
+
     # =======================
     # JWT Configuration
     # =======================
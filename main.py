@@ -2,9 +2,14 @@ from flask import Flask, jsonify, redirect, url_for
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from src.routes import register_blueprints
 from src.database.database import Base
 from src.models import *
+from src.utils.upload_request import DiskUploadRequest
+from src.utils.json_provider import FastJSONProvider
+from src.utils.rate_limit import init_rate_limit
+from src.utils.template_cache import init_template_cache
 from config import Config
 
 # Initialize Flask app
@@ -13,6 +18,25 @@ app = Flask(__name__, template_folder="src/templates", static_folder="src/static
 # Configure app using Config class
 app.config.from_object(Config)
 
+# Client address, scheme and host from the trusted proxies (X-Forwarded-*)
+if app.config["TRUSTED_PROXY_HOPS"]:
+    hops = app.config["TRUSTED_PROXY_HOPS"]
+    app.wsgi_app = ProxyFix(
+        app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops, x_prefix=hops
+    )
+
+# Spool uploads to disk instead of buffering them in worker memory
+app.request_class = DiskUploadRequest
+
+# orjson-backed JSON responses (ISO 8601 datetimes, enums by value)
+app.json = FastJSONProvider(app)
+
+# On-disk template bytecode cache and the {% cache %} fragment tag
+init_template_cache(app)
+
+# Rate limit buckets (fails here if the configured storage is unavailable)
+init_rate_limit(app)
+
 # Initialize extensions
 jwt = JWTManager(app)
 CORS(app)
@@ -37,6 +61,11 @@ def not_found_error(error):
     return jsonify({"error": "Not found"}), 404
 
 
+@app.errorhandler(413)
+def request_entity_too_large_error(error):
+    return jsonify({"error": "El archivo supera el tamaño máximo permitido"}), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
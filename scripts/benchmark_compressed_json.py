@@ -0,0 +1,244 @@
+"""
+Benchmark of the CompressedJSON column type against plain JSON
+
+Creates two copies of a synthetic exercises/submissions dataset (one with JSON
+columns, one with deferred CompressedJSON columns) and reports the stored
+size and the time to fetch list rows and full rows.
+
+Usage:
+    python scripts/benchmark_compressed_json.py [--url URL] [--exercises 500]
+        [--submissions 20000]
+
+By default it runs on a temporary SQLite database. Pass the URL of an empty
+MySQL schema to measure the real table sizes (information_schema).
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import JSON, Column, Integer, String, create_engine, text
+from sqlalchemy.orm import declarative_base, deferred, sessionmaker, undefer
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.types import CompressedJSON
+
+BenchBase = declarative_base()
+
+WORDS = (
+    "fracción suma resta multiplicación división número entero decimal ecuación "
+    "triángulo área perímetro ángulo verbo sustantivo adjetivo célula planta energía "
+    "agua historia independencia colombia mapa región clima"
+).split()
+
+
+class PlainExercise(BenchBase):
+    __tablename__ = "bench_plain_exercises"
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    questions = Column(JSON, nullable=False)
+
+
+class PlainSubmission(BenchBase):
+    __tablename__ = "bench_plain_submissions"
+    id = Column(Integer, primary_key=True)
+    exercise_id = Column(Integer, nullable=False)
+    content = Column(JSON, nullable=False)
+
+
+class CompressedExercise(BenchBase):
+    __tablename__ = "bench_compressed_exercises"
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    questions = deferred(Column(CompressedJSON, nullable=False))
+
+
+class CompressedSubmission(BenchBase):
+    __tablename__ = "bench_compressed_submissions"
+    id = Column(Integer, primary_key=True)
+    exercise_id = Column(Integer, nullable=False)
+    content = deferred(Column(CompressedJSON, nullable=False))
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "?"
+
+
+def make_questions(rng, count=20):
+    return {
+        str(q): {
+            "question": sentence(rng),
+            "format": rng.choice([1, 2, 3, 6]),
+            "options": [sentence(rng, 5) for _ in range(4)],
+            "correct_answer": rng.randrange(4),
+            "feedback": sentence(rng, 20),
+        }
+        for q in range(count)
+    }
+
+
+def make_answers(rng, count=20):
+    return {
+        "answers": {str(q): rng.randrange(4) for q in range(count)},
+        "comments": sentence(rng, 30),
+        "started_at": "2025-03-01T10:00:00",
+        "finished_at": "2025-03-01T10:40:00",
+    }
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def table_size(engine, table, column):
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            row = conn.execute(
+                text(
+                    "SELECT data_length FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = :table"
+                ),
+                {"table": table},
+            ).first()
+            return row[0]
+        return conn.execute(
+            text(f"SELECT SUM(LENGTH({column})) FROM {table}")
+        ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Database URL (default: temporary SQLite)")
+    parser.add_argument("--exercises", type=int, default=500)
+    parser.add_argument("--submissions", type=int, default=20000)
+    args = parser.parse_args()
+
+    tmp_path = None
+    url = args.url
+    if not url:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    engine = create_engine(url)
+    BenchBase.metadata.drop_all(engine)
+    BenchBase.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    try:
+        rng = random.Random(42)
+        exercises = [
+            (f"Ejercicio {i}", make_questions(rng)) for i in range(args.exercises)
+        ]
+        submissions = [
+            (rng.randrange(args.exercises) + 1, make_answers(rng))
+            for _ in range(args.submissions)
+        ]
+
+        db = Session()
+        for title, questions in exercises:
+            db.add(PlainExercise(title=title, questions=questions))
+            db.add(CompressedExercise(title=title, questions=questions))
+        for exercise_id, content in submissions:
+            db.add(PlainSubmission(exercise_id=exercise_id, content=content))
+            db.add(CompressedSubmission(exercise_id=exercise_id, content=content))
+        db.commit()
+        db.close()
+
+        if engine.dialect.name == "mysql":
+            with engine.begin() as conn:
+                for table in BenchBase.metadata.tables:
+                    conn.exec_driver_sql(f"ANALYZE TABLE {table}")
+
+        def list_rows(model):
+            def run():
+                db = Session()
+                try:
+                    [(row.id, row.title) for row in db.query(model).all()]
+                finally:
+                    db.close()
+
+            return run
+
+        def full_rows(model, column):
+            def run():
+                db = Session()
+                try:
+                    [getattr(row, column) for row in db.query(model).all()]
+                finally:
+                    db.close()
+
+            return run
+
+        def full_rows_undeferred(model, column):
+            def run():
+                db = Session()
+                try:
+                    query = db.query(model).options(undefer(getattr(model, column)))
+                    [getattr(row, column) for row in query.all()]
+                finally:
+                    db.close()
+
+            return run
+
+        def report(label, plain_value, compressed_value, fmt):
+            print(f"{label:32}{plain_value:>14{fmt}}{compressed_value:>18{fmt}}")
+
+        print(
+            f"Dataset: {args.exercises} exercises, {args.submissions} submissions "
+            f"({engine.dialect.name})\n"
+        )
+        print(f"{'':32}{'JSON':>14}{'CompressedJSON':>18}")
+        for label, plain, compressed, column in (
+            ("exercises.questions", PlainExercise, CompressedExercise, "questions"),
+            ("submissions.content", PlainSubmission, CompressedSubmission, "content"),
+        ):
+            report(
+                f"{label} bytes",
+                table_size(engine, plain.__tablename__, column),
+                table_size(engine, compressed.__tablename__, column),
+                ",",
+            )
+
+        print()
+        report(
+            "exercise list (ms)",
+            timed(list_rows(PlainExercise)),
+            timed(list_rows(CompressedExercise)),
+            ".1f",
+        )
+        report(
+            "exercise full rows (ms)",
+            timed(full_rows(PlainExercise, "questions")),
+            timed(full_rows_undeferred(CompressedExercise, "questions")),
+            ".1f",
+        )
+        report(
+            "submission full rows (ms)",
+            timed(full_rows(PlainSubmission, "content")),
+            timed(full_rows_undeferred(CompressedSubmission, "content")),
+            ".1f",
+        )
+    finally:
+        BenchBase.metadata.drop_all(engine)
+        engine.dispose()
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Benchmark of the list services: ORM + pydantic rows against plain rows
+
+Fills a temporary SQLite database with users, courses and subjects and
+times, for get_users_service, get_courses_service and get_subjects_service:
+
+- the previous path: ORM objects, one *ResponseSchema per row, .dict() and
+  Flask's default JSON provider
+- the current path: the service (Core select() rows to dicts) and
+  FastJSONProvider
+
+The app is imported to reuse its models and services, so the DB_* variables
+(the .env of the project) must be set, but no database server is used.
+
+Usage:
+    python scripts/benchmark_list_services.py [--users 5000] [--courses 500]
+        [--subjects 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Ensure project root on path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.database import Base
+from src.models import Course, Subject, User, UserRole
+import src.courses.service as courses_service
+import src.subject.service as subject_service
+import src.users.service as users_service
+from src.courses.validation import CourseResponseSchema
+from src.subject.validation import SubjectResponseSchema
+from src.users.validation import UserResponseSchema
+from src.utils.json_provider import FastJSONProvider, orjson
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def legacy_users(Session):
+    db = Session()
+    try:
+        users = db.query(User).filter(User.is_active == 1, User.role == UserRole.TEACHER).all()
+        return [
+            UserResponseSchema(
+                id=user.id,
+                username=user.username,
+                document=user.document,
+                full_name=user.full_name,
+                role=user.role.value,
+                is_active=bool(user.is_active),
+            ).dict()
+            for user in users
+        ]
+    finally:
+        db.close()
+
+
+def legacy_courses(Session):
+    db = Session()
+    try:
+        courses = db.query(Course).order_by(
+            Course.academic_year.desc(), Course.period, Course.grade_level
+        ).all()
+        return [
+            CourseResponseSchema(
+                id=course.id,
+                academic_year=course.academic_year,
+                period=course.period,
+                grade_level=course.grade_level,
+                name=course.name,
+                is_active=course.is_active,
+                created_by=course.created_by,
+                created_at=course.created_at,
+                updated_at=course.updated_at,
+            ).dict()
+            for course in courses
+        ]
+    finally:
+        db.close()
+
+
+def legacy_subjects(Session):
+    db = Session()
+    try:
+        subjects = db.query(Subject).order_by(Subject.name).all()
+        return [
+            SubjectResponseSchema(
+                id=subject.id,
+                name=subject.name,
+                teacher_id=subject.teacher_id,
+                created_at=subject.created_at,
+                updated_at=subject.updated_at,
+            ).dict()
+            for subject in subjects
+        ]
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--subjects", type=int, default=500)
+    args = parser.parse_args()
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    for module in (users_service, courses_service, subject_service):
+        module.SessionLocal = Session
+
+    try:
+        rng = random.Random(42)
+        now = datetime(2025, 3, 1, 8, 0)
+        db = Session()
+        db.add_all(
+            User(
+                username=f"docente{i}",
+                document=str(10000000 + i),
+                full_name=f"Docente Número {i}",
+                hashed_password="x",
+                role=UserRole.TEACHER,
+            )
+            for i in range(args.users)
+        )
+        db.flush()
+        db.add_all(
+            Course(
+                academic_year=f"{2020 + i % 6}-{2021 + i % 6}",
+                period=1 + i % 4,
+                grade_level=str(1 + i % 11),
+                name=f"Curso {i}",
+                created_by=1,
+                created_at=now - timedelta(days=rng.randrange(365)),
+                updated_at=now,
+            )
+            for i in range(args.courses)
+        )
+        db.add_all(
+            Subject(
+                name=f"Materia {i}",
+                teacher_id=1 + rng.randrange(args.users),
+                created_at=now - timedelta(days=rng.randrange(365)),
+                updated_at=now,
+            )
+            for i in range(args.subjects)
+        )
+        db.commit()
+        db.close()
+
+        legacy_app = Flask("legacy")
+        legacy_app.json = DefaultJSONProvider(legacy_app)
+        fast_app = Flask("fast")
+        fast_app.json = FastJSONProvider(fast_app)
+
+        cases = (
+            (
+                f"users ({args.users})",
+                lambda: legacy_users(Session),
+                lambda: users_service.get_users_service(role=UserRole.TEACHER)[0],
+            ),
+            (
+                f"courses ({args.courses})",
+                lambda: legacy_courses(Session),
+                lambda: courses_service.get_courses_service()[0],
+            ),
+            (
+                f"subjects ({args.subjects})",
+                lambda: legacy_subjects(Session),
+                lambda: subject_service.get_subjects_service()[0],
+            ),
+        )
+
+        print(f"JSON encoder: {'orjson' if orjson else 'json (orjson not installed)'}\n")
+        print(f"{'':20}{'service ms':>24}{'JSON ms':>22}{'total ms':>22}")
+        print(f"{'':20}{'before':>12}{'after':>12}{'before':>11}{'after':>11}{'before':>11}{'after':>11}")
+        for label, legacy, current in cases:
+            legacy_items = legacy()
+            current_items = current()
+            with legacy_app.app_context():
+                legacy_json = timed(lambda: legacy_app.json.response(items=legacy_items))
+            with fast_app.app_context():
+                fast_json = timed(lambda: fast_app.json.response(items=current_items))
+            legacy_service = timed(legacy)
+            current_service = timed(current)
+            print(
+                f"{label:20}{legacy_service:>12.1f}{current_service:>12.1f}"
+                f"{legacy_json:>11.1f}{fast_json:>11.1f}"
+                f"{legacy_service + legacy_json:>11.1f}{current_service + fast_json:>11.1f}"
+            )
+    finally:
+        engine.dispose()
+        os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+-- Create stored_files table (content-addressed uploads with reference count)
+CREATE TABLE IF NOT EXISTS stored_files (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sha256 CHAR(64) NOT NULL,
+    path VARCHAR(512) NOT NULL,
+    size BIGINT NOT NULL,
+    ref_count INT NOT NULL DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_stored_files_path (path)
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_stored_files_sha256 ON stored_files(sha256);
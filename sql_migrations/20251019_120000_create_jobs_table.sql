@@ -0,0 +1,25 @@
+-- Create jobs table (background work queue processed by `flask jobs worker`)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    payload JSON NULL,
+    status ENUM('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED') NOT NULL DEFAULT 'PENDING',
+    priority INT NOT NULL DEFAULT 0,
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    run_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    idempotency_key VARCHAR(255) NULL,
+    progress INT NOT NULL DEFAULT 0,
+    result JSON NULL,
+    error TEXT NULL,
+    locked_by VARCHAR(100) NULL,
+    locked_at DATETIME NULL,
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_jobs_idempotency_key (idempotency_key),
+    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_jobs_claim ON jobs(status, run_at, priority);
@@ -0,0 +1,2 @@
+-- Index used by the document search to pick up documents changed since the last sync
+CREATE INDEX idx_documents_updated_at ON documents(updated_at);
@@ -0,0 +1,2 @@
+-- Index used by the user typeahead to pick up users changed since the last sync
+CREATE INDEX idx_users_updated_at ON users(updated_at);
@@ -0,0 +1,9 @@
+-- Add excerpt to documents so listings do not read the full content
+ALTER TABLE documents ADD COLUMN excerpt VARCHAR(300) NULL AFTER content;
+
+-- Backfill existing documents
+UPDATE documents SET excerpt = LEFT(content, 280) WHERE excerpt IS NULL;
+
+-- Create indexes for the cursor pagination (newest first, optionally by author)
+CREATE INDEX idx_documents_active_id ON documents(is_active, id);
+CREATE INDEX idx_documents_author_active_id ON documents(author_id, is_active, id);
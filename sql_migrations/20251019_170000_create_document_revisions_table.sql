@@ -0,0 +1,18 @@
+-- Create document_revisions table (compressed diffs with periodic full snapshots)
+CREATE TABLE IF NOT EXISTS document_revisions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    document_id INT NOT NULL,
+    version INT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    is_snapshot BOOLEAN NOT NULL DEFAULT FALSE,
+    data MEDIUMBLOB NOT NULL,
+    size INT NOT NULL,
+    author_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_document_revisions_version (document_id, version),
+    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE,
+    FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE SET NULL
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_document_revisions_created_at ON document_revisions(created_at);
@@ -0,0 +1,16 @@
+-- Store exercises.questions and submissions.content as compressed JSON (CompressedJSON type)
+-- Format: 'ZJ' + version 0x01 + MySQL COMPRESS() output (uncompressed length + zlib stream).
+-- Rows that are not converted are still read as plain JSON by the application.
+ALTER TABLE exercises MODIFY questions MEDIUMBLOB NOT NULL;
+UPDATE exercises
+SET questions = CONCAT(X'5A4A01', COMPRESS(questions))
+WHERE LEFT(questions, 2) <> 'ZJ';
+
+ALTER TABLE submissions MODIFY content MEDIUMBLOB NOT NULL;
+UPDATE submissions
+SET content = CONCAT(X'5A4A01', COMPRESS(content))
+WHERE LEFT(content, 2) <> 'ZJ';
+
+-- Reclaim the space of the uncompressed rows
+OPTIMIZE TABLE exercises;
+OPTIMIZE TABLE submissions;
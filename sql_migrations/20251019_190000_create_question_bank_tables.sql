@@ -0,0 +1,43 @@
+-- Question bank: questions and choices that exercises reference in order.
+-- The existing exercises.questions JSON is moved to these tables with
+-- `flask exercises split-questions` after running this migration.
+CREATE TABLE IF NOT EXISTS questions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    author_id INT NOT NULL,
+    text TEXT NOT NULL,
+    format VARCHAR(50) NULL,
+    points FLOAT NOT NULL DEFAULT 1,
+    correct_answer JSON NULL,
+    feedback TEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    is_active INT DEFAULT 1,
+    FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS question_choices (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    question_id INT NOT NULL,
+    position INT NOT NULL,
+    text TEXT NOT NULL,
+    is_correct BOOLEAN NOT NULL DEFAULT FALSE,
+    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS exercise_questions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    exercise_id INT NOT NULL,
+    question_id INT NOT NULL,
+    position INT NOT NULL,
+    UNIQUE KEY uq_exercise_questions_question (exercise_id, question_id),
+    FOREIGN KEY (exercise_id) REFERENCES exercises(id) ON DELETE CASCADE,
+    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_question_choices_question_position ON question_choices(question_id, position);
+CREATE INDEX idx_exercise_questions_position ON exercise_questions(exercise_id, position);
+CREATE INDEX idx_questions_author ON questions(author_id);
+
+-- The questions blob is emptied once an exercise is split
+ALTER TABLE exercises MODIFY questions MEDIUMBLOB NULL;
@@ -0,0 +1,37 @@
+-- Daily rollups of class_views, maintained incrementally by the
+-- class_views.rollup job and rebuilt with `flask class-views rollup --rebuild`
+CREATE TABLE IF NOT EXISTS class_view_daily (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    class_id INT NOT NULL,
+    course_id INT NOT NULL,
+    day DATE NOT NULL,
+    views INT NOT NULL DEFAULT 0,
+    unique_students INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_class_view_daily_class_day (class_id, day),
+    FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS class_view_student_daily (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    class_id INT NOT NULL,
+    course_id INT NOT NULL,
+    student_id INT NOT NULL,
+    day DATE NOT NULL,
+    views INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uq_class_view_student_daily (class_id, day, student_id),
+    FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name VARCHAR(100) PRIMARY KEY,
+    last_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_class_view_daily_course_day ON class_view_daily(course_id, day);
+CREATE INDEX idx_class_view_student_daily_course_day ON class_view_student_daily(course_id, day);
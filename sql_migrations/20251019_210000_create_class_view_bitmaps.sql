@@ -0,0 +1,23 @@
+-- Ordinal of each student in its course (bit position in the view bitmaps)
+ALTER TABLE course_students ADD COLUMN ordinal INT NULL;
+
+UPDATE course_students cs
+JOIN (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY course_id ORDER BY id) - 1 AS ordinal
+    FROM course_students
+) numbered ON numbered.id = cs.id
+SET cs.ordinal = numbered.ordinal;
+
+ALTER TABLE course_students MODIFY ordinal INT NOT NULL;
+ALTER TABLE course_students ADD CONSTRAINT uq_course_students_ordinal UNIQUE (course_id, ordinal);
+
+-- Per class bitmap of the students that viewed it. Fill it from the existing
+-- views with `flask class-views rebuild-bitmaps`
+CREATE TABLE IF NOT EXISTS class_view_bitmaps (
+    class_id INT PRIMARY KEY,
+    course_id INT NOT NULL,
+    bitmap BLOB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
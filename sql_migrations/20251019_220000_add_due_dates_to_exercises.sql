@@ -0,0 +1,10 @@
+-- Exercises can be assigned to a class with an availability window, so they
+-- show up in the due work feed of the students of the course
+ALTER TABLE exercises ADD COLUMN class_id INT NULL;
+ALTER TABLE exercises ADD COLUMN available_from DATETIME NULL;
+ALTER TABLE exercises ADD COLUMN due_date DATETIME NULL;
+ALTER TABLE exercises ADD CONSTRAINT fk_exercises_class FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE SET NULL;
+
+-- Upcoming work of a course in due date order
+CREATE INDEX idx_exercises_class_due_date ON exercises(class_id, due_date);
+CREATE INDEX idx_assignments_class_due_date ON assignments(class_id, due_date);
@@ -0,0 +1,4 @@
+-- Client supplied key of the submit request, so retries do not create
+-- duplicated submissions (NULLs are not compared by the unique index)
+ALTER TABLE submissions ADD COLUMN idempotency_key VARCHAR(100) NULL;
+ALTER TABLE submissions ADD CONSTRAINT uq_submissions_student_idempotency_key UNIQUE (student_id, idempotency_key);
@@ -0,0 +1,28 @@
+-- Attempts of the students at an exercise and their autosaved answers
+CREATE TABLE IF NOT EXISTS exercise_attempts (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    exercise_id INT NOT NULL,
+    student_id INT NOT NULL,
+    status ENUM('IN_PROGRESS', 'SUBMITTED') NOT NULL DEFAULT 'IN_PROGRESS',
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME NULL,
+    score FLOAT NULL,
+    submission_id INT NULL,
+    FOREIGN KEY (exercise_id) REFERENCES exercises(id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (submission_id) REFERENCES submissions(id) ON DELETE SET NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS attempt_answers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    attempt_id INT NOT NULL,
+    question_id INT NOT NULL,
+    answer JSON NULL,
+    updated_at DATETIME(6) NOT NULL,
+    UNIQUE KEY uq_attempt_answers_question (attempt_id, question_id),
+    FOREIGN KEY (attempt_id) REFERENCES exercise_attempts(id) ON DELETE CASCADE,
+    FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Create indexes
+CREATE INDEX idx_exercise_attempts_exercise_student ON exercise_attempts(exercise_id, student_id);
@@ -0,0 +1,5 @@
+-- Deadline of the attempts of timed exercises, submitted by the server when it passes
+ALTER TABLE exercise_attempts ADD COLUMN deadline DATETIME NULL AFTER started_at;
+
+-- Create indexes
+CREATE INDEX idx_exercise_attempts_status_deadline ON exercise_attempts(status, deadline);
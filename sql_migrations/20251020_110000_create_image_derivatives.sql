@@ -0,0 +1,9 @@
+-- Resized versions (srcset) of the remote images that were uploaded
+-- successfully; images without a row are served without srcset
+CREATE TABLE IF NOT EXISTS image_derivatives (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    url VARCHAR(512) NOT NULL,
+    widths JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_image_derivatives_url (url)
+) ENGINE=InnoDB;
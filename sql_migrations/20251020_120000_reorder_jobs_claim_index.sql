@@ -0,0 +1,5 @@
+-- The claim query filters on status and sorts by priority, then run_at
+DROP INDEX idx_jobs_claim ON jobs;
+
+-- Create indexes
+CREATE INDEX idx_jobs_claim ON jobs(status, priority, run_at);
@@ -1,72 +1,49 @@
-from flask import Request, Response, flash, redirect, render_template, url_for
+from flask import Request, Response, flash, jsonify, redirect, render_template, url_for
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 
-from src.database.database import SessionLocal
-from src.models.user import User, UserRole
-
-# from src.models.course import Course
+from src.models.user import UserRole
 from src.utils.decorator_role_required import role_required
 
+from .service import get_dashboard_service
+
 
 @jwt_required()
-@role_required([UserRole.ADMIN, UserRole.TEACHER, UserRole.STUDENT])
 def dashboard_controller(request: Request) -> Response:
+    # Every role has a dashboard, so role_required would only add a query
     user_id = get_jwt_identity()
-    user_role = get_jwt().get("role")
 
     try:
-        db = SessionLocal()
-        user = (
-            db.query(User.id, User.full_name, User.document, User.role)
-            .filter(User.id == user_id)
-            .first()
-        )
-        db.close()
-
-        if not user:
+        data, status = get_dashboard_service(user_id)
+        if status != 200:
             flash("Usuario no encontrado", "danger")
             return redirect(url_for("auth.login"))
 
-        # User is admin
-        if user_role == "ADMIN":
-            return render_template(
-                "admin/dashboard.html",
-                user={
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "document": user.document,
-                    "role": user.role.value if hasattr(user.role, "value") else user.role
-                },
-                accion_logout=True,
-            )
-
-        # User is teacher
-        elif user_role == "TEACHER":
-            # Grados en los que pertenece
-            # grades = db.query(Course.grade_level).filter(Course.teacher_id == user_id).all()
-            # grades = [grade.grade_level for grade in grades]
-            grades = [6, 7, 8, 9, 10, 11]
-            return render_template(
-                "admin/dashboard.html",
-                user={
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "document": user.document,
-                    "role": user.role.value if hasattr(user.role, "value") else user.role
-                },
-                grades=grades,
-                accion_logout=True,
-            )
-
-        # User is student
-        else:
-            return render_template("about_us.html", accion_logout=True)
+        return render_template(
+            "admin/dashboard.html",
+            user=data["user"],
+            teacher=data.get("teacher"),
+            student=data.get("student"),
+            is_admin=get_jwt().get("role") == UserRole.ADMIN.name,
+            accion_logout=True,
+        )
     except Exception as e:
         print(e)
         flash("Error al obtener el dashboard", "danger")
         return redirect(url_for("auth.login"))
 
 
+@jwt_required()
+def dashboard_data_controller(request: Request) -> Response:
+    try:
+        data, status = get_dashboard_service(get_jwt_identity())
+        if status != 200:
+            return jsonify({"error": "Usuario no encontrado"}), status
+        return jsonify(data), 200
+    except Exception as e:
+        print(e)
+        return jsonify({"error": "Error al obtener el dashboard"}), 500
+
+
 # Son temporales, se deben cambiar a sus respectivos modulos
 # @jwt_required()
 # @role_required([UserRole.ADMIN, UserRole.TEACHER, UserRole.STUDENT])
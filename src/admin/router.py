@@ -1,5 +1,5 @@
 from flask import Blueprint, request
-from .controllers import dashboard_controller, clases_recursos_controller, evaluaciones_controller, libros_controller, calificaciones_controller
+from .controllers import dashboard_controller, dashboard_data_controller, clases_recursos_controller, evaluaciones_controller, libros_controller, calificaciones_controller
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -9,6 +9,11 @@ def dashboard():
     return dashboard_controller(request)
 
 
+@admin_bp.route("/dashboard/data", methods=["GET"])
+def dashboard_data():
+    return dashboard_data_controller(request)
+
+
 # @admin_bp.route("/materias", methods=["GET"])
 # def materias():
 #     return materias_controller(request)
@@ -0,0 +1,237 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, select
+
+from src.database.database import SessionLocal
+from src.models.assignment import Assignment
+from src.models.class_model import ClassModel
+from src.models.course import Course
+from src.models.course_student import CourseStudent
+from src.models.course_subject import CourseSubject
+from src.models.subject import Subject
+from src.models.submission import Submission
+from src.models.user import User, UserRole
+from src.utils.user_cache import UserCache
+
+# Seconds a dashboard is reused. Changes made in this process invalidate it
+# right away; changes made by other workers show up after this time
+DASHBOARD_CACHE_TTL = 30
+
+
+dashboard_cache = UserCache(ttl=DASHBOARD_CACHE_TTL)
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _teacher_dashboard(db, user_id: int, now: datetime) -> Tuple[dict, List[int]]:
+    """Courses and subjects of a teacher with pending grading and next class"""
+    same_course_subject = and_(
+        ClassModel.course_id == CourseSubject.course_id,
+        ClassModel.subject_id == CourseSubject.subject_id,
+    )
+    pending = (
+        select(func.count(Submission.id))
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .join(ClassModel, ClassModel.id == Assignment.class_id)
+        .where(same_course_subject, Submission.score.is_(None), Submission.is_active == 1)
+        .correlate(CourseSubject)
+        .scalar_subquery()
+    )
+    upcoming = (
+        select(ClassModel.date, ClassModel.title)
+        .where(same_course_subject, ClassModel.date >= now)
+        .order_by(ClassModel.date, ClassModel.id)
+        .limit(1)
+        .correlate(CourseSubject)
+    )
+    next_class_at = upcoming.with_only_columns(ClassModel.date).scalar_subquery()
+    next_class_title = upcoming.with_only_columns(ClassModel.title).scalar_subquery()
+
+    rows = (
+        db.query(
+            CourseSubject.course_id,
+            Course.name,
+            Course.grade_level,
+            CourseSubject.subject_id,
+            Subject.name,
+            pending,
+            next_class_at,
+            next_class_title,
+        )
+        .join(Course, Course.id == CourseSubject.course_id)
+        .join(Subject, Subject.id == CourseSubject.subject_id)
+        .filter(
+            CourseSubject.teacher_id == user_id,
+            CourseSubject.is_active,
+            Course.is_active,
+        )
+        .order_by(Course.grade_level, Course.name, Subject.name)
+        .all()
+    )
+
+    courses = [
+        {
+            "course_id": course_id,
+            "course_name": course_name,
+            "grade_level": grade_level,
+            "subject_id": subject_id,
+            "subject_name": subject_name,
+            "pending_submissions": pending_count or 0,
+            "next_class_at": _isoformat(class_at),
+            "next_class_title": class_title,
+        }
+        for (
+            course_id,
+            course_name,
+            grade_level,
+            subject_id,
+            subject_name,
+            pending_count,
+            class_at,
+            class_title,
+        ) in rows
+    ]
+    upcoming_classes = sorted(
+        (
+            {
+                "course_id": course["course_id"],
+                "subject_id": course["subject_id"],
+                "title": course["next_class_title"],
+                "date": course["next_class_at"],
+            }
+            for course in courses
+            if course["next_class_at"]
+        ),
+        key=lambda upcoming: upcoming["date"],
+    )
+    return {
+        "courses": courses,
+        "pending_submissions": sum(course["pending_submissions"] for course in courses),
+        "upcoming_classes": upcoming_classes,
+    }, [course["course_id"] for course in courses]
+
+
+def _student_dashboard(db, user_id: int, now: datetime) -> Tuple[dict, List[int]]:
+    """Enrolled courses of a student with the assignments still to submit"""
+    not_submitted = ~exists().where(
+        Submission.assignment_id == Assignment.id,
+        Submission.student_id == user_id,
+        Submission.is_active == 1,
+    )
+    due = (
+        select(Assignment.due_date, Assignment.title)
+        .join(ClassModel, ClassModel.id == Assignment.class_id)
+        .where(
+            ClassModel.course_id == CourseStudent.course_id,
+            Assignment.due_date >= now,
+            not_submitted,
+        )
+        .correlate(CourseStudent)
+    )
+    due_count = due.with_only_columns(func.count(Assignment.id)).scalar_subquery()
+    next_due = due.order_by(Assignment.due_date, Assignment.id).limit(1)
+    next_due_at = next_due.with_only_columns(Assignment.due_date).scalar_subquery()
+    next_due_title = next_due.with_only_columns(Assignment.title).scalar_subquery()
+    next_class_at = (
+        select(func.min(ClassModel.date))
+        .where(ClassModel.course_id == CourseStudent.course_id, ClassModel.date >= now)
+        .correlate(CourseStudent)
+        .scalar_subquery()
+    )
+
+    rows = (
+        db.query(
+            CourseStudent.course_id,
+            Course.name,
+            Course.grade_level,
+            Course.academic_year,
+            due_count,
+            next_due_at,
+            next_due_title,
+            next_class_at,
+        )
+        .join(Course, Course.id == CourseStudent.course_id)
+        .filter(
+            CourseStudent.student_id == user_id,
+            CourseStudent.is_active,
+            Course.is_active,
+        )
+        .order_by(Course.academic_year.desc(), Course.name)
+        .all()
+    )
+
+    courses = [
+        {
+            "course_id": course_id,
+            "course_name": course_name,
+            "grade_level": grade_level,
+            "academic_year": academic_year,
+            "due_assignments": count or 0,
+            "next_due_at": _isoformat(due_at),
+            "next_due_title": due_title,
+            "next_class_at": _isoformat(class_at),
+        }
+        for (
+            course_id,
+            course_name,
+            grade_level,
+            academic_year,
+            count,
+            due_at,
+            due_title,
+            class_at,
+        ) in rows
+    ]
+    return {
+        "courses": courses,
+        "due_assignments": sum(course["due_assignments"] for course in courses),
+    }, [course["course_id"] for course in courses]
+
+
+def get_dashboard_service(user_id: int) -> Tuple[Optional[dict], int]:
+    """
+    Data of the dashboard of a user, depending on the role
+
+    Teachers get their courses and subjects (from course_subjects) with the
+    submissions waiting for a grade and the next class; students get their
+    courses with the assignments still to submit. Each role needs the user
+    row plus one aggregate query, and the result is cached per user for
+    DASHBOARD_CACHE_TTL seconds.
+    """
+    user_id = int(user_id)
+    cached = dashboard_cache.get(user_id)
+    if cached is not None:
+        return cached, 200
+
+    db = SessionLocal()
+    try:
+        user = (
+            db.query(User.id, User.full_name, User.document, User.role)
+            .filter(User.id == user_id, User.is_active == 1)
+            .first()
+        )
+        if not user:
+            return None, 404
+
+        data = {
+            "user": {
+                "id": user.id,
+                "full_name": user.full_name,
+                "document": user.document,
+                "role": user.role.value if hasattr(user.role, "value") else user.role,
+            }
+        }
+        course_ids: List[int] = []
+        now = datetime.utcnow()
+        if user.role == UserRole.TEACHER:
+            data["teacher"], course_ids = _teacher_dashboard(db, user_id, now)
+        elif user.role == UserRole.STUDENT:
+            data["student"], course_ids = _student_dashboard(db, user_id, now)
+    finally:
+        db.close()
+
+    dashboard_cache.set(user_id, data, course_ids)
+    return data, 200
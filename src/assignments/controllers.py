@@ -4,6 +4,16 @@ from src.models.user import User, UserRole
 from src.models.assignment import Assignment
 from src.models.submission import Submission
 from src.database.database import SessionLocal
+from src.utils.user_cache import invalidate_class_caches, invalidate_user_caches
+from src.utils.idempotency import (
+    get_idempotency_key,
+    remember_submission,
+    replay_response,
+    replay_submission,
+    submission_idempotency,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
 from typing import Dict, Any, List
 from datetime import datetime
 
@@ -21,6 +31,7 @@ def create_assignment_controller(request: Request) -> tuple[Dict[str, Any], int]
 
         data = request.get_json()
         assignment = Assignment(
+            class_id=data["class_id"],
             title=data["title"],
             description=data["description"],
             author_id=user_id,
@@ -30,11 +41,13 @@ def create_assignment_controller(request: Request) -> tuple[Dict[str, Any], int]
         db.add(assignment)
         db.commit()
         db.refresh(assignment)
+        invalidate_class_caches(db, assignment.class_id)
 
         return {
             "id": assignment.id,
             "title": assignment.title,
             "description": assignment.description,
+            "class_id": assignment.class_id,
             "author_id": assignment.author_id,
             "due_date": assignment.due_date.isoformat(),
             "created_at": assignment.created_at.isoformat(),
@@ -72,13 +85,35 @@ def get_assignments_controller(
 def submit_assignment_controller(
     request: Request, id: int
 ) -> tuple[Dict[str, Any], int]:
-    """Submit an assignment"""
-    user_id = get_jwt_identity()
+    """
+    Submit an assignment
+
+    With an Idempotency-Key header, retries of the same submission get the
+    first response back (with Idempotent-Replayed: true) instead of creating
+    another submission.
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        key = get_idempotency_key(request)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    target = ("assignment", id)
+    if key:
+        cached = submission_idempotency.get(user_id, key)
+        if cached:
+            return replay_response(cached, target)
+
     db = SessionLocal()
     try:
+        if key:
+            replay = replay_submission(db, user_id, key, target)
+            if replay:
+                return replay
+
         assignment = db.query(Assignment).get(id)
 
-        if not assignment or not assignment.is_active:
+        if not assignment:
             return {"error": "Assignment not found"}, 404
 
         if datetime.utcnow() > assignment.due_date:
@@ -86,17 +121,27 @@ def submit_assignment_controller(
 
         data = request.get_json()
         submission = Submission(
-            student_id=user_id, assignment_id=id, content=data["content"]
+            student_id=user_id,
+            assignment_id=id,
+            content=data["content"],
+            idempotency_key=key,
         )
 
         db.add(submission)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key was stored first
+            db.rollback()
+            replay = replay_submission(db, user_id, key, target) if key else None
+            if not replay:
+                raise
+            return replay
         db.refresh(submission)
+        invalidate_user_caches(user_id)
+        invalidate_class_caches(db, assignment.class_id)
 
-        return {
-            "id": submission.id,
-            "submitted_at": submission.submitted_at.isoformat(),
-        }, 201
+        return remember_submission(user_id, key, submission), 201
     finally:
         db.close()
 
@@ -114,7 +159,13 @@ def get_assignment_submissions_controller(
         if user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
             return {"error": "Unauthorized"}, 403
 
-        submissions = db.query(Submission).filter_by(assignment_id=id).all()
+        # content is deferred, load it in the same query
+        submissions = (
+            db.query(Submission)
+            .options(undefer(Submission.content))
+            .filter_by(assignment_id=id)
+            .all()
+        )
         return {
             "submissions": [
                 {
@@ -154,6 +205,8 @@ def grade_submission_controller(
         submission.feedback = data.get("feedback")
 
         db.commit()
+        if submission.assignment_id:
+            invalidate_class_caches(db, submission.assignment.class_id)
 
         return {
             "id": submission.id,
@@ -1,4 +1,5 @@
 from flask import Blueprint, request
+from src.utils.rate_limit import SUBMIT_LIMITS, jwt_user_key, rate_limited
 from .controllers import (
     create_assignment_controller,
     get_assignments_controller,
@@ -21,6 +22,7 @@ def get_assignments():
 
 
 @assignments_bp.route("/<int:id>/submit", methods=["POST"])
+@rate_limited("submit", SUBMIT_LIMITS, user_key=jwt_user_key)
 def submit_assignment(id):
     return submit_assignment_controller(request, id)
 
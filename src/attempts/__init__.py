@@ -0,0 +1,3 @@
+from .router import attempts_bp
+
+__all__ = ["attempts_bp"]
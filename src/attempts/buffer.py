@@ -0,0 +1,249 @@
+import atexit
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from src.database.database import SessionLocal
+from src.models.attempt_answer import AttemptAnswer
+from src.models.exercise_attempt import AttemptStatus, ExerciseAttempt
+
+# Flush every FLUSH_INTERVAL seconds or when this many answers are waiting
+FLUSH_INTERVAL = 2.0
+FLUSH_SIZE = 2000
+# Rows per INSERT / UPDATE statement
+WRITE_BATCH_SIZE = 1000
+
+# (answer, received at)
+PendingAnswer = Tuple[Any, datetime]
+
+
+class AnswerBuffer:
+    """
+    Write-behind buffer for the autosaved answers of in-progress attempts
+
+    save() only keeps the latest answer per (attempt, question) in memory, so
+    a student changing an answer ten times between flushes costs one write. A
+    background thread writes the buffered answers every FLUSH_INTERVAL
+    seconds with one SELECT, one multi-row INSERT and one batched UPDATE, so
+    the write rate depends on the number of changed answers per interval and
+    not on the number of requests.
+
+    Durability: an acknowledged autosave is in memory for up to
+    FLUSH_INTERVAL seconds; it is written at shutdown but lost if the process
+    is killed. Submitting an attempt takes its buffered answers directly, and
+    the answers sent with the submit request take precedence, so clients
+    should send the full set of answers when submitting. Each answer keeps the
+    time it was received and an older answer never overwrites a newer one,
+    even if another worker flushes later.
+
+    Answers being flushed stay visible to peek() and take() until their
+    transaction is committed, and the flush reads the status of the attempts
+    with a shared lock: a submit that locked its attempt first makes the
+    flush wait and drop the answers it already took, and a flush that locked
+    first is committed before the submit reads the stored answers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[int, PendingAnswer]] = {}
+        # Answers taken by the flush in progress, until it commits
+        self._flushing: Dict[int, Dict[int, PendingAnswer]] = {}
+        self._flush_lock = threading.Lock()
+        self._size = 0
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Answers received and rows written, to see how much is coalesced
+        self.received = 0
+        self.written = 0
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="attempt-answer-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def save(self, attempt_id: int, answers: Dict[int, Any]):
+        """Buffer the latest answers of an attempt, keyed by question id"""
+        received_at = datetime.utcnow()
+        with self._lock:
+            attempt = self._pending.setdefault(attempt_id, {})
+            for question_id, answer in answers.items():
+                if question_id not in attempt:
+                    self._size += 1
+                attempt[question_id] = (answer, received_at)
+            self.received += len(answers)
+            if self._closed:
+                flush_now = True
+            else:
+                flush_now = False
+                self._start()
+                if self._size >= FLUSH_SIZE:
+                    self._wakeup.set()
+
+        if flush_now:
+            self.flush()
+
+    def peek(self, attempt_id: int) -> Dict[int, Any]:
+        """Buffered answers of an attempt, without removing them"""
+        with self._lock:
+            answers = dict(self._flushing.get(attempt_id, {}))
+            answers.update(self._pending.get(attempt_id, {}))
+        return {question_id: answer for question_id, (answer, _) in answers.items()}
+
+    def take(self, attempt_id: int) -> Dict[int, Any]:
+        """Remove and return the buffered answers of an attempt (on submit)"""
+        with self._lock:
+            pending = self._pending.pop(attempt_id, {})
+            self._size -= len(pending)
+            answers = dict(self._flushing.get(attempt_id, {}))
+            answers.update(pending)
+        return {question_id: answer for question_id, (answer, _) in answers.items()}
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing attempt answers: {str(e)}")
+
+    def _take_all(self) -> Dict[int, Dict[int, PendingAnswer]]:
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._size = 0
+            self._flushing = pending
+        return pending
+
+    def _requeue(self, pending: Dict[int, Dict[int, PendingAnswer]]):
+        # Answers saved after the failed flush are newer and win
+        with self._lock:
+            self._flushing = {}
+            for attempt_id, answers in pending.items():
+                current = self._pending.setdefault(attempt_id, {})
+                for question_id, entry in answers.items():
+                    if question_id not in current:
+                        current[question_id] = entry
+                        self._size += 1
+
+    def _write(self, db, pending: Dict[int, Dict[int, PendingAnswer]]) -> int:
+        # Answers of attempts already submitted (maybe by another worker) are
+        # dropped; the shared lock waits for a submit in progress
+        active = {
+            attempt_id
+            for (attempt_id,) in db.query(ExerciseAttempt.id)
+            .filter(
+                ExerciseAttempt.id.in_(list(pending)),
+                ExerciseAttempt.status == AttemptStatus.IN_PROGRESS,
+            )
+            .with_for_update(read=True)
+        }
+        if not active:
+            return 0
+        existing = set(
+            db.query(AttemptAnswer.attempt_id, AttemptAnswer.question_id).filter(
+                AttemptAnswer.attempt_id.in_(active)
+            )
+        )
+
+        new_rows: List[dict] = []
+        changed_rows: List[dict] = []
+        for attempt_id in active:
+            for question_id, (answer, received_at) in pending[attempt_id].items():
+                if (attempt_id, question_id) in existing:
+                    changed_rows.append(
+                        {
+                            "b_attempt_id": attempt_id,
+                            "b_question_id": question_id,
+                            "b_answer": answer,
+                            "b_updated_at": received_at,
+                        }
+                    )
+                else:
+                    new_rows.append(
+                        {
+                            "attempt_id": attempt_id,
+                            "question_id": question_id,
+                            "answer": answer,
+                            "updated_at": received_at,
+                        }
+                    )
+
+        table = AttemptAnswer.__table__
+        statement = (
+            update(table)
+            .where(
+                and_(
+                    table.c.attempt_id == bindparam("b_attempt_id"),
+                    table.c.question_id == bindparam("b_question_id"),
+                    table.c.updated_at < bindparam("b_updated_at"),
+                )
+            )
+            .values(answer=bindparam("b_answer"), updated_at=bindparam("b_updated_at"))
+        )
+        for start in range(0, len(new_rows), WRITE_BATCH_SIZE):
+            db.execute(insert(table), new_rows[start : start + WRITE_BATCH_SIZE])
+        for start in range(0, len(changed_rows), WRITE_BATCH_SIZE):
+            db.execute(statement, changed_rows[start : start + WRITE_BATCH_SIZE])
+        return len(new_rows) + len(changed_rows)
+
+    def flush(self) -> int:
+        """
+        Write the buffered answers to the database
+
+        Returns:
+            int: Number of answers written
+        """
+        with self._flush_lock:
+            pending = self._take_all()
+            if not pending:
+                return 0
+            return self._flush(pending)
+
+    def _flush(self, pending: Dict[int, Dict[int, PendingAnswer]]) -> int:
+        for attempt in range(2):
+            db = SessionLocal()
+            try:
+                written = self._write(db, pending)
+                db.commit()
+                with self._lock:
+                    self._flushing = {}
+                self.written += written
+                return written
+            except IntegrityError:
+                # Another worker inserted one of the answers first, the retry
+                # updates it instead
+                db.rollback()
+                if attempt:
+                    self._requeue(pending)
+                    raise
+            except Exception:
+                db.rollback()
+                self._requeue(pending)
+                raise
+            finally:
+                db.close()
+
+    def close(self):
+        """Stop the flusher thread and write the remaining answers"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=FLUSH_INTERVAL)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing attempt answers on shutdown: {str(e)}")
+
+    def __len__(self):
+        return self._size
+
+
+answer_buffer = AnswerBuffer()
+atexit.register(answer_buffer.close)
@@ -0,0 +1,130 @@
+from flask import Request, Response, current_app, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from src.models.user import UserRole
+from .events import STREAMS_FULL_RETRY_AFTER, exercise_events, iter_events
+from .service import (
+    autosave_answers_service,
+    get_attempt_service,
+    get_exercise_progress_service,
+    start_attempt_service,
+    submit_attempt_service,
+)
+
+STAFF_ROLES = [UserRole.TEACHER.name, UserRole.ADMIN.name]
+
+
+def _answers(request: Request):
+    answers = (request.get_json(silent=True) or {}).get("answers")
+    return answers if isinstance(answers, dict) else None
+
+
+@jwt_required()
+def start_attempt_controller(exercise_id: int, request: Request):
+    """Start an attempt at an exercise (or resume the one in progress)"""
+    if get_jwt().get("role") != UserRole.STUDENT.name:
+        return jsonify({"error": "Solo los estudiantes pueden presentar ejercicios"}), 403
+
+    attempt, status_code = start_attempt_service(exercise_id, int(get_jwt_identity()))
+    if status_code == 400:
+        return jsonify({"error": "El ejercicio no está disponible"}), status_code
+    if attempt is None:
+        return jsonify({"error": "Ejercicio no encontrado"}), status_code
+    return jsonify(attempt), status_code
+
+
+@jwt_required()
+def get_attempt_controller(attempt_id: int, request: Request):
+    """Attempt with its latest answers"""
+    is_staff = get_jwt().get("role") in STAFF_ROLES
+    attempt, status_code = get_attempt_service(
+        attempt_id, int(get_jwt_identity()), is_staff
+    )
+    if attempt is None:
+        return jsonify({"error": "Intento no encontrado"}), status_code
+    return jsonify(attempt), status_code
+
+
+@jwt_required()
+def autosave_answers_controller(attempt_id: int, request: Request):
+    """
+    Autosave the answers that changed, as {"answers": {question_id: answer}}
+
+    The answers are buffered and written in the background (see AnswerBuffer),
+    so this endpoint does not wait for the database.
+    """
+    answers = _answers(request)
+    if answers is None:
+        return jsonify({"error": "Debe enviar las respuestas"}), 400
+
+    result, status_code = autosave_answers_service(
+        attempt_id, int(get_jwt_identity()), answers
+    )
+    if status_code == 400:
+        return jsonify({"error": "Pregunta no válida para este ejercicio"}), status_code
+    if status_code == 409:
+        return jsonify({"error": "El intento ya terminó"}), status_code
+    if result is None:
+        return jsonify({"error": "Intento no encontrado"}), status_code
+    return jsonify(result), status_code
+
+
+@jwt_required()
+def submit_attempt_controller(attempt_id: int, request: Request):
+    """
+    Grade and close an attempt
+
+    The answers of the request are optional and override the autosaved ones;
+    clients should send all of them so the result does not depend on the
+    last autosave.
+    """
+    result, status_code = submit_attempt_service(
+        attempt_id, int(get_jwt_identity()), _answers(request)
+    )
+    if status_code == 409:
+        return jsonify({"error": "El intento ya terminó"}), status_code
+    if result is None:
+        return jsonify({"error": "Intento no encontrado"}), status_code
+    return jsonify(result), status_code
+
+
+@jwt_required()
+def exercise_events_controller(exercise_id: int, request: Request):
+    """
+    Live progress of the attempts of an exercise as Server-Sent Events
+
+    The stream starts with a "snapshot" event and then sends
+    "attempt_started", "answers_saved" and "attempt_submitted" events as they
+    happen, with a heartbeat comment in between. Each open stream holds a
+    worker thread (or greenlet), so the app must run with a gthread or gevent
+    worker, and at most SSE_MAX_STREAMS are open per process (503 beyond).
+    """
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    # Subscribe before the snapshot so no event falls between them; the
+    # streams are capped so they never take the threads of the students
+    subscriber = exercise_events.subscribe(
+        exercise_id, limit=current_app.config["SSE_MAX_STREAMS"]
+    )
+    if subscriber is None:
+        return (
+            jsonify({"error": "Demasiadas conexiones de seguimiento, intente más tarde"}),
+            503,
+            {"Retry-After": str(STREAMS_FULL_RETRY_AFTER)},
+        )
+    try:
+        snapshot, status_code = get_exercise_progress_service(exercise_id)
+    except Exception:
+        # The stream never starts, so its slot must be released here
+        exercise_events.unsubscribe(subscriber)
+        raise
+    if snapshot is None:
+        exercise_events.unsubscribe(subscriber)
+        return jsonify({"error": "Ejercicio no encontrado"}), status_code
+
+    return Response(
+        iter_events(subscriber, snapshot),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
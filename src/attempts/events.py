@@ -0,0 +1,155 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set
+
+# Events kept for a subscriber that is not reading; past this it is
+# disconnected and the browser reconnects with a fresh snapshot
+SUBSCRIBER_QUEUE_SIZE = 256
+# Seconds between heartbeat comments, so proxies keep the connection open
+HEARTBEAT_INTERVAL = 15
+# Streams are closed after this many seconds to free the worker thread; the
+# browser reconnects after RETRY_MS
+MAX_STREAM_SECONDS = 30 * 60
+RETRY_MS = 3000
+# Seconds a client is asked to wait when every stream slot is taken
+STREAMS_FULL_RETRY_AFTER = 30
+
+_CLOSED = object()
+
+
+class Subscriber:
+    """Bounded queue of the events of one stream"""
+
+    def __init__(self, exercise_id: int):
+        self.exercise_id = exercise_id
+        self.queue: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def put(self, event) -> bool:
+        """Queue an event without blocking, False if the subscriber is too slow"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        self.closed = True
+        # The queued events are dropped, the stream ends right away and the
+        # reconnection starts from a new snapshot
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(_CLOSED)
+
+
+class ExerciseEventHub:
+    """
+    In-process pub/sub of the attempt events of each exercise
+
+    publish() is called from the autosave and submit paths: it only takes a
+    lock and puts the event in the queue of each subscriber of the exercise,
+    without waiting, so a slow stream never slows down a student. A
+    subscriber whose queue is full is disconnected instead of buffering
+    without limit.
+
+    Only events of this process are seen, so the streams are complete when
+    the app runs in one process (gthread or gevent worker); with several
+    processes each stream sees the students served by its own process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._ids = itertools.count(1)
+        self.disconnected = 0
+        self.rejected = 0
+
+    def subscribe(self, exercise_id: int, limit: Optional[int] = None) -> Optional[Subscriber]:
+        """
+        Add a stream of an exercise, None if this process already has limit
+        streams open (each one holds a worker thread)
+        """
+        subscriber = Subscriber(exercise_id)
+        with self._lock:
+            if limit is not None and self._count() >= limit:
+                self.rejected += 1
+                return None
+            self._subscribers.setdefault(exercise_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.exercise_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.exercise_id]
+
+    def publish(self, exercise_id: int, event: str, data: dict):
+        """Send an event to the streams of an exercise (no-op without streams)"""
+        with self._lock:
+            subscribers = self._subscribers.get(exercise_id)
+            if not subscribers:
+                return
+            message = (next(self._ids), event, data)
+            slow = [subscriber for subscriber in subscribers if not subscriber.put(message)]
+            for subscriber in slow:
+                subscribers.discard(subscriber)
+            self.disconnected += len(slow)
+        for subscriber in slow:
+            subscriber.close()
+
+    def subscriber_count(self, exercise_id: Optional[int] = None) -> int:
+        with self._lock:
+            if exercise_id is not None:
+                return len(self._subscribers.get(exercise_id, ()))
+            return self._count()
+
+    def _count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+exercise_events = ExerciseEventHub()
+
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events message"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def iter_events(subscriber: Subscriber, snapshot: dict) -> Iterator[str]:
+    """
+    Body of an event stream: the snapshot, then the events of the subscriber
+    with a heartbeat comment every HEARTBEAT_INTERVAL seconds
+
+    The subscriber is removed when the client disconnects (the generator is
+    closed), when it is too slow or after MAX_STREAM_SECONDS.
+    """
+    ends_at = time.monotonic() + MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        yield format_event("snapshot", snapshot)
+        while True:
+            remaining = ends_at - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = subscriber.queue.get(timeout=min(HEARTBEAT_INTERVAL, remaining))
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if message is _CLOSED:
+                return
+            event_id, event, data = message
+            yield format_event(event, data, event_id)
+    finally:
+        exercise_events.unsubscribe(subscriber)
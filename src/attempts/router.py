@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import click
+from flask import Blueprint, request
+from src.utils.rate_limit import AUTOSAVE_LIMITS, SUBMIT_LIMITS, jwt_user_key, rate_limited
+from .controllers import (
+    start_attempt_controller,
+    get_attempt_controller,
+    autosave_answers_controller,
+    submit_attempt_controller,
+    exercise_events_controller,
+)
+from .service import attempt_timer, finalize_expired_attempts, pending_deadlines
+from .timer import DEADLINE_GRACE, FINALIZE_BATCH_SIZE
+
+attempts_bp = Blueprint("attempts", __name__, url_prefix="/api/attempts")
+
+
+@attempts_bp.before_app_request
+def start_attempt_timer():
+    """Arrancar el temporizador de intentos (carga los plazos pendientes tras un reinicio)"""
+    attempt_timer.start()
+
+
+@attempts_bp.route("/exercises/<int:exercise_id>", methods=["POST"])
+def start_attempt(exercise_id):
+    """Iniciar (o retomar) un intento de un ejercicio"""
+    return start_attempt_controller(exercise_id, request)
+
+
+@attempts_bp.route("/exercises/<int:exercise_id>/events", methods=["GET"])
+def exercise_events(exercise_id):
+    """Progreso en vivo de los intentos de un ejercicio (Server-Sent Events)"""
+    return exercise_events_controller(exercise_id, request)
+
+
+@attempts_bp.route("/<int:attempt_id>", methods=["GET"])
+def get_attempt(attempt_id):
+    """Intento con sus últimas respuestas"""
+    return get_attempt_controller(attempt_id, request)
+
+
+@attempts_bp.route("/<int:attempt_id>/answers", methods=["PATCH"])
+@rate_limited("autosave", AUTOSAVE_LIMITS, user_key=jwt_user_key, methods=("PATCH",))
+def autosave_answers(attempt_id):
+    """Guardar automáticamente las respuestas modificadas"""
+    return autosave_answers_controller(attempt_id, request)
+
+
+@attempts_bp.route("/<int:attempt_id>/submit", methods=["POST"])
+@rate_limited("submit", SUBMIT_LIMITS, user_key=jwt_user_key)
+def submit_attempt(attempt_id):
+    """Calificar y cerrar el intento"""
+    return submit_attempt_controller(attempt_id, request)
+
+
+@attempts_bp.cli.command("expire")
+def expire_command():
+    """Cerrar los intentos cuyo tiempo ya terminó"""
+    expired = [
+        attempt_id
+        for attempt_id, _ in pending_deadlines(
+            datetime.utcnow() - timedelta(seconds=DEADLINE_GRACE)
+        )
+    ]
+    closed = 0
+    for start in range(0, len(expired), FINALIZE_BATCH_SIZE):
+        closed += finalize_expired_attempts(expired[start : start + FINALIZE_BATCH_SIZE])
+    click.echo(f"{closed} intentos cerrados")
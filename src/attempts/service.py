@@ -0,0 +1,538 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import case, insert, update
+
+from src.database.database import SessionLocal
+from src.models.attempt_answer import AttemptAnswer
+from src.models.exercise import Exercise
+from src.models.exercise_attempt import AttemptStatus, ExerciseAttempt
+from src.models.exercise_question import ExerciseQuestion
+from src.models.submission import Submission
+from src.models.user import User
+from src.questions.service import grade_exercise_answers, load_answer_key, score_answers
+from src.utils.user_cache import invalidate_user_caches
+from .buffer import answer_buffer
+from .events import exercise_events
+from .timer import DEADLINE_GRACE, DeadlineTimer
+
+# In-progress attempts whose owner and questions are kept in memory, so an
+# autosave needs no query
+ATTEMPT_CACHE_SIZE = 5000
+
+
+class AttemptInfo(NamedTuple):
+    student_id: int
+    exercise_id: int
+    question_ids: FrozenSet[int]
+    deadline: Optional[datetime]
+
+
+class AttemptCache:
+    """Owner and questions of the in-progress attempts seen by this process"""
+
+    def __init__(self, size: int = ATTEMPT_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, AttemptInfo]" = OrderedDict()
+
+    def get(self, attempt_id: int) -> Optional[AttemptInfo]:
+        with self._lock:
+            info = self._entries.get(attempt_id)
+            if info is not None:
+                self._entries.move_to_end(attempt_id)
+            return info
+
+    def set(self, attempt_id: int, info: AttemptInfo):
+        with self._lock:
+            self._entries[attempt_id] = info
+            self._entries.move_to_end(attempt_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, attempt_id: int):
+        with self._lock:
+            self._entries.pop(attempt_id, None)
+
+
+attempt_cache = AttemptCache()
+
+
+def _attempt_info(db, attempt: ExerciseAttempt) -> AttemptInfo:
+    question_ids = frozenset(
+        question_id
+        for (question_id,) in db.query(ExerciseQuestion.question_id).filter(
+            ExerciseQuestion.exercise_id == attempt.exercise_id
+        )
+    )
+    info = AttemptInfo(
+        attempt.student_id, attempt.exercise_id, question_ids, attempt.deadline
+    )
+    attempt_cache.set(attempt.id, info)
+    return info
+
+
+def _deadline(exercise: Exercise, started_at: datetime) -> Optional[datetime]:
+    """End of the time limit of the exercise, or its due date if that comes first"""
+    deadlines = [exercise.due_date] if exercise.due_date else []
+    if exercise.time_limit:
+        deadlines.append(started_at + timedelta(minutes=exercise.time_limit))
+    return min(deadlines) if deadlines else None
+
+
+def _is_over(deadline: Optional[datetime], now: datetime) -> bool:
+    return deadline is not None and now > deadline + timedelta(seconds=DEADLINE_GRACE)
+
+
+def _saved_answers(db, attempt_id: int) -> Dict[str, Any]:
+    """Stored answers of an attempt plus the ones still buffered, keyed by question id"""
+    answers = {
+        str(question_id): answer
+        for question_id, answer in db.query(
+            AttemptAnswer.question_id, AttemptAnswer.answer
+        ).filter(AttemptAnswer.attempt_id == attempt_id)
+    }
+    answers.update(
+        (str(question_id), answer)
+        for question_id, answer in answer_buffer.peek(attempt_id).items()
+    )
+    return answers
+
+
+def _attempt_to_dict(attempt: ExerciseAttempt, answers: Dict[str, Any]) -> dict:
+    return {
+        "id": attempt.id,
+        "exercise_id": attempt.exercise_id,
+        "student_id": attempt.student_id,
+        "status": attempt.status.value,
+        "started_at": attempt.started_at.isoformat() if attempt.started_at else None,
+        "deadline": attempt.deadline.isoformat() if attempt.deadline else None,
+        "finished_at": attempt.finished_at.isoformat() if attempt.finished_at else None,
+        "score": attempt.score,
+        "submission_id": attempt.submission_id,
+        "answers": answers,
+    }
+
+
+def start_attempt_service(exercise_id: int, student_id: int) -> Tuple[Optional[dict], int]:
+    """
+    Start an attempt at an exercise, or resume the one in progress
+
+    Returns:
+        tuple: (attempt, status) with 201 for a new attempt and 200 for the
+        one in progress, or (None, 404/400) if the exercise does not exist or
+        is not available
+    """
+    db = SessionLocal()
+    try:
+        exercise = db.query(Exercise).get(exercise_id)
+        if not exercise or not exercise.is_active:
+            return None, 404
+
+        attempt = (
+            db.query(ExerciseAttempt)
+            .filter(
+                ExerciseAttempt.exercise_id == exercise_id,
+                ExerciseAttempt.student_id == student_id,
+                ExerciseAttempt.status == AttemptStatus.IN_PROGRESS,
+            )
+            .first()
+        )
+        now = datetime.utcnow()
+        if attempt and _is_over(attempt.deadline, now):
+            # The timer of this process did not get to it yet
+            finalize_expired_attempts([attempt.id])
+            # End the snapshot of this session to read the closed attempt
+            db.rollback()
+            db.refresh(attempt)
+        if attempt:
+            if attempt.status == AttemptStatus.IN_PROGRESS:
+                _attempt_info(db, attempt)
+            return _attempt_to_dict(attempt, _saved_answers(db, attempt.id)), 200
+
+        if (exercise.available_from and now < exercise.available_from) or (
+            exercise.due_date and now > exercise.due_date
+        ):
+            return None, 400
+
+        attempt = ExerciseAttempt(
+            exercise_id=exercise_id,
+            student_id=student_id,
+            started_at=now,
+            deadline=_deadline(exercise, now),
+        )
+        db.add(attempt)
+        db.commit()
+        db.refresh(attempt)
+        _attempt_info(db, attempt)
+        if attempt.deadline:
+            attempt_timer.schedule(attempt.id, attempt.deadline)
+        result = _attempt_to_dict(attempt, {})
+        exercise_events.publish(
+            exercise_id,
+            "attempt_started",
+            {key: result[key] for key in ("id", "student_id", "started_at", "deadline")},
+        )
+        return result, 201
+    except Exception as e:
+        db.rollback()
+        print(f"Error starting attempt: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+def get_attempt_service(
+    attempt_id: int, user_id: int, is_staff: bool = False
+) -> Tuple[Optional[dict], int]:
+    """Attempt with its latest answers, including the ones not written yet"""
+    db = SessionLocal()
+    try:
+        attempt = db.query(ExerciseAttempt).get(attempt_id)
+        if not attempt or (not is_staff and attempt.student_id != user_id):
+            return None, 404
+        return _attempt_to_dict(attempt, _saved_answers(db, attempt_id)), 200
+    finally:
+        db.close()
+
+
+def autosave_answers_service(
+    attempt_id: int, student_id: int, answers: Dict[str, Any]
+) -> Tuple[Optional[dict], int]:
+    """
+    Autosave some answers of an attempt in progress
+
+    The answers are validated against the cached owner and questions of the
+    attempt and buffered; the AnswerBuffer writes the latest answer per
+    question in the background. Only the first autosave of an attempt in this
+    process reads the database.
+
+    Returns:
+        tuple: ({"attempt_id", "saved"}, 202), (None, 404) if the attempt is
+        not one of the student, (None, 409) if it was submitted or its time
+        is over or (None, 400) if an answer is for a question that is not in
+        the exercise
+    """
+    info = attempt_cache.get(attempt_id)
+    if info is None:
+        db = SessionLocal()
+        try:
+            attempt = db.query(ExerciseAttempt).get(attempt_id)
+            if not attempt or attempt.student_id != student_id:
+                return None, 404
+            if attempt.status != AttemptStatus.IN_PROGRESS:
+                return None, 409
+            info = _attempt_info(db, attempt)
+        finally:
+            db.close()
+    elif info.student_id != student_id:
+        return None, 404
+    if _is_over(info.deadline, datetime.utcnow()):
+        return None, 409
+
+    try:
+        answers = {int(question_id): answer for question_id, answer in answers.items()}
+    except (TypeError, ValueError):
+        return None, 400
+    if not answers.keys() <= info.question_ids:
+        return None, 400
+
+    answer_buffer.save(attempt_id, answers)
+    exercise_events.publish(
+        info.exercise_id,
+        "answers_saved",
+        {"id": attempt_id, "student_id": student_id, "question_ids": sorted(answers)},
+    )
+    return {"attempt_id": attempt_id, "saved": len(answers)}, 202
+
+
+def submit_attempt_service(
+    attempt_id: int, student_id: int, answers: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[dict], int]:
+    """
+    Grade and close an attempt
+
+    The answers are the stored ones, updated with the ones still buffered and
+    then with the ones sent in the request, so nothing acknowledged by an
+    autosave of this process is lost. After the deadline (and its grace
+    period) the answers of the request are ignored. The attempt row is locked
+    so two submits, or a submit and the deadline timer, do not create two
+    submissions.
+
+    Returns:
+        tuple: ({"attempt_id", "submission_id", "score", "submitted_at"}, 201),
+        (None, 404) if the attempt is not one of the student or (None, 409)
+        if it was already submitted
+    """
+    db = SessionLocal()
+    pending: Dict[int, Any] = {}
+    try:
+        attempt = (
+            db.query(ExerciseAttempt)
+            .filter(ExerciseAttempt.id == attempt_id)
+            .with_for_update()
+            .first()
+        )
+        if not attempt or attempt.student_id != student_id:
+            return None, 404
+        if attempt.status != AttemptStatus.IN_PROGRESS:
+            attempt_cache.discard(attempt_id)
+            return None, 409
+
+        pending = answer_buffer.take(attempt_id)
+        final_answers = {
+            str(question_id): answer
+            for question_id, answer in db.query(
+                AttemptAnswer.question_id, AttemptAnswer.answer
+            ).filter(AttemptAnswer.attempt_id == attempt_id)
+        }
+        final_answers.update((str(question_id), answer) for question_id, answer in pending.items())
+        now = datetime.utcnow()
+        if not _is_over(attempt.deadline, now):
+            final_answers.update(
+                (str(question_id), answer) for question_id, answer in (answers or {}).items()
+            )
+
+        score, _ = grade_exercise_answers(db, attempt.exercise_id, final_answers)
+        submission = Submission(
+            student_id=student_id,
+            exercise_id=attempt.exercise_id,
+            content=final_answers,
+            score=score,
+        )
+        db.add(submission)
+        db.flush()
+
+        attempt.status = AttemptStatus.SUBMITTED
+        finished_at = min(now, attempt.deadline) if attempt.deadline else now
+        exercise_id = attempt.exercise_id
+        attempt.finished_at = finished_at
+        attempt.score = score
+        attempt.submission_id = submission.id
+        db.commit()
+        db.refresh(submission)
+    except Exception as e:
+        db.rollback()
+        if pending:
+            # Keep the autosaved answers for the next try
+            answer_buffer.save(attempt_id, pending)
+        print(f"Error submitting attempt: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+    attempt_cache.discard(attempt_id)
+    attempt_timer.cancel(attempt_id)
+    invalidate_user_caches(student_id)
+    exercise_events.publish(
+        exercise_id,
+        "attempt_submitted",
+        {
+            "id": attempt_id,
+            "student_id": student_id,
+            "score": score,
+            "submission_id": submission.id,
+            "finished_at": finished_at.isoformat(),
+            "expired": False,
+        },
+    )
+    return {
+        "attempt_id": attempt_id,
+        "submission_id": submission.id,
+        "score": score,
+        "submitted_at": submission.submitted_at.isoformat(),
+    }, 201
+
+
+def get_exercise_progress_service(exercise_id: int) -> Tuple[Optional[dict], int]:
+    """
+    Attempts of an exercise with the questions answered so far, the snapshot
+    a live monitoring stream starts from
+
+    Returns:
+        tuple: ({"exercise_id", "question_count", "attempts"}, 200) or
+        (None, 404) if the exercise does not exist
+    """
+    db = SessionLocal()
+    try:
+        if not db.query(Exercise.id).filter(Exercise.id == exercise_id).first():
+            return None, 404
+        question_count = (
+            db.query(ExerciseQuestion.id)
+            .filter(ExerciseQuestion.exercise_id == exercise_id)
+            .count()
+        )
+        rows = (
+            db.query(ExerciseAttempt, User.full_name)
+            .join(User, User.id == ExerciseAttempt.student_id)
+            .filter(ExerciseAttempt.exercise_id == exercise_id)
+            .order_by(ExerciseAttempt.id)
+            .all()
+        )
+        answered: Dict[int, set] = {attempt.id: set() for attempt, _ in rows}
+        in_progress = [
+            attempt.id for attempt, _ in rows if attempt.status == AttemptStatus.IN_PROGRESS
+        ]
+        if in_progress:
+            for attempt_id, question_id in db.query(
+                AttemptAnswer.attempt_id, AttemptAnswer.question_id
+            ).filter(AttemptAnswer.attempt_id.in_(in_progress)):
+                answered[attempt_id].add(question_id)
+            for attempt_id in in_progress:
+                answered[attempt_id].update(answer_buffer.peek(attempt_id))
+
+        attempts = []
+        for attempt, full_name in rows:
+            item = _attempt_to_dict(attempt, {})
+            del item["answers"]
+            item["student_name"] = full_name
+            item["question_ids"] = sorted(answered[attempt.id])
+            attempts.append(item)
+        return {
+            "exercise_id": exercise_id,
+            "question_count": question_count,
+            "attempts": attempts,
+        }, 200
+    finally:
+        db.close()
+
+
+def pending_deadlines(until: Optional[datetime] = None) -> List[Tuple[int, datetime]]:
+    """
+    (attempt id, deadline) of the attempts in progress with a deadline, only
+    the ones before `until` if given (a range of idx_exercise_attempts_status_deadline)
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ExerciseAttempt.id, ExerciseAttempt.deadline).filter(
+            ExerciseAttempt.status == AttemptStatus.IN_PROGRESS,
+            ExerciseAttempt.deadline.isnot(None),
+        )
+        if until is not None:
+            query = query.filter(ExerciseAttempt.deadline <= until)
+        return [tuple(row) for row in query.order_by(ExerciseAttempt.deadline)]
+    finally:
+        db.close()
+
+
+def finalize_expired_attempts(attempt_ids: Iterable[int]) -> int:
+    """
+    Grade and close the attempts whose deadline has passed
+
+    The attempts still in progress are locked, their stored and buffered
+    answers are graded with one answer key per exercise, the submissions are
+    written with one INSERT and the attempts closed with one UPDATE. The
+    submissions are stored with the idempotency key "attempt:<id>" to read
+    their ids back with one query. Attempts submitted meanwhile are skipped.
+
+    Returns:
+        int: Number of attempts closed
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    pending: Dict[int, Dict[int, Any]] = {}
+    try:
+        attempts = (
+            db.query(
+                ExerciseAttempt.id,
+                ExerciseAttempt.exercise_id,
+                ExerciseAttempt.student_id,
+                ExerciseAttempt.deadline,
+            )
+            .filter(
+                ExerciseAttempt.id.in_(list(attempt_ids)),
+                ExerciseAttempt.status == AttemptStatus.IN_PROGRESS,
+                ExerciseAttempt.deadline <= now,
+            )
+            .with_for_update()
+            .all()
+        )
+        if not attempts:
+            db.commit()
+            return 0
+
+        ids = [attempt.id for attempt in attempts]
+        answers: Dict[int, Dict[str, Any]] = {attempt_id: {} for attempt_id in ids}
+        for attempt_id, question_id, answer in db.query(
+            AttemptAnswer.attempt_id, AttemptAnswer.question_id, AttemptAnswer.answer
+        ).filter(AttemptAnswer.attempt_id.in_(ids)):
+            answers[attempt_id][str(question_id)] = answer
+        for attempt_id in ids:
+            pending[attempt_id] = answer_buffer.take(attempt_id)
+            answers[attempt_id].update(
+                (str(question_id), answer) for question_id, answer in pending[attempt_id].items()
+            )
+
+        answer_keys = {
+            exercise_id: load_answer_key(db, exercise_id)
+            for exercise_id in {attempt.exercise_id for attempt in attempts}
+        }
+        scores: Dict[int, float] = {}
+        rows = []
+        for attempt in attempts:
+            scores[attempt.id], _ = score_answers(
+                answer_keys[attempt.exercise_id], answers[attempt.id]
+            )
+            rows.append(
+                {
+                    "student_id": attempt.student_id,
+                    "exercise_id": attempt.exercise_id,
+                    "content": answers[attempt.id],
+                    "score": scores[attempt.id],
+                    "submitted_at": attempt.deadline,
+                    "idempotency_key": f"attempt:{attempt.id}",
+                }
+            )
+        db.execute(insert(Submission.__table__), rows)
+
+        submission_ids = {
+            int(key.split(":", 1)[1]): submission_id
+            for submission_id, key in db.query(Submission.id, Submission.idempotency_key).filter(
+                Submission.student_id.in_({attempt.student_id for attempt in attempts}),
+                Submission.idempotency_key.in_([row["idempotency_key"] for row in rows]),
+            )
+        }
+        db.execute(
+            update(ExerciseAttempt)
+            .where(ExerciseAttempt.id.in_(ids))
+            .values(
+                status=AttemptStatus.SUBMITTED,
+                finished_at=ExerciseAttempt.deadline,
+                score=case(scores, value=ExerciseAttempt.id),
+                submission_id=case(submission_ids, value=ExerciseAttempt.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for attempt_id, answers_of_attempt in pending.items():
+            if answers_of_attempt:
+                answer_buffer.save(attempt_id, answers_of_attempt)
+        print(f"Error closing expired attempts: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+    for attempt in attempts:
+        attempt_cache.discard(attempt.id)
+        attempt_timer.cancel(attempt.id)
+        invalidate_user_caches(attempt.student_id)
+        exercise_events.publish(
+            attempt.exercise_id,
+            "attempt_submitted",
+            {
+                "id": attempt.id,
+                "student_id": attempt.student_id,
+                "score": scores[attempt.id],
+                "submission_id": submission_ids.get(attempt.id),
+                "finished_at": attempt.deadline.isoformat(),
+                "expired": True,
+            },
+        )
+    return len(attempts)
+
+
+attempt_timer = DeadlineTimer(finalize_expired_attempts, pending_deadlines)
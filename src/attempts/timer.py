@@ -0,0 +1,133 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds after a deadline before the attempt is closed, for the last
+# autosave or submit that was sent in time
+DEADLINE_GRACE = 5
+# Attempts closed per batch
+FINALIZE_BATCH_SIZE = 200
+# Every RESYNC_INTERVAL seconds the expired attempts of other workers (for
+# example one that was stopped) are loaded from the database
+RESYNC_INTERVAL = 60.0
+# Seconds before retrying a batch that failed
+RETRY_DELAY = 5.0
+
+
+class DeadlineTimer:
+    """
+    Min-heap of attempt deadlines served by one background thread
+
+    schedule() pushes (deadline, attempt_id) in O(log n) and the thread
+    sleeps until the earliest deadline plus DEADLINE_GRACE, then hands every
+    expired attempt to `on_expired` in batches of FINALIZE_BATCH_SIZE.
+    Cancelled or rescheduled entries stay in the heap and are skipped when
+    they come up. When the thread starts, and every RESYNC_INTERVAL seconds,
+    the pending deadlines are read from the database with `load_pending`,
+    so attempts of a restarted or stopped worker are still closed.
+
+    Args:
+        on_expired: Function that closes a batch of attempt ids
+        load_pending: Function that returns (attempt_id, deadline) of the
+            attempts in progress, all of them or only the ones whose deadline
+            is before the given time
+    """
+
+    def __init__(
+        self,
+        on_expired: Callable[[List[int]], int],
+        load_pending: Callable[[Optional[datetime]], Iterable[Tuple[int, datetime]]],
+    ):
+        self.on_expired = on_expired
+        self.load_pending = load_pending
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self):
+        """Start the thread (and load the pending deadlines) if it is not running"""
+        with self._cond:
+            if self._closed or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="attempt-deadline-timer", daemon=True
+            )
+            self._thread.start()
+
+    def _push(self, attempt_id: int, deadline: datetime):
+        self._deadlines[attempt_id] = deadline
+        heapq.heappush(self._heap, (deadline, attempt_id))
+
+    def schedule(self, attempt_id: int, deadline: datetime):
+        """Close the attempt DEADLINE_GRACE seconds after its deadline"""
+        with self._cond:
+            self._push(attempt_id, deadline)
+            if self._heap[0][1] == attempt_id:
+                self._cond.notify()
+        self.start()
+
+    def cancel(self, attempt_id: int):
+        """Forget the deadline of an attempt submitted by the student"""
+        with self._cond:
+            self._deadlines.pop(attempt_id, None)
+
+    def _expired(self, now: datetime) -> List[int]:
+        limit = now - timedelta(seconds=DEADLINE_GRACE)
+        expired = []
+        while self._heap and self._heap[0][0] <= limit and len(expired) < FINALIZE_BATCH_SIZE:
+            deadline, attempt_id = heapq.heappop(self._heap)
+            if self._deadlines.get(attempt_id) == deadline:
+                del self._deadlines[attempt_id]
+                expired.append(attempt_id)
+        return expired
+
+    def _resync(self, until: Optional[datetime]):
+        try:
+            pending = list(self.load_pending(until))
+        except Exception as e:
+            print(f"Error loading attempt deadlines: {str(e)}")
+            return
+        with self._cond:
+            for attempt_id, deadline in pending:
+                if self._deadlines.get(attempt_id) != deadline:
+                    self._push(attempt_id, deadline)
+
+    def _run(self):
+        self._resync(None)
+        next_resync = datetime.utcnow() + timedelta(seconds=RESYNC_INTERVAL)
+        while not self._closed:
+            now = datetime.utcnow()
+            if now >= next_resync:
+                self._resync(now - timedelta(seconds=DEADLINE_GRACE))
+                next_resync = now + timedelta(seconds=RESYNC_INTERVAL)
+
+            with self._cond:
+                expired = self._expired(now)
+                if not expired:
+                    wait = (next_resync - now).total_seconds()
+                    if self._heap:
+                        due = self._heap[0][0] + timedelta(seconds=DEADLINE_GRACE)
+                        wait = min(wait, (due - now).total_seconds())
+                    self._cond.wait(max(wait, 0.01))
+                    continue
+
+            try:
+                self.on_expired(expired)
+            except Exception as e:
+                print(f"Error closing expired attempts: {str(e)}")
+                retry_at = datetime.utcnow() + timedelta(seconds=RETRY_DELAY)
+                with self._cond:
+                    for attempt_id in expired:
+                        self._deadlines.setdefault(attempt_id, retry_at)
+                        heapq.heappush(self._heap, (self._deadlines[attempt_id], attempt_id))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def __len__(self):
+        return len(self._deadlines)
@@ -1,4 +1,5 @@
 from flask import Blueprint, request
+from src.utils.rate_limit import LOGIN_LIMITS, login_user_key, rate_limited
 from .controllers import (
     login_user_controller,
     get_current_user_controller,
@@ -11,6 +12,7 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
+@rate_limited("login", LOGIN_LIMITS, user_key=login_user_key)
 def login():
     """Procesa login"""
     return login_user_controller(request)
@@ -13,6 +13,7 @@ from .validation import BookCreateSchema, BookUpdateSchema
 from pydantic import ValidationError
 import traceback
 from src.utils.validate_file import validate_file
+from src.utils.file_utils import upload_too_large
 
 book_bp = Blueprint("books", __name__, url_prefix="/books")
 
@@ -22,6 +23,10 @@ book_bp = Blueprint("books", __name__, url_prefix="/books")
 @role_required(UserRole.ADMIN)
 def create_book():
     """Endpoint to create books"""
+    # Reject a body larger than the book and its cover before reading it
+    if upload_too_large(request.content_length, "book", "cover"):
+        return jsonify({"error": "La solicitud supera el tamaño máximo permitido"}), 413
+
     try:
         # Check if there are data in the form
         if not request.form:
@@ -51,6 +56,9 @@ def create_book():
         return create_book_controller(data, file, cover_image)
     except ValidationError as e:
         return jsonify({"error": e.errors()}), 400
+    except ValueError as e:
+        # Invalid or too large file detected while saving it
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         traceback.print_exc()  # Print the stack trace in the server logs
         return jsonify({"error": f"Error inesperado: {str(e)}"}), 500
@@ -77,6 +85,10 @@ def get_book(book_id):
 @role_required(UserRole.ADMIN)
 def update_book(book_id):
     """Update a book by ID"""
+    # Reject a body larger than the book and its cover before reading it
+    if upload_too_large(request.content_length, "book", "cover"):
+        return jsonify({"error": "La solicitud supera el tamaño máximo permitido"}), 413
+
     try:
         # Validate form data
         data = BookUpdateSchema(**request.form)
@@ -100,6 +112,9 @@ def update_book(book_id):
         return update_book_controller(book_id, data, file, cover_image)
     except ValidationError as e:
         return jsonify({"error": e.errors()}), 400
+    except ValueError as e:
+        # Invalid or too large file detected while saving it
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": f"Error inesperado: {str(e)}"}), 500
@@ -2,6 +2,7 @@ from .validation import BookCreateSchema, BookUpdateSchema
 from ..models.book import Book
 from ..database.database import SessionLocal
 from ..utils.file_utils import save_file, delete_file, update_file
+from ..utils.image_utils import local_srcset, schedule_local_derivatives
 
 
 def book_to_dict(book):
@@ -12,6 +13,7 @@ def book_to_dict(book):
         "description": book.description,
         "file_path": book.file_path,
         "cover_image": book.cover_image,
+        "cover_variants": local_srcset(book.cover_image),
         "target_audience": book.target_audience,
     }
 
@@ -41,6 +43,10 @@ def create_book_service(data: BookCreateSchema, file, cover_image):
         db.add(book)
         db.commit()
         db.refresh(book)
+
+        # Resize the cover in the job worker
+        if cover_path:
+            schedule_local_derivatives(cover_path)
         return book_to_dict(book)
     except Exception as e:
         db.rollback()
@@ -106,6 +112,9 @@ def update_book_service(
 
         db.commit()
         db.refresh(book)
+
+        if cover_image:
+            schedule_local_derivatives(book.cover_image)
         return book_to_dict(book)
     finally:
         db.close()
@@ -0,0 +1,3 @@
+from .router import class_views_bp
+
+__all__ = ["class_views_bp"]
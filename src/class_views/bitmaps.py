@@ -0,0 +1,310 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from src.database.database import SessionLocal
+from src.models.class_model import ClassModel
+from src.models.class_view import ClassView
+from src.models.class_view_bitmap import ClassViewBitmap
+from src.models.course_student import CourseStudent
+from src.models.user import User
+
+# Seconds a course roster is kept in memory (changes in this process
+# invalidate it right away, changes in other workers after this time)
+ROSTER_TTL = 30
+REBUILD_BATCH_SIZE = 5000
+
+INTERSECTION_MODES = ("all", "any", "none")
+
+
+def to_bitmap(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def from_bitmap(data: Optional[bytes]) -> int:
+    return int.from_bytes(data or b"", "little")
+
+
+def iter_bits(mask: int):
+    """Yield the positions of the bits set in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CourseRoster:
+    """Active students of a course by ordinal, and the mask of their bits"""
+
+    def __init__(self, students: Dict[int, dict]):
+        self.students = students
+        self.mask = 0
+        for ordinal in students:
+            self.mask |= 1 << ordinal
+        self.loaded_at = time.monotonic()
+
+    def to_list(self, mask: int) -> List[dict]:
+        return [self.students[ordinal] for ordinal in iter_bits(mask & self.mask)]
+
+
+_rosters: Dict[int, CourseRoster] = {}
+_rosters_lock = threading.Lock()
+
+
+def invalidate_course_roster(course_id: int):
+    """Forget the cached roster of a course after an enrollment change"""
+    with _rosters_lock:
+        _rosters.pop(course_id, None)
+
+
+def get_course_roster(db, course_id: int) -> CourseRoster:
+    with _rosters_lock:
+        roster = _rosters.get(course_id)
+    if roster is not None and time.monotonic() - roster.loaded_at < ROSTER_TTL:
+        return roster
+
+    rows = (
+        db.query(CourseStudent.ordinal, User.id, User.full_name, User.document)
+        .join(User, User.id == CourseStudent.student_id)
+        .filter(CourseStudent.course_id == course_id, CourseStudent.is_active)
+        .all()
+    )
+    roster = CourseRoster(
+        {
+            ordinal: {"student_id": user_id, "full_name": full_name, "document": document}
+            for ordinal, user_id, full_name, document in rows
+        }
+    )
+    with _rosters_lock:
+        _rosters[course_id] = roster
+    return roster
+
+
+def _merge_bitmaps(db, masks: Dict[int, int], courses: Dict[int, int], replace=False):
+    existing = {
+        row.class_id: row
+        for row in db.query(ClassViewBitmap)
+        .filter(ClassViewBitmap.class_id.in_(list(masks)))
+        .with_for_update()
+    }
+    for class_id, mask in masks.items():
+        row = existing.get(class_id)
+        if row is None:
+            db.add(
+                ClassViewBitmap(
+                    class_id=class_id, course_id=courses[class_id], bitmap=to_bitmap(mask)
+                )
+            )
+            continue
+        current = from_bitmap(row.bitmap)
+        merged = mask if replace else current | mask
+        if merged != current:
+            row.bitmap = to_bitmap(merged)
+
+
+def mark_viewed(pairs: Iterable[Tuple[int, int]]) -> int:
+    """
+    Set the bits of the (class_id, student_id) views in the class bitmaps
+
+    Called by the class view buffer after each flush. Views of students that
+    are not enrolled in the course of the class are ignored.
+
+    Returns:
+        int: Number of classes updated
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+
+    for attempt in range(2):
+        db = SessionLocal()
+        try:
+            courses = dict(
+                db.query(ClassModel.id, ClassModel.course_id).filter(
+                    ClassModel.id.in_({class_id for class_id, _ in pairs})
+                )
+            )
+            ordinals = {
+                (course_id, student_id): ordinal
+                for course_id, student_id, ordinal in db.query(
+                    CourseStudent.course_id, CourseStudent.student_id, CourseStudent.ordinal
+                ).filter(
+                    CourseStudent.course_id.in_(set(courses.values())),
+                    CourseStudent.student_id.in_({student_id for _, student_id in pairs}),
+                )
+            }
+
+            masks = defaultdict(int)
+            for class_id, student_id in pairs:
+                ordinal = ordinals.get((courses.get(class_id), student_id))
+                if ordinal is not None:
+                    masks[class_id] |= 1 << ordinal
+            if not masks:
+                return 0
+
+            _merge_bitmaps(db, masks, courses)
+            db.commit()
+            return len(masks)
+        except IntegrityError:
+            # Another worker created the bitmap of the class first
+            db.rollback()
+            if attempt:
+                raise
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def rebuild_view_bitmaps(progress=None) -> dict:
+    """Compute every class bitmap again from class_views"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ClassView.class_id, ClassModel.course_id, CourseStudent.ordinal)
+            .join(ClassModel, ClassModel.id == ClassView.class_id)
+            .join(
+                CourseStudent,
+                (CourseStudent.course_id == ClassModel.course_id)
+                & (CourseStudent.student_id == ClassView.student_id),
+            )
+            .distinct()
+            .yield_per(REBUILD_BATCH_SIZE)
+        )
+        masks = defaultdict(int)
+        courses = {}
+        for class_id, course_id, ordinal in rows:
+            masks[class_id] |= 1 << ordinal
+            courses[class_id] = course_id
+
+        db.query(ClassViewBitmap).filter(
+            ClassViewBitmap.class_id.notin_(list(masks))
+        ).delete(synchronize_session=False)
+        class_ids = list(masks)
+        for start in range(0, len(class_ids), REBUILD_BATCH_SIZE):
+            batch = {
+                class_id: masks[class_id]
+                for class_id in class_ids[start : start + REBUILD_BATCH_SIZE]
+            }
+            _merge_bitmaps(db, batch, courses, replace=True)
+            if progress:
+                progress(min(100, (start + REBUILD_BATCH_SIZE) * 100 // len(class_ids)))
+        db.commit()
+        return {"classes": len(masks)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _load_class(db, class_id: int) -> Optional[Tuple[int, int]]:
+    """Course and view mask of a class (one primary key lookup)"""
+    row = (
+        db.query(ClassModel.course_id, ClassViewBitmap.bitmap)
+        .outerjoin(ClassViewBitmap, ClassViewBitmap.class_id == ClassModel.id)
+        .filter(ClassModel.id == class_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return row.course_id, from_bitmap(row.bitmap)
+
+
+def get_class_completion_service(class_id: int) -> Tuple[Optional[dict], int]:
+    """Share of the active students of the course that viewed the class"""
+    db = SessionLocal()
+    try:
+        loaded = _load_class(db, class_id)
+        if loaded is None:
+            return None, 404
+        course_id, mask = loaded
+        roster = get_course_roster(db, course_id)
+    finally:
+        db.close()
+
+    enrolled = roster.mask.bit_count()
+    viewed = (mask & roster.mask).bit_count()
+    return {
+        "class_id": class_id,
+        "course_id": course_id,
+        "enrolled": enrolled,
+        "viewed": viewed,
+        "missing": enrolled - viewed,
+        "percentage": round(viewed * 100 / enrolled, 2) if enrolled else 0.0,
+    }, 200
+
+
+def get_class_missing_students_service(class_id: int) -> Tuple[Optional[dict], int]:
+    """Active students of the course that have not viewed the class"""
+    db = SessionLocal()
+    try:
+        loaded = _load_class(db, class_id)
+        if loaded is None:
+            return None, 404
+        course_id, mask = loaded
+        roster = get_course_roster(db, course_id)
+    finally:
+        db.close()
+
+    students = roster.to_list(roster.mask & ~mask)
+    return {
+        "class_id": class_id,
+        "course_id": course_id,
+        "total": len(students),
+        "students": students,
+    }, 200
+
+
+def get_classes_intersection_service(
+    class_ids: List[int], mode: str = "all"
+) -> Tuple[Optional[dict], int]:
+    """
+    Students that viewed all, any or none of several classes of a course
+
+    Returns:
+        tuple: (result, status) with status 400 if the classes belong to
+        different courses and 404 if one does not exist
+    """
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ClassModel.id, ClassModel.course_id, ClassViewBitmap.bitmap)
+            .outerjoin(ClassViewBitmap, ClassViewBitmap.class_id == ClassModel.id)
+            .filter(ClassModel.id.in_(class_ids))
+            .all()
+        )
+        if len(rows) != len(set(class_ids)):
+            return None, 404
+        if len({course_id for _, course_id, _ in rows}) != 1:
+            return None, 400
+        course_id = rows[0].course_id
+        roster = get_course_roster(db, course_id)
+    finally:
+        db.close()
+
+    masks = [from_bitmap(bitmap) for _, _, bitmap in rows]
+    if mode == "all":
+        result = roster.mask
+        for mask in masks:
+            result &= mask
+    else:
+        result = 0
+        for mask in masks:
+            result |= mask
+        if mode == "none":
+            result = roster.mask & ~result
+
+    students = roster.to_list(result)
+    return {
+        "course_id": course_id,
+        "class_ids": sorted(set(class_ids)),
+        "mode": mode,
+        "enrolled": roster.mask.bit_count(),
+        "total": len(students),
+        "students": students,
+    }, 200
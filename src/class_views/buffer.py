@@ -0,0 +1,231 @@
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from src.database.database import SessionLocal
+from src.models.class_model import ClassModel
+from src.models.class_view import ClassView
+
+# Views of the same class by the same student within this window are one view
+DEDUP_WINDOW = 5 * 60
+# Flush when this many views are waiting or FLUSH_INTERVAL seconds have passed
+FLUSH_SIZE = 200
+FLUSH_INTERVAL = 5.0
+# Views kept in memory at most; past this size the oldest ones are dropped
+BUFFER_CAPACITY = 20000
+# Rows per INSERT statement
+INSERT_BATCH_SIZE = 1000
+
+
+class ClassViewBuffer:
+    """
+    Write-behind buffer for the class views of this process
+
+    record() only takes a lock and appends to a bounded deque; a background
+    thread writes the views with multi-row INSERTs when FLUSH_SIZE views are
+    waiting or every FLUSH_INTERVAL seconds, and once more at shutdown.
+
+    Durability: views still in memory are lost if the process is killed
+    without a clean shutdown (at most FLUSH_INTERVAL seconds of views). The
+    deduplication is per process, so with several workers a student may get
+    one view per worker in the same window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: deque = deque(maxlen=BUFFER_CAPACITY)
+        self._recent: Dict[Tuple[int, int], float] = {}
+        self._known_classes: set = set()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._rollup_slot = None
+        self.dropped = 0
+
+    def _class_exists(self, class_id: int) -> bool:
+        # Inserting a view of a missing class would make the whole batch fail
+        if class_id in self._known_classes:
+            return True
+        db = SessionLocal()
+        try:
+            exists = db.query(ClassModel.id).filter(ClassModel.id == class_id).first()
+        finally:
+            db.close()
+        if exists:
+            self._known_classes.add(class_id)
+        return bool(exists)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="class-view-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def record(self, class_id: int, student_id: int) -> Optional[bool]:
+        """
+        Buffer a view of a class by a student
+
+        Returns:
+            True if the view was buffered, False if it is a duplicate within
+            DEDUP_WINDOW, None if the class does not exist
+        """
+        now = time.monotonic()
+        key = (class_id, student_id)
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < DEDUP_WINDOW:
+                return False
+
+        if not self._class_exists(class_id):
+            return None
+
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < DEDUP_WINDOW:
+                return False
+            self._recent[key] = now
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(
+                {"class_id": class_id, "student_id": student_id, "viewed_at": datetime.utcnow()}
+            )
+            if self._closed:
+                # After shutdown there is no flusher, write it right away
+                flush_now = True
+            else:
+                flush_now = False
+                self._start()
+                if len(self._pending) >= FLUSH_SIZE:
+                    self._wakeup.set()
+
+        if flush_now:
+            self.flush()
+        return True
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing class views: {str(e)}")
+
+    def _take(self) -> List[dict]:
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+            # Forget the views that are out of the deduplication window
+            cutoff = time.monotonic() - DEDUP_WINDOW
+            self._recent = {
+                key: seen for key, seen in self._recent.items() if seen >= cutoff
+            }
+        return rows
+
+    def _requeue(self, rows: List[dict]):
+        with self._lock:
+            free = self._pending.maxlen - len(self._pending)
+            if len(rows) > free:
+                self.dropped += len(rows) - free
+                rows = rows[len(rows) - free :]
+            self._pending.extendleft(reversed(rows))
+
+    def _schedule_rollup(self):
+        """Enqueue the rollup of the new views, once per ROLLUP_INTERVAL"""
+        from .rollups import ROLLUP_INTERVAL, ROLLUP_LAG
+
+        slot = int(time.time() // ROLLUP_INTERVAL)
+        if slot == self._rollup_slot:
+            return
+        try:
+            from src.jobs.service import enqueue_job
+
+            # Late enough for the views flushed until the end of the slot to
+            # be older than ROLLUP_LAG
+            enqueue_job(
+                "class_views.rollup",
+                idempotency_key=f"class_views.rollup:{slot}",
+                delay=ROLLUP_INTERVAL + ROLLUP_LAG + 5,
+                max_attempts=1,
+            )
+            self._rollup_slot = slot
+        except Exception as e:
+            print(f"Error enqueuing class view rollup: {str(e)}")
+
+    def _mark_viewed(self, rows: List[dict]):
+        """Set the bits of the new views in the class completion bitmaps"""
+        from .bitmaps import mark_viewed
+
+        try:
+            mark_viewed((row["class_id"], row["student_id"]) for row in rows)
+        except Exception as e:
+            print(f"Error updating class view bitmaps: {str(e)}")
+
+    def _insert(self, db, rows: List[dict]):
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.execute(insert(ClassView), rows[start : start + INSERT_BATCH_SIZE])
+
+    def flush(self) -> int:
+        """
+        Write the buffered views to the database
+
+        Returns:
+            int: Number of views written
+        """
+        rows = self._take()
+        if not rows:
+            return 0
+
+        db = SessionLocal()
+        try:
+            self._insert(db, rows)
+            db.commit()
+            self._mark_viewed(rows)
+            self._schedule_rollup()
+            return len(rows)
+        except IntegrityError:
+            # A class was deleted after it was cached: insert one by one
+            db.rollback()
+            self._known_classes.clear()
+            written = 0
+            for row in rows:
+                try:
+                    self._insert(db, [row])
+                    db.commit()
+                    written += 1
+                except IntegrityError:
+                    db.rollback()
+            self._mark_viewed(rows)
+            self._schedule_rollup()
+            return written
+        except Exception:
+            db.rollback()
+            self._requeue(rows)
+            raise
+        finally:
+            db.close()
+
+    def close(self):
+        """Stop the flusher thread and write the remaining views"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=FLUSH_INTERVAL)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing class views on shutdown: {str(e)}")
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class_view_buffer = ClassViewBuffer()
+atexit.register(class_view_buffer.close)
@@ -0,0 +1,118 @@
+from flask import Request, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from src.models.user import UserRole
+from .bitmaps import (
+    INTERSECTION_MODES,
+    get_class_completion_service,
+    get_class_missing_students_service,
+    get_classes_intersection_service,
+)
+from .buffer import class_view_buffer
+from .rollups import (
+    get_class_engagement_service,
+    get_course_engagement_service,
+    parse_range,
+)
+
+STAFF_ROLES = [UserRole.TEACHER.name, UserRole.ADMIN.name]
+
+
+@jwt_required()
+def record_class_view_controller(class_id: int, request: Request):
+    """
+    Record that the current student viewed a class
+
+    The view is buffered and written in the background, so this endpoint
+    does not wait for the database. Views of other roles are not counted.
+    """
+    # The role comes from the token to avoid a query per page view
+    if get_jwt().get("role") != UserRole.STUDENT.name:
+        return jsonify({"recorded": False}), 202
+
+    recorded = class_view_buffer.record(class_id, int(get_jwt_identity()))
+    if recorded is None:
+        return jsonify({"error": "Clase no encontrada"}), 404
+    return jsonify({"recorded": recorded}), 202
+
+
+@jwt_required()
+def get_class_engagement_controller(class_id: int, request: Request):
+    """Views per day and per student of a class (from the daily rollups)"""
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    try:
+        start, end = parse_range(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    engagement, status_code = get_class_engagement_service(class_id, start, end)
+    if engagement is None:
+        return jsonify({"error": "Clase no encontrada"}), status_code
+    return jsonify(engagement), status_code
+
+
+@jwt_required()
+def get_course_engagement_controller(course_id: int, request: Request):
+    """Views per day and per class of a course (from the daily rollups)"""
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    try:
+        start, end = parse_range(request.args.get("from"), request.args.get("to"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    engagement, status_code = get_course_engagement_service(course_id, start, end)
+    return jsonify(engagement), status_code
+
+
+@jwt_required()
+def get_class_completion_controller(class_id: int, request: Request):
+    """Percentage of the students of the course that viewed the class"""
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    completion, status_code = get_class_completion_service(class_id)
+    if completion is None:
+        return jsonify({"error": "Clase no encontrada"}), status_code
+    return jsonify(completion), status_code
+
+
+@jwt_required()
+def get_class_missing_students_controller(class_id: int, request: Request):
+    """Students of the course that have not viewed the class"""
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    missing, status_code = get_class_missing_students_service(class_id)
+    if missing is None:
+        return jsonify({"error": "Clase no encontrada"}), status_code
+    return jsonify(missing), status_code
+
+
+@jwt_required()
+def get_classes_intersection_controller(request: Request):
+    """Students that viewed all (or any, or none) of several classes"""
+    if get_jwt().get("role") not in STAFF_ROLES:
+        return jsonify({"error": "No autorizado"}), 403
+
+    try:
+        class_ids = [
+            int(class_id)
+            for class_id in request.args.get("class_ids", "").split(",")
+            if class_id.strip()
+        ]
+    except ValueError:
+        return jsonify({"error": "class_ids debe ser una lista de ids"}), 400
+    mode = request.args.get("mode", "all")
+    if not class_ids or mode not in INTERSECTION_MODES:
+        return jsonify({"error": "Indique class_ids y mode (all, any o none)"}), 400
+
+    result, status_code = get_classes_intersection_service(class_ids, mode)
+    if status_code == 400:
+        return jsonify({"error": "Las clases deben ser del mismo curso"}), 400
+    if result is None:
+        return jsonify({"error": "Clase no encontrada"}), status_code
+    return jsonify(result), status_code
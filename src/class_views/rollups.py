@@ -0,0 +1,376 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import distinct, func, insert
+
+from src.database.database import SessionLocal
+from src.models.class_model import ClassModel
+from src.models.class_view import ClassView
+from src.models.class_view_daily import ClassViewDaily
+from src.models.class_view_student_daily import ClassViewStudentDaily
+from src.models.rollup_state import RollupState
+from src.models.user import User
+
+ROLLUP_NAME = "class_views"
+# Raw views aggregated per transaction
+ROLLUP_BATCH_SIZE = 50000
+# Views are rolled up once they are this old (seconds), so inserts that were
+# still being committed when the rollup ran are not skipped
+ROLLUP_LAG = 120
+# The buffer enqueues at most one rollup job per interval (seconds)
+ROLLUP_INTERVAL = 60
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+def _to_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on MySQL
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _lock_state(db) -> RollupState:
+    """Lock the rollup state row, so only one process updates the rollups"""
+    state = (
+        db.query(RollupState)
+        .filter(RollupState.name == ROLLUP_NAME)
+        .with_for_update()
+        .first()
+    )
+    if state is None:
+        state = RollupState(name=ROLLUP_NAME, last_id=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def _apply_views(db, after_id: int, upto_id: int) -> int:
+    """Add the views with after_id < id <= upto_id to the daily rollups"""
+    day = func.date(ClassView.viewed_at)
+    rows = (
+        db.query(
+            ClassView.class_id,
+            ClassModel.course_id,
+            ClassView.student_id,
+            day,
+            func.count(ClassView.id),
+        )
+        .join(ClassModel, ClassModel.id == ClassView.class_id)
+        .filter(ClassView.id > after_id, ClassView.id <= upto_id)
+        .group_by(ClassView.class_id, ClassModel.course_id, ClassView.student_id, day)
+        .all()
+    )
+    if not rows:
+        return 0
+
+    counts = {}
+    courses = {}
+    for class_id, course_id, student_id, view_day, views in rows:
+        counts[(class_id, _to_date(view_day), student_id)] = views
+        courses[class_id] = course_id
+    class_ids = {key[0] for key in counts}
+    days = {key[1] for key in counts}
+
+    existing_students = {
+        (row.class_id, row.day, row.student_id): row
+        for row in db.query(ClassViewStudentDaily).filter(
+            ClassViewStudentDaily.class_id.in_(class_ids),
+            ClassViewStudentDaily.day.in_(days),
+        )
+    }
+    existing_days = {
+        (row.class_id, row.day): row
+        for row in db.query(ClassViewDaily).filter(
+            ClassViewDaily.class_id.in_(class_ids), ClassViewDaily.day.in_(days)
+        )
+    }
+
+    day_views = defaultdict(int)
+    new_students = defaultdict(int)
+    new_student_rows = []
+    for (class_id, view_day, student_id), views in counts.items():
+        day_views[(class_id, view_day)] += views
+        row = existing_students.get((class_id, view_day, student_id))
+        if row is None:
+            new_student_rows.append(
+                {
+                    "class_id": class_id,
+                    "course_id": courses[class_id],
+                    "student_id": student_id,
+                    "day": view_day,
+                    "views": views,
+                }
+            )
+            new_students[(class_id, view_day)] += 1
+        else:
+            row.views += views
+
+    new_day_rows = []
+    for (class_id, view_day), views in day_views.items():
+        row = existing_days.get((class_id, view_day))
+        if row is None:
+            new_day_rows.append(
+                {
+                    "class_id": class_id,
+                    "course_id": courses[class_id],
+                    "day": view_day,
+                    "views": views,
+                    "unique_students": new_students[(class_id, view_day)],
+                }
+            )
+        else:
+            row.views += views
+            row.unique_students += new_students[(class_id, view_day)]
+
+    # New rows go in multi-row INSERTs, the existing ones are updated on flush
+    if new_student_rows:
+        db.execute(insert(ClassViewStudentDaily), new_student_rows)
+    if new_day_rows:
+        db.execute(insert(ClassViewDaily), new_day_rows)
+
+    return sum(counts.values())
+
+
+def update_class_view_rollups(progress=None) -> dict:
+    """
+    Add the class views written since the last run to the daily rollups
+
+    The id of the last view included is kept in rollup_state and updated in
+    the same transaction as the rollups, so each view is counted once even if
+    the job is retried. Days are UTC days.
+
+    Returns:
+        dict: Number of views added and id of the last one
+    """
+    db = SessionLocal()
+    try:
+        state = _lock_state(db)
+        start_id = state.last_id
+        cutoff = datetime.utcnow() - timedelta(seconds=ROLLUP_LAG)
+        max_id = (
+            db.query(ClassView.id)
+            .filter(ClassView.id > start_id, ClassView.viewed_at < cutoff)
+            .order_by(ClassView.id.desc())
+            .limit(1)
+            .scalar()
+        )
+        db.commit()
+
+        added = 0
+        while max_id:
+            state = _lock_state(db)
+            if state.last_id >= max_id:
+                db.commit()
+                break
+            upto_id = min(max_id, state.last_id + ROLLUP_BATCH_SIZE)
+            added += _apply_views(db, state.last_id, upto_id)
+            state.last_id = upto_id
+            db.commit()
+            if progress:
+                progress((upto_id - start_id) * 100 // (max_id - start_id))
+
+        return {"views": added, "last_id": max(max_id or 0, start_id)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def rebuild_class_view_rollups(progress=None) -> dict:
+    """Delete the rollups and build them again from every class view"""
+    db = SessionLocal()
+    try:
+        state = _lock_state(db)
+        db.query(ClassViewStudentDaily).delete(synchronize_session=False)
+        db.query(ClassViewDaily).delete(synchronize_session=False)
+        state.last_id = 0
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return update_class_view_rollups(progress=progress)
+
+
+def parse_range(
+    start: Optional[str], end: Optional[str]
+) -> Tuple[date, date]:
+    """
+    Parse the from/to (YYYY-MM-DD) filters of the engagement endpoints
+
+    Defaults to the last DEFAULT_RANGE_DAYS days.
+
+    Raises:
+        ValueError: If a date is invalid or the range is too long
+    """
+    end_day = date.fromisoformat(end) if end else datetime.utcnow().date()
+    start_day = (
+        date.fromisoformat(start)
+        if start
+        else end_day - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    )
+    if start_day > end_day:
+        raise ValueError("La fecha inicial es posterior a la final")
+    if (end_day - start_day).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"El rango no puede superar {MAX_RANGE_DAYS} días")
+    return start_day, end_day
+
+
+def get_class_engagement_service(
+    class_id: int, start: date, end: date
+) -> Tuple[Optional[dict], int]:
+    """
+    Views per day and per student of a class, read from the rollups
+
+    Returns:
+        tuple: ({"days", "students", totals}, status)
+    """
+    db = SessionLocal()
+    try:
+        if not db.query(ClassModel.id).filter(ClassModel.id == class_id).first():
+            return None, 404
+
+        days = (
+            db.query(ClassViewDaily.day, ClassViewDaily.views, ClassViewDaily.unique_students)
+            .filter(
+                ClassViewDaily.class_id == class_id,
+                ClassViewDaily.day >= start,
+                ClassViewDaily.day <= end,
+            )
+            .order_by(ClassViewDaily.day)
+            .all()
+        )
+        views = func.sum(ClassViewStudentDaily.views)
+        students = (
+            db.query(
+                ClassViewStudentDaily.student_id,
+                User.full_name,
+                User.document,
+                views,
+                func.count(ClassViewStudentDaily.id),
+                func.max(ClassViewStudentDaily.day),
+            )
+            .join(User, User.id == ClassViewStudentDaily.student_id)
+            .filter(
+                ClassViewStudentDaily.class_id == class_id,
+                ClassViewStudentDaily.day >= start,
+                ClassViewStudentDaily.day <= end,
+            )
+            .group_by(ClassViewStudentDaily.student_id, User.full_name, User.document)
+            .order_by(views.desc(), ClassViewStudentDaily.student_id)
+            .all()
+        )
+
+        return {
+            "class_id": class_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "total_views": sum(day.views for day in days),
+            "unique_students": len(students),
+            "days": [
+                {
+                    "day": _to_date(day.day).isoformat(),
+                    "views": day.views,
+                    "unique_students": day.unique_students,
+                }
+                for day in days
+            ],
+            "students": [
+                {
+                    "student_id": student_id,
+                    "full_name": full_name,
+                    "document": document,
+                    "views": int(student_views),
+                    "days": active_days,
+                    "last_day": _to_date(last_day).isoformat(),
+                }
+                for student_id, full_name, document, student_views, active_days, last_day in students
+            ],
+        }, 200
+    finally:
+        db.close()
+
+
+def get_course_engagement_service(
+    course_id: int, start: date, end: date
+) -> Tuple[dict, int]:
+    """
+    Views per day and per class of a course, read from the rollups
+
+    Unique students are counted once per day (or per class) even if they
+    viewed several classes.
+    """
+    db = SessionLocal()
+    try:
+        in_range = (
+            ClassViewStudentDaily.course_id == course_id,
+            ClassViewStudentDaily.day >= start,
+            ClassViewStudentDaily.day <= end,
+        )
+        days = (
+            db.query(
+                ClassViewStudentDaily.day,
+                func.sum(ClassViewStudentDaily.views),
+                func.count(distinct(ClassViewStudentDaily.student_id)),
+            )
+            .filter(*in_range)
+            .group_by(ClassViewStudentDaily.day)
+            .order_by(ClassViewStudentDaily.day)
+            .all()
+        )
+        classes = (
+            db.query(
+                ClassViewStudentDaily.class_id,
+                ClassModel.title,
+                ClassModel.class_number,
+                func.sum(ClassViewStudentDaily.views),
+                func.count(distinct(ClassViewStudentDaily.student_id)),
+            )
+            .join(ClassModel, ClassModel.id == ClassViewStudentDaily.class_id)
+            .filter(*in_range)
+            .group_by(
+                ClassViewStudentDaily.class_id, ClassModel.title, ClassModel.class_number
+            )
+            .order_by(ClassModel.class_number, ClassViewStudentDaily.class_id)
+            .all()
+        )
+        unique_students = (
+            db.query(func.count(distinct(ClassViewStudentDaily.student_id)))
+            .filter(*in_range)
+            .scalar()
+        )
+
+        return {
+            "course_id": course_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "total_views": sum(int(views) for _, views, _ in days),
+            "unique_students": unique_students,
+            "days": [
+                {
+                    "day": _to_date(day).isoformat(),
+                    "views": int(views),
+                    "unique_students": students,
+                }
+                for day, views, students in days
+            ],
+            "classes": [
+                {
+                    "class_id": class_id,
+                    "title": title,
+                    "class_number": class_number,
+                    "views": int(views),
+                    "unique_students": students,
+                }
+                for class_id, title, class_number, views, students in classes
+            ],
+        }, 200
+    finally:
+        db.close()
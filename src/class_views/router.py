@@ -0,0 +1,75 @@
+import click
+from flask import Blueprint, request
+from .controllers import (
+    record_class_view_controller,
+    get_class_engagement_controller,
+    get_course_engagement_controller,
+    get_class_completion_controller,
+    get_class_missing_students_controller,
+    get_classes_intersection_controller,
+)
+
+class_views_bp = Blueprint("class_views", __name__, url_prefix="/api/classes")
+
+
+@class_views_bp.route("/<int:class_id>/views", methods=["POST"])
+def record_class_view(class_id):
+    """Registrar que el estudiante vio la clase"""
+    return record_class_view_controller(class_id, request)
+
+
+@class_views_bp.route("/<int:class_id>/engagement", methods=["GET"])
+def get_class_engagement(class_id):
+    """Vistas por día y por estudiante de una clase"""
+    return get_class_engagement_controller(class_id, request)
+
+
+@class_views_bp.route("/courses/<int:course_id>/engagement", methods=["GET"])
+def get_course_engagement(course_id):
+    """Vistas por día y por clase de un curso"""
+    return get_course_engagement_controller(course_id, request)
+
+
+@class_views_bp.route("/<int:class_id>/completion", methods=["GET"])
+def get_class_completion(class_id):
+    """Porcentaje de estudiantes del curso que vieron la clase"""
+    return get_class_completion_controller(class_id, request)
+
+
+@class_views_bp.route("/<int:class_id>/missing", methods=["GET"])
+def get_class_missing_students(class_id):
+    """Estudiantes del curso que no han visto la clase"""
+    return get_class_missing_students_controller(class_id, request)
+
+
+@class_views_bp.route("/completion", methods=["GET"])
+def get_classes_intersection():
+    """Estudiantes que vieron todas, alguna o ninguna de varias clases"""
+    return get_classes_intersection_controller(request)
+
+
+@class_views_bp.cli.command("rollup")
+@click.option("--rebuild", is_flag=True, help="Borrar los acumulados y recalcularlos")
+@click.option("--enqueue", is_flag=True, help="Encolar el cálculo para el worker")
+def rollup_command(rebuild, enqueue):
+    """Actualizar los acumulados diarios de vistas de clases"""
+    if enqueue and not rebuild:
+        from src.jobs.service import enqueue_job
+
+        job = enqueue_job("class_views.rollup", priority=-10)
+        click.echo(f"Tarea {job['id']} encolada")
+        return
+
+    from .rollups import rebuild_class_view_rollups, update_class_view_rollups
+
+    result = rebuild_class_view_rollups() if rebuild else update_class_view_rollups()
+    click.echo(f"{result['views']} vistas acumuladas (hasta la vista {result['last_id']})")
+
+
+@class_views_bp.cli.command("rebuild-bitmaps")
+def rebuild_bitmaps_command():
+    """Recalcular los mapas de bits de estudiantes que vieron cada clase"""
+    from .bitmaps import rebuild_view_bitmaps
+
+    result = rebuild_view_bitmaps()
+    click.echo(f"{result['classes']} clases recalculadas")
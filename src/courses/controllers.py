@@ -16,9 +16,12 @@ from .service import (
     get_course_subjects_service,
     add_subject_to_course_service,
     remove_subject_from_course_service,
+    export_course_students_service,
+    export_course_gradebook_service,
 )
 from pydantic import ValidationError
 from src.utils.api_response import ApiResponse
+from src.utils.export_utils import available_export_formats, export_response
 from src.models.user import UserRole
 from src.utils.decorator_role_required import role_required
 
@@ -43,7 +46,7 @@ def get_courses_api_controller(request: Request) -> Response | Tuple[list, int]:
         )
 
         return ApiResponse.list_response(
-            items=[course.dict() for course in courses],
+            items=courses,
             total=total,
         )
     except Exception as e:
@@ -262,3 +265,47 @@ def remove_subject_from_course_api_controller(
         return ApiResponse.error(
             message="Error interno del servidor", details=str(e), status_code=500
         )
+
+
+def _export_format(request: Request) -> Optional[str]:
+    """Formato de exportación pedido (?format=csv|xlsx), None si no está disponible"""
+    export_format = request.args.get("format", "csv").lower()
+    return export_format if export_format in available_export_formats() else None
+
+
+@jwt_required()
+@role_required([UserRole.ADMIN])
+def export_course_students_api_controller(course_id: int, request: Request):
+    """API: descargar el listado de estudiantes de un curso"""
+    export_format = _export_format(request)
+    if not export_format:
+        return ApiResponse.error(
+            message="Formato de exportación no soportado",
+            details={"formats": available_export_formats()},
+        )
+
+    export, status_code = export_course_students_service(course_id)
+    if status_code != 200:
+        return ApiResponse.error(message="Curso no encontrado", status_code=status_code)
+
+    header, rows = export
+    return export_response(f"curso_{course_id}_estudiantes", header, rows, export_format)
+
+
+@jwt_required()
+@role_required([UserRole.ADMIN])
+def export_course_gradebook_api_controller(course_id: int, request: Request):
+    """API: descargar la planilla de notas de un curso"""
+    export_format = _export_format(request)
+    if not export_format:
+        return ApiResponse.error(
+            message="Formato de exportación no soportado",
+            details={"formats": available_export_formats()},
+        )
+
+    export, status_code = export_course_gradebook_service(course_id)
+    if status_code != 200:
+        return ApiResponse.error(message="Curso no encontrado", status_code=status_code)
+
+    header, rows = export
+    return export_response(f"curso_{course_id}_notas", header, rows, export_format)
@@ -22,29 +22,15 @@ def courses_management_controller(request: Request) -> Response:
     """View to manage courses"""
     try:
         courses, total = get_courses_service()
-        # Load subjects for each course
+        # Subjects are loaded by the template only for the courses that are
+        # not in the fragment cache
         from .service import get_course_subjects_service
 
-        courses_with_subjects = []
-
-        for course in courses:
-            subjects, _ = get_course_subjects_service(course.id)
-            course_dict = {
-                "id": course.id,
-                "academic_year": course.academic_year,
-                "period": course.period,
-                "grade_level": course.grade_level,
-                "name": course.name,
-                "is_active": course.is_active,
-                "created_by": course.created_by,
-                "created_at": course.created_at,
-                "updated_at": course.updated_at,
-                "subjects": subjects,
-            }
-            courses_with_subjects.append(course_dict)
-
         return render_template(
-            "admin/courses_management.html", courses=courses_with_subjects, total=total
+            "admin/courses_management.html",
+            courses=courses,
+            total=total,
+            subjects_of=lambda course_id: get_course_subjects_service(course_id)[0],
         )
     except Exception as e:
         flash(f"Error al cargar la lista de cursos: {str(e)}", "danger")
@@ -159,21 +145,15 @@ def course_detail_controller(course_id: int, request: Request) -> Response:
             flash("Curso no encontrado", "danger")
             return redirect(url_for("courses.courses_management"))
 
-        # Get course students
-        from .service import get_course_students_service
-
-        students, _ = get_course_students_service(course_id)
-
-        # Get course subjects
-        from .service import get_course_subjects_service
-
-        subjects, _ = get_course_subjects_service(course_id)
+        # Students and subjects are loaded by the template only when the
+        # course detail is not in the fragment cache
+        from .service import get_course_students_service, get_course_subjects_service
 
         return render_template(
             "admin/course_detail.html",
             course=course,
-            students=students,
-            subjects=subjects,
+            load_students=lambda: get_course_students_service(course_id)[0],
+            load_subjects=lambda: get_course_subjects_service(course_id)[0],
         )
     except Exception as e:
         flash(f"Error al cargar el detalle del curso: {str(e)}", "danger")
@@ -17,6 +17,8 @@ from .controllers import (
     get_course_subjects_api_controller,
     add_subject_to_course_api_controller,
     remove_subject_from_course_api_controller,
+    export_course_students_api_controller,
+    export_course_gradebook_api_controller,
 )
 
 courses_bp = Blueprint("courses", __name__, url_prefix="/courses")
@@ -119,3 +121,14 @@ def remove_subject_from_course_api(course_id, subject_id, teacher_id):
     return remove_subject_from_course_api_controller(
         course_id, subject_id, teacher_id, request
     )
+
+
+# Exportaciones (CSV / XLSX)
+@courses_bp.route("/api/<int:course_id>/students/export", methods=["GET"])
+def export_course_students_api(course_id):
+    return export_course_students_api_controller(course_id, request)
+
+
+@courses_bp.route("/api/<int:course_id>/gradebook/export", methods=["GET"])
+def export_course_gradebook_api(course_id):
+    return export_course_gradebook_api_controller(course_id, request)
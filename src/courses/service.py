@@ -1,14 +1,22 @@
-from typing import List, Optional, Tuple
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
 from flask import Request
 from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import and_, func, select
 
+from src.class_views.bitmaps import invalidate_course_roster
 from src.database.database import SessionLocal
+from src.models.assignment import Assignment
+from src.models.class_model import ClassModel
 from src.models.course import Course
 from src.models.course_student import CourseStudent
 from src.models.course_subject import CourseSubject
 from src.models.user import User, UserRole
 from src.models.subject import Subject
+from src.models.submission import Submission
+from src.utils.export_utils import EXPORT_BATCH_SIZE
+from src.utils.user_cache import invalidate_course_caches, invalidate_user_caches
 
 from .validation import (
     CourseCreateSchema,
@@ -24,40 +32,51 @@ def get_courses_service(
     period: Optional[int] = None,
     grade_level: Optional[str] = None,
     is_active: Optional[bool] = None,
-) -> Tuple[List[CourseResponseSchema], int]:
-    """Obtener lista de cursos"""
+) -> Tuple[List[dict], int]:
+    """Obtener lista de cursos (dicts con los campos de CourseResponseSchema)"""
     db = SessionLocal()
     try:
-        query = db.query(Course)
+        query = select(
+            Course.id,
+            Course.academic_year,
+            Course.period,
+            Course.grade_level,
+            Course.name,
+            Course.is_active,
+            Course.created_by,
+            Course.created_at,
+            Course.updated_at,
+        )
 
         # Aplicar filtros
         if academic_year:
-            query = query.filter(Course.academic_year == academic_year)
+            query = query.where(Course.academic_year == academic_year)
         if period:
-            query = query.filter(Course.period == period)
+            query = query.where(Course.period == period)
         if grade_level:
-            query = query.filter(Course.grade_level == grade_level)
+            query = query.where(Course.grade_level == grade_level)
         if is_active is not None:
-            query = query.filter(Course.is_active == is_active)
+            query = query.where(Course.is_active == is_active)
 
-        courses = query.order_by(
-            Course.academic_year.desc(), Course.period, Course.grade_level
+        rows = db.execute(
+            query.order_by(Course.academic_year.desc(), Course.period, Course.grade_level)
         ).all()
 
         return [
-            CourseResponseSchema(
-                id=course.id,
-                academic_year=course.academic_year,
-                period=course.period,
-                grade_level=course.grade_level,
-                name=course.name,
-                is_active=course.is_active,
-                created_by=course.created_by,
-                created_at=course.created_at,
-                updated_at=course.updated_at,
-            )
-            for course in courses
-        ], len(courses)
+            {
+                "id": row[0],
+                "academic_year": row[1],
+                "period": row[2],
+                "grade_level": row[3],
+                "name": row[4],
+                "description": None,
+                "is_active": bool(row[5]),
+                "created_by": row[6],
+                "created_at": row[7],
+                "updated_at": row[8],
+            }
+            for row in rows
+        ], len(rows)
     finally:
         db.close()
 
@@ -210,6 +229,7 @@ def delete_course_service(
         # Soft delete: marcar como inactivo
         course.is_active = False
         db.commit()
+        invalidate_course_caches(course_id)
 
         return {"message": "Curso eliminado exitosamente"}, 200
     except Exception:
@@ -219,6 +239,16 @@ def delete_course_service(
         db.close()
 
 
+def _touch_course(db, course_id: int):
+    """
+    Bump updated_at of a course when its students or subjects change, so the
+    cached fragments of its pages (keyed on it) are rendered again
+    """
+    db.query(Course).filter(Course.id == course_id).update(
+        {Course.updated_at: datetime.utcnow()}, synchronize_session=False
+    )
+
+
 def get_course_students_service(course_id: int) -> Tuple[List[dict], int]:
     """Obtener estudiantes de un curso"""
     db = SessionLocal()
@@ -253,8 +283,10 @@ def add_student_to_course_service(
     """Agregar estudiante a un curso"""
     db = SessionLocal()
     try:
-        # Verificar que el curso existe
-        course = db.query(Course).filter(Course.id == course_id).first()
+        # Verificar que el curso existe (bloqueado para asignar el ordinal)
+        course = (
+            db.query(Course).filter(Course.id == course_id).with_for_update().first()
+        )
         if not course:
             return None, 404
 
@@ -283,16 +315,30 @@ def add_student_to_course_service(
             else:
                 # Reactivar inscripción
                 existing_enrollment.is_active = True
+                _touch_course(db, course_id)
                 db.commit()
+                invalidate_course_roster(course_id)
+                invalidate_user_caches(data.student_id)
                 return {"message": "Estudiante agregado al curso exitosamente"}, 200
 
-        # Crear nueva inscripción
+        # Crear nueva inscripción con el siguiente ordinal del curso
+        last_ordinal = (
+            db.query(func.max(CourseStudent.ordinal))
+            .filter(CourseStudent.course_id == course_id)
+            .scalar()
+        )
         course_student = CourseStudent(
-            course_id=course_id, student_id=data.student_id, is_active=data.is_active
+            course_id=course_id,
+            student_id=data.student_id,
+            ordinal=0 if last_ordinal is None else last_ordinal + 1,
+            is_active=data.is_active,
         )
 
         db.add(course_student)
+        _touch_course(db, course_id)
         db.commit()
+        invalidate_course_roster(course_id)
+        invalidate_user_caches(data.student_id)
 
         return {"message": "Estudiante agregado al curso exitosamente"}, 201
     except Exception:
@@ -321,7 +367,10 @@ def remove_student_from_course_service(
             return None, 404
 
         course_student.is_active = False
+        _touch_course(db, course_id)
         db.commit()
+        invalidate_course_roster(course_id)
+        invalidate_user_caches(student_id)
 
         return {"message": "Estudiante removido del curso exitosamente"}, 200
     except Exception:
@@ -400,7 +449,9 @@ def add_subject_to_course_service(
             else:
                 # Reactivar asignación
                 existing_assignment.is_active = True
+                _touch_course(db, course_id)
                 db.commit()
+                invalidate_user_caches(data.teacher_id)
                 return {"message": "Materia agregada al curso exitosamente"}, 200
 
         # Crear nueva asignación
@@ -412,7 +463,9 @@ def add_subject_to_course_service(
         )
 
         db.add(course_subject)
+        _touch_course(db, course_id)
         db.commit()
+        invalidate_user_caches(data.teacher_id)
 
         return {"message": "Materia agregada al curso exitosamente"}, 201
     except Exception:
@@ -442,7 +495,9 @@ def remove_subject_from_course_service(
             return None, 404
 
         course_subject.is_active = False
+        _touch_course(db, course_id)
         db.commit()
+        invalidate_user_caches(teacher_id)
 
         return {"message": "Materia removida del curso exitosamente"}, 200
     except Exception:
@@ -450,3 +505,124 @@ def remove_subject_from_course_service(
         return None, 500
     finally:
         db.close()
+
+
+def iter_course_students_rows(course_id: int) -> Iterator[tuple]:
+    """Filas del listado de estudiantes de un curso, leídas por lotes del servidor"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                User.id,
+                User.document,
+                User.username,
+                User.full_name,
+                CourseStudent.enrolled_at,
+            )
+            .join(User, CourseStudent.student_id == User.id)
+            .filter(CourseStudent.course_id == course_id, CourseStudent.is_active)
+            .order_by(User.full_name, User.id)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for user_id, document, username, full_name, enrolled_at in rows:
+            yield (
+                user_id,
+                document,
+                username,
+                full_name,
+                enrolled_at.isoformat() if enrolled_at else "",
+            )
+    finally:
+        db.close()
+
+
+def export_course_students_service(
+    course_id: int,
+) -> Tuple[Optional[Tuple[list, Iterator[tuple]]], int]:
+    """Exportar estudiantes de un curso (encabezado y filas perezosas)"""
+    db = SessionLocal()
+    try:
+        course = db.query(Course.id).filter(Course.id == course_id).first()
+        if not course:
+            return None, 404
+    finally:
+        db.close()
+
+    header = ["id", "documento", "usuario", "nombre", "matriculado"]
+    return (header, iter_course_students_rows(course_id)), 200
+
+
+def iter_course_gradebook_rows(
+    course_id: int, assignment_ids: List[int]
+) -> Iterator[list]:
+    """
+    Filas de la planilla de notas: un estudiante por fila y una columna por tarea
+
+    Las entregas se leen ordenadas por estudiante, así cada fila se emite en
+    cuanto llegan todas sus entregas sin cargar el curso completo en memoria.
+    """
+    columns = {assignment_id: index for index, assignment_id in enumerate(assignment_ids)}
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                User.id,
+                User.document,
+                User.full_name,
+                Submission.assignment_id,
+                Submission.score,
+            )
+            .select_from(CourseStudent)
+            .join(User, CourseStudent.student_id == User.id)
+            .outerjoin(
+                Submission,
+                and_(
+                    Submission.student_id == User.id,
+                    Submission.assignment_id.in_(assignment_ids or [-1]),
+                    Submission.is_active == 1,
+                ),
+            )
+            .filter(CourseStudent.course_id == course_id, CourseStudent.is_active)
+            .order_by(User.full_name, User.id, Submission.submitted_at)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+
+        current_id, current_row = None, None
+        for user_id, document, full_name, assignment_id, score in rows:
+            if user_id != current_id:
+                if current_row is not None:
+                    yield current_row
+                current_id = user_id
+                current_row = [user_id, document, full_name] + [""] * len(columns)
+            # La última entrega de cada tarea es la que cuenta
+            if assignment_id in columns and score is not None:
+                current_row[3 + columns[assignment_id]] = score
+        if current_row is not None:
+            yield current_row
+    finally:
+        db.close()
+
+
+def export_course_gradebook_service(
+    course_id: int,
+) -> Tuple[Optional[Tuple[list, Iterator[list]]], int]:
+    """Exportar la planilla de notas de un curso (encabezado y filas perezosas)"""
+    db = SessionLocal()
+    try:
+        course = db.query(Course.id).filter(Course.id == course_id).first()
+        if not course:
+            return None, 404
+
+        assignments = (
+            db.query(Assignment.id, Assignment.title)
+            .join(ClassModel, Assignment.class_id == ClassModel.id)
+            .filter(ClassModel.course_id == course_id)
+            .order_by(Assignment.due_date, Assignment.id)
+            .all()
+        )
+    finally:
+        db.close()
+
+    header = ["id", "documento", "nombre"] + [title for _, title in assignments]
+    assignment_ids = [assignment_id for assignment_id, _ in assignments]
+    return (header, iter_course_gradebook_rows(course_id, assignment_ids)), 200
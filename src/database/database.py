@@ -1,3 +1,5 @@
+import threading
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
@@ -7,11 +9,49 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+class PoolWaitStats:
+    """Moving average of the time requests wait to get a pooled connection"""
+
+    # Weight of the last checkout in the average
+    ALPHA = 0.2
+    # The average is ignored when there were no checkouts for this long
+    STALE_AFTER = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.average = 0.0
+        self.updated_at = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.average += self.ALPHA * (seconds - self.average)
+            self.updated_at = time.monotonic()
+
+    def current(self) -> float:
+        if time.monotonic() - self.updated_at > self.STALE_AFTER:
+            return 0.0
+        return self.average
+
+
+pool_wait = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (see pool_wait)"""
+
+    def connect(self):
+        start = time.monotonic()
+        try:
+            return super().connect()
+        finally:
+            pool_wait.record(time.monotonic() - start)
+
+
 DATABASE_URL = f"mysql+pymysql://{getenv('DB_USER')}:{getenv('DB_PASSWORD')}@{getenv('DB_HOST')}:{getenv('DB_PORT')}/{getenv('DB_NAME')}"
 
 engine = create_engine(
     DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=TimedQueuePool,
     pool_size=5,
     max_overflow=10,
     pool_timeout=30,
@@ -0,0 +1,58 @@
+import json
+import struct
+import zlib
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# Header of the compressed values: magic "ZJ" + format version
+COMPRESSED_JSON_MAGIC = b"ZJ"
+COMPRESSED_JSON_VERSION = 1
+COMPRESSION_LEVEL = 6
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON stored as compressed binary (MEDIUMBLOB in MySQL)
+
+    Format v1: b"ZJ" + version byte + uncompressed length (4 bytes, little
+    endian) + zlib stream. The part after the version byte is the same format
+    as MySQL COMPRESS(), so existing JSON columns can be converted in SQL with
+    CONCAT(X'5A4A01', COMPRESS(column)).
+
+    Values without the header are read as plain JSON, so rows written before
+    the column was converted keep working. Declare the column with
+    sqlalchemy.orm.deferred() so it is only fetched (and decompressed) when the
+    attribute is accessed.
+    """
+
+    impl = LargeBinary(length=16777215)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return (
+            COMPRESSED_JSON_MAGIC
+            + bytes([COMPRESSED_JSON_VERSION])
+            + struct.pack("<I", len(raw))
+            + zlib.compress(raw, COMPRESSION_LEVEL)
+        )
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+
+        value = bytes(value)
+        if not value.startswith(COMPRESSED_JSON_MAGIC):
+            return json.loads(value.decode("utf-8"))
+
+        version = value[len(COMPRESSED_JSON_MAGIC)]
+        if version != COMPRESSED_JSON_VERSION:
+            raise ValueError(f"Unsupported compressed JSON version {version}")
+
+        # decompressobj ignores the trailing '.' MySQL COMPRESS() may append
+        raw = zlib.decompressobj().decompress(value[len(COMPRESSED_JSON_MAGIC) + 5 :])
+        return json.loads(raw.decode("utf-8"))
@@ -3,7 +3,29 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, UserRole
 from src.models.document import Document
 from src.database.database import SessionLocal
-from typing import Dict, Any, List
+from typing import Dict, Any
+from sqlalchemy import func
+from .search import document_index, build_snippet
+from .revisions import (
+    record_revision,
+    get_revisions_service,
+    get_revision_service,
+    diff_revisions_service,
+)
+
+# Characters of content stored as excerpt for the listings
+EXCERPT_LENGTH = 280
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Build the excerpt of a document: the start of its content cut at a word"""
+    text = " ".join((content or "").split())
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[: cut if cut > 0 else length] + "…"
 
 
 @jwt_required()
@@ -19,12 +41,18 @@ def create_document_controller(request: Request) -> tuple[Dict[str, Any], int]:
 
         data = request.get_json()
         document = Document(
-            title=data["title"], content=data["content"], author_id=user_id
+            title=data["title"],
+            content=data["content"],
+            excerpt=make_excerpt(data["content"]),
+            author_id=user_id,
         )
 
         db.add(document)
+        db.flush()
+        record_revision(db, document, author_id=user_id)
         db.commit()
         db.refresh(document)
+        document_index.add(document.id, document.title, document.content)
 
         return {
             "id": document.id,
@@ -41,23 +69,118 @@ def create_document_controller(request: Request) -> tuple[Dict[str, Any], int]:
 @jwt_required()
 def get_documents_controller(
     request: Request,
-) -> tuple[Dict[str, List[Dict[str, Any]]], int]:
-    """Get all documents"""
+) -> tuple[Dict[str, Any], int]:
+    """
+    Get active documents, newest first, without their content
+
+    Query params:
+        cursor: next_cursor of the previous page
+        limit: Documents per page (max 100)
+        author_id: Only documents of this author
+    """
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor", type=int)
+    author_id = request.args.get("author_id", type=int)
+
     db = SessionLocal()
     try:
-        documents = db.query(Document).filter_by(is_active=True).all()
+        # Documents saved before the excerpt column existed use the start of the content
+        excerpt = func.coalesce(
+            Document.excerpt, func.substr(Document.content, 1, EXCERPT_LENGTH)
+        )
+        query = db.query(
+            Document.id,
+            Document.title,
+            excerpt.label("excerpt"),
+            Document.author_id,
+            Document.created_at,
+            Document.updated_at,
+        ).filter(Document.is_active == 1)
+        if author_id:
+            query = query.filter(Document.author_id == author_id)
+        if cursor:
+            query = query.filter(Document.id < cursor)
+
+        # One extra row tells whether there is a next page
+        documents = query.order_by(Document.id.desc()).limit(limit + 1).all()
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+
         return {
             "documents": [
                 {
                     "id": doc.id,
                     "title": doc.title,
-                    "content": doc.content,
+                    "excerpt": doc.excerpt,
                     "author_id": doc.author_id,
                     "created_at": doc.created_at.isoformat(),
                     "updated_at": doc.updated_at.isoformat(),
                 }
                 for doc in documents
-            ]
+            ],
+            "next_cursor": documents[-1].id if has_more else None,
+        }, 200
+    finally:
+        db.close()
+
+
+@jwt_required()
+def search_documents_controller(request: Request) -> tuple[Dict[str, Any], int]:
+    """Search active documents by title and content, ranked by relevance"""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return {"error": "Query parameter 'q' is required"}, 400
+
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 10, type=int), 1), 50)
+
+    if not document_index.ready:
+        document_index.start_build()
+        return (
+            {"error": "Search index is being built, try again in a few seconds"},
+            503,
+            {"Retry-After": "5"},
+        )
+
+    total, ranked, terms = document_index.search(
+        query, offset=(page - 1) * per_page, limit=per_page
+    )
+
+    db = SessionLocal()
+    try:
+        ids = [doc_id for doc_id, _ in ranked]
+        documents = {}
+        if ids:
+            documents = {
+                doc.id: doc
+                for doc in db.query(Document)
+                .filter(Document.id.in_(ids), Document.is_active == 1)
+                .all()
+            }
+
+        results = []
+        for doc_id, score in ranked:
+            doc = documents.get(doc_id)
+            if doc is None:
+                continue
+            results.append(
+                {
+                    "id": doc.id,
+                    "title": doc.title,
+                    "snippet": build_snippet(doc.content, terms),
+                    "score": round(score, 4),
+                    "author_id": doc.author_id,
+                    "created_at": doc.created_at.isoformat(),
+                    "updated_at": doc.updated_at.isoformat(),
+                }
+            )
+
+        return {
+            "documents": results,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
         }, 200
     finally:
         db.close()
@@ -91,7 +214,9 @@ def update_document_controller(request: Request, id: int) -> tuple[Dict[str, Any
     user_id = get_jwt_identity()
     db = SessionLocal()
     try:
-        document = db.query(Document).get(id)
+        # Locked until commit: concurrent edits are applied one after the other,
+        # each reading the content and last revision left by the previous one
+        document = db.query(Document).filter(Document.id == id).with_for_update().first()
 
         if not document or not document.is_active:
             return {"error": "Document not found"}, 404
@@ -100,10 +225,15 @@ def update_document_controller(request: Request, id: int) -> tuple[Dict[str, Any
             return {"error": "Unauthorized"}, 403
 
         data = request.get_json()
+        previous_title, previous_content = document.title, document.content
         document.title = data.get("title", document.title)
         document.content = data.get("content", document.content)
+        document.excerpt = make_excerpt(document.content)
 
+        if (document.title, document.content) != (previous_title, previous_content):
+            record_revision(db, document, previous_content, previous_title, user_id)
         db.commit()
+        document_index.add(document.id, document.title, document.content)
 
         return {
             "id": document.id,
@@ -133,7 +263,42 @@ def delete_document_controller(request: Request, id: int) -> tuple[Dict[str, str
 
         document.is_active = False
         db.commit()
+        document_index.remove(document.id)
 
         return {"message": "Document deleted successfully"}, 200
     finally:
         db.close()
+
+
+@jwt_required()
+def get_document_revisions_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
+    """List the versions of a document"""
+    revisions, status_code = get_revisions_service(id)
+    if status_code != 200:
+        return {"error": "Document not found"}, status_code
+    return {"revisions": revisions}, 200
+
+
+@jwt_required()
+def get_document_revision_controller(
+    request: Request, id: int, version: int
+) -> tuple[Dict[str, Any], int]:
+    """Get a document as it was at a version"""
+    revision, status_code = get_revision_service(id, version)
+    if status_code != 200:
+        return {"error": "Revision not found"}, status_code
+    return revision, 200
+
+
+@jwt_required()
+def diff_document_revisions_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
+    """Unified diff between two versions of a document (?from=&to=)"""
+    from_version = request.args.get("from", type=int)
+    to_version = request.args.get("to", type=int)
+    if not from_version or not to_version:
+        return {"error": "Query parameters 'from' and 'to' are required"}, 400
+
+    diff, status_code = diff_revisions_service(id, from_version, to_version)
+    if status_code != 200:
+        return {"error": "Revision not found"}, status_code
+    return diff, 200
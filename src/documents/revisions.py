@@ -0,0 +1,293 @@
+import difflib
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.database.database import SessionLocal
+from src.models.document import Document
+from src.models.document_revision import DocumentRevision
+
+# Every SNAPSHOT_INTERVAL versions the full content is stored, so rebuilding a
+# version applies at most SNAPSHOT_INTERVAL - 1 diffs
+SNAPSHOT_INTERVAL = 10
+# Revisions older than this are squashed by the compaction job
+REVISION_RETENTION_DAYS = 90
+
+
+def _split(content: str) -> List[str]:
+    return (content or "").splitlines(keepends=True)
+
+
+def encode_diff(previous: str, content: str) -> bytes:
+    """
+    Encode the changes from previous to content as compressed JSON ops
+
+    Ops are [start, end] to copy lines start:end of the previous version, or a
+    string with new text.
+    """
+    old_lines, new_lines = _split(previous), _split(content)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False).encode("utf-8"))
+
+
+def apply_diff(previous: str, data: bytes) -> str:
+    """Rebuild a version from the previous version and its encoded diff"""
+    old_lines = _split(previous)
+    parts = []
+    for op in json.loads(zlib.decompress(data).decode("utf-8")):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.append("".join(old_lines[op[0] : op[1]]))
+    return "".join(parts)
+
+
+def encode_snapshot(content: str) -> bytes:
+    return zlib.compress((content or "").encode("utf-8"))
+
+
+def decode_snapshot(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def record_revision(
+    db,
+    document: Document,
+    previous_content: Optional[str] = None,
+    previous_title: Optional[str] = None,
+    author_id: Optional[int] = None,
+) -> DocumentRevision:
+    """
+    Add a revision with the current content of a document to the session
+
+    Documents created before revisions existed get their previous content
+    stored as the first version. The document row must be locked (SELECT ...
+    FOR UPDATE) before reading previous_content, so two edits never take the
+    same version number.
+
+    Args:
+        db: Session where the document is being saved
+        document: Document with the new title and content
+        previous_content: Content before the change, None for new documents
+        previous_title: Title before the change
+        author_id: User that made the change
+    """
+    last = (
+        db.query(DocumentRevision)
+        .filter(DocumentRevision.document_id == document.id)
+        .order_by(DocumentRevision.version.desc())
+        .first()
+    )
+    if last is None and previous_content is not None:
+        last = DocumentRevision(
+            document_id=document.id,
+            version=1,
+            title=previous_title or document.title,
+            is_snapshot=True,
+            data=encode_snapshot(previous_content),
+            size=len(previous_content),
+        )
+        db.add(last)
+
+    version = last.version + 1 if last else 1
+    snapshot = encode_snapshot(document.content)
+    if last is not None and (version - 1) % SNAPSHOT_INTERVAL != 0:
+        diff = encode_diff(previous_content, document.content)
+        # A diff bigger than the whole content is not worth storing
+        if len(diff) < len(snapshot):
+            is_snapshot, data = False, diff
+        else:
+            is_snapshot, data = True, snapshot
+    else:
+        is_snapshot, data = True, snapshot
+
+    revision = DocumentRevision(
+        document_id=document.id,
+        version=version,
+        title=document.title,
+        is_snapshot=is_snapshot,
+        data=data,
+        size=len(document.content or ""),
+        author_id=author_id,
+    )
+    db.add(revision)
+    return revision
+
+
+def revision_to_dict(revision: DocumentRevision) -> dict:
+    return {
+        "version": revision.version,
+        "title": revision.title,
+        "is_snapshot": revision.is_snapshot,
+        "size": revision.size,
+        "author_id": revision.author_id,
+        "created_at": revision.created_at.isoformat() if revision.created_at else None,
+    }
+
+
+def _is_active_document(db, document_id: int) -> bool:
+    document = (
+        db.query(Document.is_active).filter(Document.id == document_id).first()
+    )
+    return bool(document and document.is_active)
+
+
+def get_revisions_service(document_id: int) -> Tuple[Optional[List[dict]], int]:
+    """List the revisions of a document, newest first"""
+    db = SessionLocal()
+    try:
+        if not _is_active_document(db, document_id):
+            return None, 404
+
+        revisions = (
+            db.query(DocumentRevision)
+            .filter(DocumentRevision.document_id == document_id)
+            .order_by(DocumentRevision.version.desc())
+            .all()
+        )
+        return [revision_to_dict(revision) for revision in revisions], 200
+    finally:
+        db.close()
+
+
+def _load_version(
+    db, document_id: int, version: int
+) -> Optional[Tuple[DocumentRevision, str]]:
+    """Rebuild a version from its nearest snapshot applying the diffs after it"""
+    base = (
+        db.query(DocumentRevision.version)
+        .filter(
+            DocumentRevision.document_id == document_id,
+            DocumentRevision.version <= version,
+            DocumentRevision.is_snapshot.is_(True),
+        )
+        .order_by(DocumentRevision.version.desc())
+        .limit(1)
+        .scalar()
+    )
+    if base is None:
+        return None
+
+    chain = (
+        db.query(DocumentRevision)
+        .filter(
+            DocumentRevision.document_id == document_id,
+            DocumentRevision.version >= base,
+            DocumentRevision.version <= version,
+        )
+        .order_by(DocumentRevision.version)
+        .all()
+    )
+    if not chain or chain[-1].version != version:
+        return None
+
+    content = ""
+    for revision in chain:
+        if revision.is_snapshot:
+            content = decode_snapshot(revision.data)
+        else:
+            content = apply_diff(content, revision.data)
+    return chain[-1], content
+
+
+def get_revision_service(document_id: int, version: int) -> Tuple[Optional[dict], int]:
+    """Get the title and content of a document at a version"""
+    db = SessionLocal()
+    try:
+        if not _is_active_document(db, document_id):
+            return None, 404
+
+        loaded = _load_version(db, document_id, version)
+        if loaded is None:
+            return None, 404
+
+        revision, content = loaded
+        result = revision_to_dict(revision)
+        result["content"] = content
+        return result, 200
+    finally:
+        db.close()
+
+
+def diff_revisions_service(
+    document_id: int, from_version: int, to_version: int
+) -> Tuple[Optional[dict], int]:
+    """Unified diff between two versions of a document"""
+    db = SessionLocal()
+    try:
+        if not _is_active_document(db, document_id):
+            return None, 404
+
+        old = _load_version(db, document_id, from_version)
+        new = _load_version(db, document_id, to_version)
+        if old is None or new is None:
+            return None, 404
+
+        diff = difflib.unified_diff(
+            _split(old[1]),
+            _split(new[1]),
+            fromfile=f"v{from_version}",
+            tofile=f"v{to_version}",
+        )
+        return {
+            "from_version": from_version,
+            "to_version": to_version,
+            "diff": "".join(diff),
+        }, 200
+    finally:
+        db.close()
+
+
+def compact_revisions(days: int = REVISION_RETENTION_DAYS, progress=None) -> dict:
+    """
+    Squash the revisions older than `days`
+
+    For each document, the newest old revision is rewritten as a snapshot and
+    the older ones are deleted, so newer versions can still be rebuilt.
+
+    Returns:
+        dict: Number of documents compacted and revisions deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    db = SessionLocal()
+    try:
+        candidates = (
+            db.query(DocumentRevision.document_id, func.max(DocumentRevision.version))
+            .filter(DocumentRevision.created_at < cutoff)
+            .group_by(DocumentRevision.document_id)
+            .having(func.count(DocumentRevision.id) > 1)
+            .all()
+        )
+
+        deleted = 0
+        for index, (document_id, keep_version) in enumerate(candidates, start=1):
+            revision, content = _load_version(db, document_id, keep_version)
+            revision.is_snapshot = True
+            revision.data = encode_snapshot(content)
+            deleted += (
+                db.query(DocumentRevision)
+                .filter(
+                    DocumentRevision.document_id == document_id,
+                    DocumentRevision.version < keep_version,
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            if progress:
+                progress(index * 100 // len(candidates))
+
+        return {"documents": len(candidates), "deleted": deleted}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,10 +1,15 @@
+import click
 from flask import Blueprint, request
 from .controllers import (
     create_document_controller,
     get_documents_controller,
+    search_documents_controller,
     get_document_controller,
     update_document_controller,
     delete_document_controller,
+    get_document_revisions_controller,
+    get_document_revision_controller,
+    diff_document_revisions_controller,
 )
 
 documents_bp = Blueprint("documents", __name__, url_prefix="/api/documents")
@@ -20,6 +25,11 @@ def get_documents():
     return get_documents_controller(request)
 
 
+@documents_bp.route("/search", methods=["GET"])
+def search_documents():
+    return search_documents_controller(request)
+
+
 @documents_bp.route("/<int:id>", methods=["GET"])
 def get_document(id):
     return get_document_controller(request, id)
@@ -33,3 +43,39 @@ def update_document(id):
 @documents_bp.route("/<int:id>", methods=["DELETE"])
 def delete_document(id):
     return delete_document_controller(request, id)
+
+
+@documents_bp.route("/<int:id>/revisions", methods=["GET"])
+def get_document_revisions(id):
+    return get_document_revisions_controller(request, id)
+
+
+@documents_bp.route("/<int:id>/revisions/<int:version>", methods=["GET"])
+def get_document_revision(id, version):
+    return get_document_revision_controller(request, id, version)
+
+
+@documents_bp.route("/<int:id>/diff", methods=["GET"])
+def diff_document_revisions(id):
+    return diff_document_revisions_controller(request, id)
+
+
+@documents_bp.cli.command("compact-revisions")
+@click.option("--days", default=90, help="Compactar las versiones más antiguas que estos días")
+@click.option("--enqueue", is_flag=True, help="Encolar la compactación para el worker")
+def compact_revisions_command(days, enqueue):
+    """Compactar el historial de versiones de los documentos"""
+    if enqueue:
+        from src.jobs.service import enqueue_job
+
+        job = enqueue_job("documents.compact_revisions", {"days": days}, priority=-10)
+        click.echo(f"Tarea {job['id']} encolada")
+        return
+
+    from .revisions import compact_revisions
+
+    result = compact_revisions(days)
+    click.echo(
+        f"{result['documents']} documentos compactados, "
+        f"{result['deleted']} versiones eliminadas"
+    )
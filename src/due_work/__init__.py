@@ -0,0 +1,3 @@
+from .router import due_work_bp
+
+__all__ = ["due_work_bp"]
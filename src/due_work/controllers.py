@@ -0,0 +1,30 @@
+from flask import Request, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from src.models.user import UserRole
+from .service import DEFAULT_PAGE_SIZE, get_due_work_service
+
+STAFF_ROLES = [UserRole.TEACHER.name, UserRole.ADMIN.name]
+
+
+@jwt_required()
+def get_due_work_controller(request: Request):
+    """
+    Pending assignments and exercises of the current student, by due date
+
+    Teachers and admins can see the feed of a student with ?student_id=.
+    """
+    student_id = get_jwt_identity()
+    if get_jwt().get("role") in STAFF_ROLES:
+        student_id = request.args.get("student_id", type=int)
+        if not student_id:
+            return jsonify({"error": "Debe indicar el estudiante"}), 400
+
+    feed, status_code = get_due_work_service(
+        student_id,
+        request.args.get("cursor"),
+        request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+    )
+    if feed is None:
+        return jsonify({"error": "Cursor inválido"}), status_code
+    return jsonify(feed), status_code
@@ -0,0 +1,10 @@
+from flask import Blueprint, request
+from .controllers import get_due_work_controller
+
+due_work_bp = Blueprint("due_work", __name__, url_prefix="/api/due-work")
+
+
+@due_work_bp.route("/", methods=["GET"])
+def get_due_work():
+    """Tareas y ejercicios pendientes del estudiante, por fecha de entrega"""
+    return get_due_work_controller(request)
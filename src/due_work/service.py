@@ -0,0 +1,235 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, or_, true
+
+from src.database.database import SessionLocal
+from src.models.assignment import Assignment
+from src.models.class_model import ClassModel
+from src.models.course import Course
+from src.models.course_student import CourseStudent
+from src.models.exercise import Exercise
+from src.models.subject import Subject
+from src.models.submission import Submission
+from src.utils.user_cache import UserCache
+
+# Seconds a page of the feed is reused (new work and submissions made in this
+# process invalidate it right away)
+DUE_WORK_CACHE_TTL = 60
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Items due at the same time are sorted by kind in this order, then by id
+KINDS = ("assignment", "exercise")
+CURSOR_SEPARATOR = "~"
+
+due_work_cache = UserCache(ttl=DUE_WORK_CACHE_TTL)
+
+Cursor = Tuple[datetime, int, int]
+
+
+def encode_cursor(item: dict) -> str:
+    return CURSOR_SEPARATOR.join((item["due_date"], item["kind"], str(item["id"])))
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """
+    Parse the next_cursor of a previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    due_date, kind, item_id = cursor.split(CURSOR_SEPARATOR)
+    return datetime.fromisoformat(due_date), KINDS.index(kind), int(item_id)
+
+
+def _after_cursor(due_column, id_column, rank: int, cursor: Optional[Cursor]):
+    """Keyset condition for the rows of one source that go after the cursor"""
+    if cursor is None:
+        return true()
+    due_date, cursor_rank, cursor_id = cursor
+    if rank > cursor_rank:
+        return due_column >= due_date
+    if rank < cursor_rank:
+        return due_column > due_date
+    return or_(
+        due_column > due_date, and_(due_column == due_date, id_column > cursor_id)
+    )
+
+
+def _assignment_stream(
+    db, student_id: int, course_ids: List[int], now: datetime, cursor, limit: int
+) -> Iterator[dict]:
+    """Assignments not submitted yet, in due date order"""
+    rank = KINDS.index("assignment")
+    submitted = exists().where(
+        Submission.assignment_id == Assignment.id,
+        Submission.student_id == student_id,
+        Submission.is_active == 1,
+    )
+    rows = (
+        db.query(
+            Assignment.id,
+            Assignment.title,
+            Assignment.due_date,
+            ClassModel.id,
+            ClassModel.title,
+            ClassModel.course_id,
+            Subject.name,
+        )
+        .join(ClassModel, ClassModel.id == Assignment.class_id)
+        .join(Subject, Subject.id == ClassModel.subject_id)
+        .filter(
+            ClassModel.course_id.in_(course_ids),
+            Assignment.due_date >= now,
+            _after_cursor(Assignment.due_date, Assignment.id, rank, cursor),
+            ~submitted,
+        )
+        .order_by(Assignment.due_date, Assignment.id)
+        .limit(limit)
+    )
+    for item_id, title, due_date, class_id, class_title, course_id, subject in rows:
+        yield {
+            "kind": "assignment",
+            "id": item_id,
+            "title": title,
+            "due_date": due_date.isoformat(),
+            "available_from": None,
+            "time_limit": None,
+            "class_id": class_id,
+            "class_title": class_title,
+            "course_id": course_id,
+            "subject_name": subject,
+            "_key": (due_date, rank, item_id),
+        }
+
+
+def _exercise_stream(
+    db, student_id: int, course_ids: List[int], now: datetime, cursor, limit: int
+) -> Iterator[dict]:
+    """Available exercises assigned to a class and not submitted yet, in due date order"""
+    rank = KINDS.index("exercise")
+    submitted = exists().where(
+        Submission.exercise_id == Exercise.id,
+        Submission.student_id == student_id,
+        Submission.is_active == 1,
+    )
+    rows = (
+        db.query(
+            Exercise.id,
+            Exercise.title,
+            Exercise.due_date,
+            Exercise.available_from,
+            Exercise.time_limit,
+            ClassModel.id,
+            ClassModel.title,
+            ClassModel.course_id,
+            Subject.name,
+        )
+        .join(ClassModel, ClassModel.id == Exercise.class_id)
+        .join(Subject, Subject.id == ClassModel.subject_id)
+        .filter(
+            ClassModel.course_id.in_(course_ids),
+            Exercise.is_active == 1,
+            Exercise.due_date >= now,
+            or_(Exercise.available_from.is_(None), Exercise.available_from <= now),
+            _after_cursor(Exercise.due_date, Exercise.id, rank, cursor),
+            ~submitted,
+        )
+        .order_by(Exercise.due_date, Exercise.id)
+        .limit(limit)
+    )
+    for (
+        item_id,
+        title,
+        due_date,
+        available_from,
+        time_limit,
+        class_id,
+        class_title,
+        course_id,
+        subject,
+    ) in rows:
+        yield {
+            "kind": "exercise",
+            "id": item_id,
+            "title": title,
+            "due_date": due_date.isoformat(),
+            "available_from": available_from.isoformat() if available_from else None,
+            "time_limit": time_limit,
+            "class_id": class_id,
+            "class_title": class_title,
+            "course_id": course_id,
+            "subject_name": subject,
+            "_key": (due_date, rank, item_id),
+        }
+
+
+def get_due_work_service(
+    student_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[Optional[dict], int]:
+    """
+    Pending work of a student in due date order, across assignments and exercises
+
+    Each source is read with its own query ordered by (due_date, id) and
+    limited to the page size, and the sorted streams are merged, so a page
+    never loads more than limit + 1 rows per source. Items carry the course,
+    subject and class they belong to so the client needs no other request.
+    Pages are cached per student for DUE_WORK_CACHE_TTL seconds.
+
+    Returns:
+        tuple: ({"items", "next_cursor"}, status) with status 400 if the
+        cursor is invalid
+    """
+    student_id = int(student_id)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        after = parse_cursor(cursor)
+    except ValueError:
+        return None, 400
+
+    cache_key = (student_id, cursor, limit)
+    cached = due_work_cache.get(cache_key)
+    if cached is not None:
+        return cached, 200
+
+    db = SessionLocal()
+    try:
+        courses: Dict[int, str] = dict(
+            db.query(Course.id, Course.name)
+            .join(CourseStudent, CourseStudent.course_id == Course.id)
+            .filter(
+                CourseStudent.student_id == student_id,
+                CourseStudent.is_active,
+                Course.is_active,
+            )
+        )
+        items: List[dict] = []
+        if courses:
+            now = datetime.utcnow()
+            course_ids = list(courses)
+            streams = [
+                _assignment_stream(db, student_id, course_ids, now, after, limit + 1),
+                _exercise_stream(db, student_id, course_ids, now, after, limit + 1),
+            ]
+            items = list(
+                islice(heapq.merge(*streams, key=lambda item: item["_key"]), limit + 1)
+            )
+    finally:
+        db.close()
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    for item in items:
+        del item["_key"]
+        item["course_name"] = courses[item["course_id"]]
+
+    page = {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if has_more else None,
+    }
+    due_work_cache.set(cache_key, page, courses)
+    return page, 200
@@ -2,6 +2,7 @@ from typing import Generator, Union, Any
 from collections import defaultdict
 from decimal import Decimal, ROUND_DOWN
 import re
+from concurrent.futures import ThreadPoolExecutor
 from flask import request
 from werkzeug.datastructures import MultiDict
 
@@ -10,12 +11,14 @@ from app.utils.responses import Response
 from app.mi_colegio.tareas.model_miColegio import crearAejerciciosModel, crearPruebaModel
 from app.mi_colegio.tareas.service_miColegio import MiColegioService
 from app.mi_colegio.tareas.helper_miColegio import HelperSie
+from src.utils.image_utils import DERIVATIVE_FORMATS, DERIVATIVE_WIDTHS, build_srcset, cancel_remote_derivatives, forget_derivatives, get_derivative_widths, record_remote_derivatives, remote_derivatives_cancelled, render_derivatives, schedule_task, track_remote_derivatives, untrack_remote_derivatives, variant_name
 
 class EjerciciosController:
     def __init__(self) -> None:
         self.service = EjercicioService()
         self.mi_colegio = MiColegioService()
         self.folder_azure = "miColegio/ejercicios"
+        self.max_workers_azure = 4 # Cantidad maxima de subidas/eliminaciones simultaneas en azure
 
     def listar_opciones(self) -> tuple:
         """Método para listar ejercicios"""
@@ -244,12 +247,10 @@ class EjerciciosController:
 
             # Add property to dict_request for the images(url)
             if type(dict_request["recursos"]) == list:
-                for image in dict_request["recursos"]: # Iterating over the list of images
-                    dict_request['recurso'] = image
-                    azure_image = self.upload_images_azure(dict_request)
-                    if azure_image[1] != 201:
-                        return Response.tuple_response(azure_image[0], azure_image[1])
-                    dict_request["contenido"].append(azure_image[0]) # Add the url of the image to the list of content
+                azure_images = self.upload_images_azure_concurrente(dict_request["recursos"])
+                if azure_images[1] != 201:
+                    return Response.tuple_response(azure_images[0], azure_images[1])
+                dict_request["contenido"].extend(azure_images[0]) # Add the urls of the images to the list of content
 
             # Use the structure method to transform the information in format 3
             if dict_request["id_formato"] in [3]:
@@ -336,10 +337,87 @@ class EjerciciosController:
 
             # Get the url of the image and return it
             (url, nombre) = upload_azure[0].values()
+
+            # Generate the resized versions of the image in the background
+            file_storage.stream.seek(0)
+            track_remote_derivatives(url)
+            schedule_task(self.subir_derivados_azure, url, nombre, file_storage.read())
             return Response.tuple_response(url, 201)
         except Exception as e:
             return Response.tuple_response("Problemas al subir las imagenes", 400)
 
+    def subir_derivados_azure(self, url: str, nombre: str, contenido: bytes) -> tuple:
+        """Método para subir a azure las versiones redimensionadas (webp/jpg) de una imagen"""
+        try:
+            widths = set()
+            subidos = []
+            for width, ext, data in render_derivatives(contenido):
+                # La imagen se eliminó (p. ej. al revertir una pregunta), no se sigue subiendo
+                if remote_derivatives_cancelled(url):
+                    break
+                content_type = HelperSie().get_content_type(ext)
+                derivado = HelperSie().upload_bytes_to_azure(self.folder_azure, variant_name(nombre, width, ext), data, content_type)
+                if derivado[1] != 200:
+                    return Response.tuple_response(derivado[0], derivado[1])
+                subidos.append(variant_name(nombre, width, ext))
+                widths.add(width)
+
+            # Only recorded derivatives are advertised in the srcset
+            if not record_remote_derivatives(url, widths):
+                # Los derivados subidos después de eliminar la imagen quedarian huerfanos
+                for subido in subidos:
+                    HelperSie().delete_resource_azure(self.folder_azure, subido)
+                return Response.tuple_response("Imagen eliminada, derivados descartados", 200)
+            return Response.tuple_response("Derivados subidos correctamente", 201)
+        except Exception as e:
+            return Response.tuple_response("Problemas al generar los derivados de la imagen", 400)
+        finally:
+            untrack_remote_derivatives(url)
+
+    def upload_images_azure_concurrente(self, imagenes: list) -> tuple:
+        """Método para subir en paralelo las imagenes de una pregunta, si alguna falla se eliminan las que ya se subieron"""
+        try:
+            if len(imagenes) == 0:
+                return Response.tuple_response([], 201)
+
+            # executor.map conserva el orden de las imagenes, el orden de las urls debe coincidir con el de las respuestas
+            with ThreadPoolExecutor(max_workers=min(self.max_workers_azure, len(imagenes))) as executor:
+                resultados: list = list(executor.map(lambda image: self.upload_images_azure({"recurso": image}), imagenes))
+
+            urls: list = [resultado[0] for resultado in resultados if resultado[1] == 201]
+            errores: list = [resultado for resultado in resultados if resultado[1] != 201]
+
+            # Todo o nada: si una imagen falla no deben quedar imagenes huerfanas en azure
+            if len(errores) != 0:
+                self.eliminar_imagenes_azure(urls)
+                return Response.tuple_response(errores[0][0], errores[0][1])
+
+            return Response.tuple_response(urls, 201)
+        except Exception as e:
+            return Response.tuple_response("Problemas al subir las imagenes", 400)
+
+    def eliminar_imagenes_azure(self, urls: list) -> tuple:
+        """Método para eliminar en paralelo un conjunto de imagenes de azure a partir de sus urls"""
+        try:
+            if len(urls) == 0:
+                return Response.tuple_response("Imagenes eliminadas correctamente", 200)
+
+            # Derivative uploads still running for these images are cancelled first
+            cancel_remote_derivatives(urls)
+            nombres: list = [url.split("/").pop() for url in urls] # Get the name of the images
+            # The resized versions of each image are deleted with it
+            nombres += [variant_name(nombre, width, ext) for nombre in list(nombres) for width in DERIVATIVE_WIDTHS for ext in DERIVATIVE_FORMATS]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers_azure, len(nombres))) as executor:
+                resultados: list = list(executor.map(lambda nombre: HelperSie().delete_resource_azure(self.folder_azure, nombre), nombres))
+
+            for resultado in resultados:
+                if resultado[1] != 200:
+                    return Response.tuple_response(resultado[0], resultado[1])
+            forget_derivatives(urls)
+            return Response.tuple_response("Imagenes eliminadas correctamente", 200)
+        except Exception as e:
+            return Response.tuple_response("Problemas al eliminar las imagenes", 400)
+
     def listar_preguntas_ejercicio(self, id_ejercicio: int) -> tuple:
         """Método para listar preguntas"""
         try:
@@ -408,12 +486,10 @@ class EjerciciosController:
                 if response[1] != 200:
                     return Response.tuple_response(response[0], response[1])
 
-                for image in dict_request["recursos"]:
-                    dict_request['recurso'] = image
-                    azure_image = self.upload_images_azure(dict_request)
-                    if azure_image[1] != 201:
-                        return Response.tuple_response(azure_image[0], azure_image[1])
-                    dict_request["contenido"].append(azure_image[0])
+                azure_images = self.upload_images_azure_concurrente(dict_request["recursos"])
+                if azure_images[1] != 201:
+                    return Response.tuple_response(azure_images[0], azure_images[1])
+                dict_request["contenido"].extend(azure_images[0])
 
             # where questions have format seven
             if dict_request["id_formato"] in [7,8]:
@@ -483,13 +559,11 @@ class EjerciciosController:
             if get_answer[1] != 200:
                 return Response.tuple_response(get_answer[0], get_answer[1])
 
-            #  Iterate over the list of answers
-            for answer in get_answer[0]:
-                name_cheild = answer["contenido"].split("/").pop() # Get the name of the image
-                # Delete image in azure
-                delete_azure = HelperSie().delete_resource_azure(self.folder_azure, name_cheild)
-                if delete_azure[1] != 200:
-                    return Response.tuple_response(delete_azure[0], delete_azure[1])
+            # Delete the images of the answers in azure
+            urls: list = [answer["contenido"] for answer in get_answer[0]]
+            delete_azure = self.eliminar_imagenes_azure(urls)
+            if delete_azure[1] != 200:
+                return Response.tuple_response(delete_azure[0], delete_azure[1])
             return Response.tuple_response("Imagenes eliminadas correctamente", 200)
         except Exception as e:
             return Response.tuple_response("No se encontraron imagenes", 400)
@@ -742,6 +816,12 @@ class EjerciciosController:
                         if respuesta["id_formato"] in [7, 8]
                     ]
 
+                    # Add the srcset of the resized versions to the image answers (only those uploaded)
+                    imagenes = [respuesta for respuesta in preguntas[0][i]["respuestas"] if respuesta.get("id_formato") in [6]]
+                    widths = get_derivative_widths([respuesta["contenido"] for respuesta in imagenes])
+                    for respuesta in imagenes:
+                        respuesta["variantes"] = build_srcset(respuesta["contenido"], widths.get(respuesta["contenido"], []))
+
                     # Yes, the response_format is not empty proceed to order the answers
                     if len(response_format) != 0:
                         # Order the answers by the initial position
@@ -883,6 +963,11 @@ class EjerciciosController:
             if len(dict_respuesta["contenidos"]) == 0:
                 return Response.tuple_response([], 200)
 
+            # Srcset of the resized versions of the images
+            if pregunta[0][0]["id_formato"] in [6]:
+                widths = get_derivative_widths(dict_respuesta["contenidos"])
+                dict_respuesta["variantes"] = [build_srcset(contenido, widths.get(contenido, [])) for contenido in dict_respuesta["contenidos"]]
+
             # Where the question are in disarray
             if pregunta[0][0]["id_formato"] in [7, 8]:
                 data_position: list = list(int(dic["posicion_inicial"]) for dic in pregunta[0]) # List of position only True
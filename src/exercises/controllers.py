@@ -3,14 +3,48 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, UserRole
 from src.models.exercise import Exercise
 from src.models.submission import Submission
+from src.models.question import Question
 from src.database.database import SessionLocal
+from src.attempts.events import exercise_events
+from src.utils.idempotency import (
+    get_idempotency_key,
+    remember_submission,
+    replay_response,
+    replay_submission,
+    submission_idempotency,
+)
+from src.utils.user_cache import invalidate_class_caches, invalidate_user_caches
+from src.utils.export_utils import (
+    EXPORT_BATCH_SIZE,
+    available_export_formats,
+    export_response,
+)
+from src.questions.service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    add_exercise_question_service,
+    add_exercise_questions,
+    build_question,
+    get_exercise_questions_service,
+    grade_exercise_answers,
+    parse_question,
+    question_to_dict,
+    remove_exercise_question_service,
+    reorder_exercise_questions_service,
+)
+from sqlalchemy.exc import IntegrityError
 from typing import Dict, Any, List
 from datetime import datetime
 
 
 @jwt_required()
 def create_exercise_controller(request: Request) -> tuple[Dict[str, Any], int]:
-    """Create a new exercise"""
+    """
+    Create a new exercise
+
+    "questions" is a list of new questions and/or {"question_id": id} items to
+    reuse questions of the bank, in the order they appear in the exercise.
+    """
     user_id = get_jwt_identity()
     db = SessionLocal()
     try:
@@ -20,25 +54,73 @@ def create_exercise_controller(request: Request) -> tuple[Dict[str, Any], int]:
             return {"error": "Unauthorized"}, 403
 
         data = request.get_json()
+        items = data.get("questions") or []
+        if isinstance(items, dict):
+            items = list(items.values())
+        try:
+            parsed = [
+                None if isinstance(item, dict) and item.get("question_id")
+                else parse_question(item)
+                for item in items
+            ]
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        try:
+            available_from, due_date = (
+                datetime.fromisoformat(data[key]) if data.get(key) else None
+                for key in ("available_from", "due_date")
+            )
+        except (TypeError, ValueError):
+            return {"error": "Invalid date"}, 400
+
         exercise = Exercise(
             title=data["title"],
             description=data["description"],
-            questions=data["questions"],
             author_id=user_id,
             time_limit=data.get("time_limit"),
+            class_id=data.get("class_id"),
+            available_from=available_from,
+            due_date=due_date,
         )
-
         db.add(exercise)
+        db.flush()
+
+        questions = []
+        for item, fields in zip(items, parsed):
+            if fields is None:
+                question = db.query(Question).get(item["question_id"])
+                if not question or not question.is_active:
+                    db.rollback()
+                    return {"error": f"Question {item['question_id']} not found"}, 404
+            else:
+                question = build_question(fields, user_id)
+                db.add(question)
+            questions.append(question)
+        db.flush()
+        question_ids = [question.id for question in questions]
+        if len(set(question_ids)) != len(question_ids):
+            db.rollback()
+            return {"error": "Duplicated question"}, 400
+        add_exercise_questions(db, exercise.id, question_ids)
+
         db.commit()
         db.refresh(exercise)
+        invalidate_class_caches(db, exercise.class_id)
 
         return {
             "id": exercise.id,
             "title": exercise.title,
             "description": exercise.description,
-            "questions": exercise.questions,
+            "questions": [
+                question_to_dict(question, question.choices, include_answer=True)
+                for question in questions
+            ],
             "author_id": exercise.author_id,
             "time_limit": exercise.time_limit,
+            "class_id": exercise.class_id,
+            "available_from": exercise.available_from.isoformat() if exercise.available_from else None,
+            "due_date": exercise.due_date.isoformat() if exercise.due_date else None,
             "created_at": exercise.created_at.isoformat(),
         }, 201
     finally:
@@ -61,6 +143,9 @@ def get_exercises_controller(
                     "description": ex.description,
                     "author_id": ex.author_id,
                     "time_limit": ex.time_limit,
+                    "class_id": ex.class_id,
+                    "available_from": ex.available_from.isoformat() if ex.available_from else None,
+                    "due_date": ex.due_date.isoformat() if ex.due_date else None,
                     "created_at": ex.created_at.isoformat(),
                 }
                 for ex in exercises
@@ -72,39 +157,77 @@ def get_exercises_controller(
 
 @jwt_required()
 def submit_exercise_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
-    """Submit an exercise"""
-    user_id = get_jwt_identity()
+    """
+    Submit an exercise without a time limit (timed exercises go through the
+    attempts API, which enforces the deadline)
+
+    With an Idempotency-Key header, retries of the same submission get the
+    first response back (with Idempotent-Replayed: true) without grading the
+    answers again.
+    """
+    user_id = int(get_jwt_identity())
+    try:
+        key = get_idempotency_key(request)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    target = ("exercise", id)
+    if key:
+        cached = submission_idempotency.get(user_id, key)
+        if cached:
+            return replay_response(cached, target)
+
     db = SessionLocal()
     try:
+        if key:
+            replay = replay_submission(db, user_id, key, target)
+            if replay:
+                return replay
+
         exercise = db.query(Exercise).get(id)
 
         if not exercise or not exercise.is_active:
             return {"error": "Exercise not found"}, 404
 
+        now = datetime.utcnow()
+        if exercise.available_from and now < exercise.available_from:
+            return {"error": "Exercise is not available yet"}, 400
+        if exercise.due_date and now > exercise.due_date:
+            return {"error": "Exercise due date has passed"}, 400
+        # The time limit is only enforced on attempts (started on the server)
+        if exercise.time_limit:
+            return {
+                "error": "Timed exercise, start an attempt with "
+                f"POST /api/attempts/exercises/{id} and submit it"
+            }, 409
+
         data = request.get_json()
         submission = Submission(
-            student_id=user_id, exercise_id=id, content=data["answers"]
+            student_id=user_id,
+            exercise_id=id,
+            content=data["answers"],
+            idempotency_key=key,
         )
 
-        # Here you would implement the logic to grade the submission
-        correct_answers = 0
-        total_questions = len(exercise.questions)
-
-        for q_id, answer in data["answers"].items():
-            if answer == exercise.questions[q_id]["correct_answer"]:
-                correct_answers += 1
-
-        submission.score = (correct_answers / total_questions) * 100
+        # Answers are keyed by question id
+        submission.score, _ = grade_exercise_answers(db, id, data["answers"])
 
         db.add(submission)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key was stored first
+            db.rollback()
+            replay = replay_submission(db, user_id, key, target) if key else None
+            if not replay:
+                raise
+            return replay
         db.refresh(submission)
+        invalidate_user_caches(user_id)
 
-        return {
-            "id": submission.id,
-            "score": submission.score,
-            "submitted_at": submission.submitted_at.isoformat(),
-        }, 201
+        body = remember_submission(user_id, key, submission)
+        exercise_events.publish(id, "submission", {"student_id": user_id, **body})
+        return body, 201
     finally:
         db.close()
 
@@ -136,3 +259,161 @@ def get_exercise_submissions_controller(
         }, 200
     finally:
         db.close()
+
+
+def iter_exercise_submission_rows(exercise_id: int):
+    """Yield the result rows of an exercise, fetched from the server in batches"""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                Submission.id,
+                User.id,
+                User.document,
+                User.full_name,
+                Submission.score,
+                Submission.feedback,
+                Submission.submitted_at,
+            )
+            .join(User, Submission.student_id == User.id)
+            .filter(Submission.exercise_id == exercise_id)
+            .order_by(Submission.submitted_at, Submission.id)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for sub_id, student_id, document, full_name, score, feedback, submitted_at in rows:
+            yield (
+                sub_id,
+                student_id,
+                document,
+                full_name,
+                "" if score is None else score,
+                feedback or "",
+                submitted_at.isoformat() if submitted_at else "",
+            )
+    finally:
+        db.close()
+
+
+@jwt_required()
+def export_exercise_submissions_controller(request: Request, id: int):
+    """Download the results of an exercise as CSV or XLSX"""
+    user_id = get_jwt_identity()
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+
+        if user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
+            return {"error": "Unauthorized"}, 403
+
+        if not db.query(Exercise.id).filter_by(id=id).first():
+            return {"error": "Exercise not found"}, 404
+    finally:
+        db.close()
+
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in available_export_formats():
+        return {"error": "Unsupported export format"}, 400
+
+    header = ["id", "student_id", "document", "full_name", "score", "feedback", "submitted_at"]
+    return export_response(
+        f"exercise_{id}_results", header, iter_exercise_submission_rows(id), export_format
+    )
+
+
+@jwt_required()
+def get_exercise_questions_controller(
+    request: Request, id: int
+) -> tuple[Dict[str, Any], int]:
+    """Get one page of the questions of an exercise"""
+    user_id = get_jwt_identity()
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+    finally:
+        db.close()
+
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = request.args.get("per_page", DEFAULT_PAGE_SIZE, type=int)
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    # Students get the questions without the answer key
+    include_answer = user.role in [UserRole.TEACHER, UserRole.ADMIN]
+
+    result, status = get_exercise_questions_service(id, page, per_page, include_answer)
+    if status == 403:
+        return {"error": "Exercise is not available yet"}, 403
+    if result is None:
+        return {"error": "Exercise not found"}, status
+    return result, status
+
+
+def _exercise_editor(user_id):
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+    finally:
+        db.close()
+    if user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
+        return None
+    return user
+
+
+@jwt_required()
+def add_exercise_question_controller(
+    request: Request, id: int
+) -> tuple[Dict[str, Any], int]:
+    """Add a new or existing question to an exercise"""
+    user = _exercise_editor(get_jwt_identity())
+    if user is None:
+        return {"error": "Unauthorized"}, 403
+
+    try:
+        result, status = add_exercise_question_service(id, request.get_json() or {}, user)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if status == 403:
+        return {"error": "Unauthorized"}, 403
+    if status == 409:
+        return {"error": "Question already in exercise"}, 409
+    if result is None:
+        return {"error": "Exercise or question not found"}, status
+    return result, status
+
+
+@jwt_required()
+def remove_exercise_question_controller(
+    request: Request, id: int, question_id: int
+) -> tuple[Dict[str, Any], int]:
+    """Remove a question from an exercise"""
+    user = _exercise_editor(get_jwt_identity())
+    if user is None:
+        return {"error": "Unauthorized"}, 403
+
+    result, status = remove_exercise_question_service(id, question_id, user)
+    if status == 403:
+        return {"error": "Unauthorized"}, 403
+    if result is None:
+        return {"error": "Exercise or question not found"}, status
+    return result, status
+
+
+@jwt_required()
+def reorder_exercise_questions_controller(
+    request: Request, id: int
+) -> tuple[Dict[str, Any], int]:
+    """Set the order of the questions of an exercise"""
+    user = _exercise_editor(get_jwt_identity())
+    if user is None:
+        return {"error": "Unauthorized"}, 403
+
+    question_ids = (request.get_json() or {}).get("question_ids")
+    if not isinstance(question_ids, list):
+        return {"error": "question_ids must be a list"}, 400
+
+    result, status = reorder_exercise_questions_service(id, question_ids, user)
+    if status == 403:
+        return {"error": "Unauthorized"}, 403
+    if status == 400:
+        return {"error": "question_ids must contain every question of the exercise"}, 400
+    if result is None:
+        return {"error": "Exercise not found"}, status
+    return result, status
@@ -1,9 +1,16 @@
+import click
 from flask import Blueprint, request
+from src.utils.rate_limit import SUBMIT_LIMITS, jwt_user_key, rate_limited
 from .controllers import (
     create_exercise_controller,
     get_exercises_controller,
     submit_exercise_controller,
     get_exercise_submissions_controller,
+    export_exercise_submissions_controller,
+    get_exercise_questions_controller,
+    add_exercise_question_controller,
+    remove_exercise_question_controller,
+    reorder_exercise_questions_controller,
 )
 
 exercises_bp = Blueprint("exercises", __name__, url_prefix="/api/exercises")
@@ -20,6 +27,7 @@ def get_exercises():
 
 
 @exercises_bp.route("/<int:id>/submit", methods=["POST"])
+@rate_limited("submit", SUBMIT_LIMITS, user_key=jwt_user_key)
 def submit_exercise(id):
     return submit_exercise_controller(request, id)
 
@@ -27,3 +35,50 @@ def submit_exercise(id):
 @exercises_bp.route("/<int:id>/submissions", methods=["GET"])
 def get_exercise_submissions(id):
     return get_exercise_submissions_controller(request, id)
+
+
+@exercises_bp.route("/<int:id>/submissions/export", methods=["GET"])
+def export_exercise_submissions(id):
+    return export_exercise_submissions_controller(request, id)
+
+
+@exercises_bp.route("/<int:id>/questions", methods=["GET"])
+def get_exercise_questions(id):
+    return get_exercise_questions_controller(request, id)
+
+
+@exercises_bp.route("/<int:id>/questions", methods=["POST"])
+def add_exercise_question(id):
+    return add_exercise_question_controller(request, id)
+
+
+@exercises_bp.route("/<int:id>/questions/order", methods=["PUT"])
+def reorder_exercise_questions(id):
+    return reorder_exercise_questions_controller(request, id)
+
+
+@exercises_bp.route("/<int:id>/questions/<int:question_id>", methods=["DELETE"])
+def remove_exercise_question(id, question_id):
+    return remove_exercise_question_controller(request, id, question_id)
+
+
+@exercises_bp.cli.command("split-questions")
+@click.option("--enqueue", is_flag=True, help="Encolar la migración para el worker")
+def split_questions_command(enqueue):
+    """Mover las preguntas JSON de los ejercicios al banco de preguntas"""
+    if enqueue:
+        from src.jobs.service import enqueue_job
+
+        job = enqueue_job("exercises.split_questions", {}, priority=-10)
+        click.echo(f"Tarea {job['id']} encolada")
+        return
+
+    from src.questions.service import split_exercise_questions
+
+    result = split_exercise_questions()
+    click.echo(
+        f"{result['exercises']} ejercicios migrados, "
+        f"{result['questions']} preguntas creadas"
+    )
+    if result["failed"]:
+        click.echo(f"Ejercicios con preguntas inválidas: {result['failed']}")
@@ -0,0 +1,3 @@
+from .router import files_bp
+
+__all__ = ["files_bp"]
@@ -0,0 +1,36 @@
+from flask import Request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from .service import serve_book_service, serve_resource_service
+
+ERRORS = {
+    403: "No autorizado",
+    404: "Archivo no encontrado",
+}
+
+
+@jwt_required()
+def serve_book_file_controller(book_id: int, request: Request):
+    """Download the EPUB file of a book"""
+    response, status_code = serve_book_service(book_id, get_jwt_identity())
+    if status_code != 200:
+        return jsonify({"error": ERRORS[status_code]}), status_code
+    return response
+
+
+@jwt_required()
+def serve_book_cover_controller(book_id: int, request: Request):
+    """Get the cover image of a book"""
+    response, status_code = serve_book_service(book_id, get_jwt_identity(), cover=True)
+    if status_code != 200:
+        return jsonify({"error": ERRORS[status_code]}), status_code
+    return response
+
+
+@jwt_required()
+def serve_resource_file_controller(resource_id: int, request: Request):
+    """Download the file of a class resource"""
+    response, status_code = serve_resource_service(resource_id, get_jwt_identity())
+    if status_code != 200:
+        return jsonify({"error": ERRORS[status_code]}), status_code
+    return response
@@ -0,0 +1,26 @@
+from flask import Blueprint, request
+from .controllers import (
+    serve_book_file_controller,
+    serve_book_cover_controller,
+    serve_resource_file_controller,
+)
+
+files_bp = Blueprint("files", __name__, url_prefix="/files")
+
+
+@files_bp.route("/books/<int:book_id>", methods=["GET"])
+def serve_book_file(book_id):
+    """EPUB del libro (soporta Range para reanudar descargas)"""
+    return serve_book_file_controller(book_id, request)
+
+
+@files_bp.route("/books/<int:book_id>/cover", methods=["GET"])
+def serve_book_cover(book_id):
+    """Portada del libro"""
+    return serve_book_cover_controller(book_id, request)
+
+
+@files_bp.route("/resources/<int:resource_id>", methods=["GET"])
+def serve_resource_file(resource_id):
+    """Archivo de un recurso de clase"""
+    return serve_resource_file_controller(resource_id, request)
@@ -0,0 +1,191 @@
+import mimetypes
+import os
+from typing import Optional
+
+from flask import current_app, redirect, request
+from werkzeug.utils import secure_filename, send_file as werkzeug_send_file
+
+from src.database.database import SessionLocal
+from src.models.book import Book
+from src.models.class_model import ClassModel
+from src.models.course_student import CourseStudent
+from src.models.resource import Resource, ResourceType
+from src.models.user import User, UserRole
+from src.utils.image_utils import STATIC_DIR
+
+# Files can only be served from the static storage folder
+STORAGE_ROOT = os.path.abspath(STATIC_DIR)
+
+# Seconds the browser can reuse a file before revalidating it with its ETag
+FILE_MAX_AGE = 60 * 60
+
+
+def resolve_stored_path(file_path: Optional[str]) -> Optional[str]:
+    """
+    Resolve a stored file path and make sure it stays inside the storage folder
+
+    Args:
+        file_path: Path stored in the database, e.g. 'src/static/books/a.epub'
+
+    Returns:
+        The absolute path of the file, or None if it does not exist or is outside the storage
+    """
+    if not file_path:
+        return None
+    abs_path = os.path.abspath(file_path)
+    if os.path.commonpath([abs_path, STORAGE_ROOT]) != STORAGE_ROOT:
+        return None
+    if not os.path.isfile(abs_path):
+        return None
+    return abs_path
+
+
+def send_stored_file(
+    abs_path: str, as_attachment: bool = False, download_name: Optional[str] = None
+):
+    """
+    Send a stored file with Range/conditional support and strong ETags
+
+    When FILE_SERVE_MODE is 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd)
+    the body is offloaded to the front server and the worker is released at
+    once. Otherwise the file is streamed in chunks through wsgi.file_wrapper.
+
+    Args:
+        abs_path: Absolute path returned by resolve_stored_path
+        as_attachment: Force the browser to download the file
+        download_name: Name the browser saves the file as (stored files are
+            named after their content hash), the stored name by default
+
+    Returns:
+        The Flask response
+    """
+    serve_mode = current_app.config.get("FILE_SERVE_MODE", "")
+    offload = serve_mode in ("x-accel", "x-sendfile")
+
+    # Offload only applies here: USE_X_SENDFILE stays off so the /static
+    # route keeps sending its own bodies
+    response = werkzeug_send_file(
+        abs_path,
+        request.environ,
+        mimetype=mimetypes.guess_type(abs_path)[0] or "application/octet-stream",
+        as_attachment=as_attachment,
+        download_name=download_name or os.path.basename(abs_path),
+        conditional=not offload,
+        etag=True,
+        max_age=FILE_MAX_AGE,
+        use_x_sendfile=offload,
+        response_class=current_app.response_class,
+    )
+
+    if not offload:
+        # Advertise resumable downloads on full responses as well
+        response.accept_ranges = "bytes"
+        return response
+
+    # The front server handles Range itself, only 304 revalidation is answered here
+    response = response.make_conditional(request.environ, accept_ranges=False)
+    response.accept_ranges = "bytes"
+
+    if response.status_code == 304:
+        # Nothing to send, the front server must not attach the body
+        response.headers.pop("X-Sendfile", None)
+        return response
+
+    if serve_mode == "x-accel":
+        relative_path = os.path.relpath(abs_path, STORAGE_ROOT).replace(os.sep, "/")
+        response.headers.pop("X-Sendfile", None)
+        response.headers["X-Accel-Redirect"] = (
+            current_app.config.get("X_ACCEL_REDIRECT_PREFIX", "/protected/")
+            + relative_path
+        )
+    return response
+
+
+def get_book_for_user(book_id: int, user_id) -> tuple[Optional[Book], int]:
+    """Get a book checking that the user can read it"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+        if not user:
+            return None, 404
+
+        book = db.query(Book).filter(Book.id == book_id).first()
+        if not book:
+            return None, 404
+
+        # Students can only read books for students
+        if user.role == UserRole.STUDENT and book.target_audience != "STUDENT":
+            return None, 403
+
+        return book, 200
+    finally:
+        db.close()
+
+
+def serve_book_service(book_id: int, user_id, cover: bool = False):
+    """Serve the EPUB file or the cover image of a book"""
+    book, status_code = get_book_for_user(book_id, user_id)
+    if status_code != 200:
+        return None, status_code
+
+    abs_path = resolve_stored_path(book.cover_image if cover else book.file_path)
+    if not abs_path:
+        return None, 404
+
+    # secure_filename is empty for titles without any ASCII letter or digit
+    name = secure_filename(book.title) or f"book_{book.id}"
+    download_name = name + os.path.splitext(abs_path)[1]
+    return send_stored_file(abs_path, as_attachment=not cover, download_name=download_name), 200
+
+
+def get_resource_for_user(resource_id: int, user_id) -> tuple[Optional[Resource], int]:
+    """Get a class resource checking that the user can read it"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+        if not user:
+            return None, 404
+
+        resource = db.query(Resource).filter(Resource.id == resource_id).first()
+        if not resource:
+            return None, 404
+
+        # Students can only read the resources of the courses they are enrolled in
+        if user.role == UserRole.STUDENT:
+            enrolled = (
+                db.query(CourseStudent.id)
+                .join(ClassModel, ClassModel.course_id == CourseStudent.course_id)
+                .filter(
+                    ClassModel.id == resource.class_id,
+                    CourseStudent.student_id == user.id,
+                    CourseStudent.is_active,
+                )
+                .first()
+            )
+            if not enrolled:
+                return None, 403
+
+        return resource, 200
+    finally:
+        db.close()
+
+
+def serve_resource_service(resource_id: int, user_id):
+    """Serve the file of a class resource"""
+    resource, status_code = get_resource_for_user(resource_id, user_id)
+    if status_code != 200:
+        return None, status_code
+
+    if resource.resource_type != ResourceType.FILE:
+        return None, 404
+
+    # Resources stored in an external storage are served by it
+    if resource.file_url and resource.file_url.startswith(("http://", "https://")):
+        return redirect(resource.file_url), 200
+
+    abs_path = resolve_stored_path(resource.file_url)
+    if not abs_path:
+        return None, 404
+
+    download_name = f"resource_{resource.id}{os.path.splitext(abs_path)[1]}"
+    return send_stored_file(abs_path, download_name=download_name), 200
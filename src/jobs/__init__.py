@@ -0,0 +1,3 @@
+from .router import jobs_bp
+
+__all__ = ["jobs_bp"]
@@ -0,0 +1,18 @@
+from flask import Request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from .service import get_job_service
+
+ERRORS = {
+    403: "No autorizado",
+    404: "Tarea no encontrada",
+}
+
+
+@jwt_required()
+def get_job_controller(job_id: int, request: Request):
+    """Get the status and progress of a background job"""
+    job, status_code = get_job_service(job_id, get_jwt_identity())
+    if status_code != 200:
+        return jsonify({"error": ERRORS[status_code]}), status_code
+    return jsonify(job), 200
@@ -0,0 +1,22 @@
+import click
+from flask import Blueprint, request
+from .controllers import get_job_controller
+
+jobs_bp = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+def get_job(job_id):
+    """Estado y progreso de una tarea en segundo plano"""
+    return get_job_controller(job_id, request)
+
+
+@jobs_bp.cli.command("worker")
+@click.option("--poll-interval", default=2.0, help="Segundos de espera con la cola vacía")
+@click.option("--once", is_flag=True, help="Terminar cuando la cola quede vacía")
+def worker_command(poll_interval, once):
+    """Procesar las tareas en segundo plano (flask jobs worker)"""
+    from .worker import run_worker
+
+    processed = run_worker(poll_interval=poll_interval, once=once)
+    click.echo(f"{processed} tareas procesadas")
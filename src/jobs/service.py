@@ -0,0 +1,332 @@
+import os
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from ..database.database import SessionLocal
+from ..models.job import Job, JobStatus
+from ..models.user import User, UserRole
+
+# Retry delay: JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1) seconds, capped
+JOB_RETRY_BASE_DELAY = 30
+JOB_RETRY_MAX_DELAY = 60 * 60
+# A running job whose lock has not been renewed for this time is claimed again
+JOB_LOCK_TIMEOUT = 30 * 60
+# The worker renews the lock of the job it is running this often
+JOB_HEARTBEAT_INTERVAL = 60
+
+# Registered tasks, name -> function(payload, progress)
+TASKS: dict[str, Callable] = {}
+
+
+def register_task(name: str):
+    """
+    Register a function as a background task
+
+    The function receives the payload of the job and a callable to report the
+    progress (0 - 100), and its return value is stored as the job result.
+
+    Args:
+        name: Name used to enqueue the task
+    """
+
+    def decorator(fn):
+        TASKS[name] = fn
+        return fn
+
+    return decorator
+
+
+def job_to_dict(job: Job) -> dict:
+    """Convert a Job object to a dictionary"""
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status.value,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "run_at": job.run_at.isoformat() if job.run_at else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+def enqueue_job(
+    name: str,
+    payload: Optional[dict] = None,
+    priority: int = 0,
+    idempotency_key: Optional[str] = None,
+    max_attempts: int = 3,
+    delay: int = 0,
+    created_by: Optional[int] = None,
+) -> dict:
+    """
+    Enqueue a job for the worker
+
+    If a job with the same idempotency key already exists it is returned
+    instead of creating a new one.
+
+    Args:
+        name: Name of a registered task
+        payload: JSON serializable arguments of the task
+        priority: Higher priorities are claimed first
+        idempotency_key: Optional key that identifies the work
+        max_attempts: Times the job is tried before it is marked as failed
+        delay: Seconds to wait before the job can be claimed
+        created_by: Id of the user that requested the work
+
+    Returns:
+        dict: The enqueued (or existing) job
+    """
+    db = SessionLocal()
+    try:
+        if idempotency_key:
+            existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+            if existing:
+                return job_to_dict(existing)
+
+        job = Job(
+            name=name,
+            payload=payload,
+            status=JobStatus.PENDING,
+            priority=priority,
+            max_attempts=max_attempts,
+            run_at=datetime.utcnow() + timedelta(seconds=delay),
+            idempotency_key=idempotency_key,
+            created_by=created_by,
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request enqueued the same key first
+            db.rollback()
+            existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+            if existing is None:
+                raise
+            return job_to_dict(existing)
+
+        db.refresh(job)
+        return job_to_dict(job)
+    finally:
+        db.close()
+
+
+def get_job_service(job_id: int, user_id) -> tuple[Optional[dict], int]:
+    """Get the status of a job, only its creator or an admin can read it"""
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None, 404
+
+        user = db.query(User).get(user_id)
+        if not user:
+            return None, 404
+        if user.role != UserRole.ADMIN and job.created_by != user.id:
+            return None, 403
+
+        return job_to_dict(job), 200
+    finally:
+        db.close()
+
+
+def worker_id() -> str:
+    """Identifier of the current worker process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(locked_by: str) -> Optional[dict]:
+    """
+    Claim the next job ready to run
+
+    The row is locked with SKIP LOCKED so several workers can poll the table
+    at the same time without claiming the same job.
+
+    Args:
+        locked_by: Identifier of the worker
+
+    Returns:
+        dict: The claimed job, None if there is nothing to run
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        lock_expired = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+
+        # The worker died on the last attempt (the job itself may be what
+        # kills it, e.g. out of memory), so it is not run again
+        for lost in (
+            db.query(Job)
+            .filter(
+                Job.status == JobStatus.RUNNING,
+                Job.locked_at < lock_expired,
+                Job.attempts >= Job.max_attempts,
+            )
+            .with_for_update(skip_locked=True)
+        ):
+            lost.status = JobStatus.FAILED
+            lost.error = f"Worker {lost.locked_by} stopped while running the job"
+            lost.locked_by = None
+            lost.locked_at = None
+
+        job = (
+            db.query(Job)
+            .filter(
+                or_(
+                    and_(Job.status == JobStatus.PENDING, Job.run_at <= now),
+                    # The worker running it died, try it again
+                    and_(
+                        Job.status == JobStatus.RUNNING,
+                        Job.locked_at < lock_expired,
+                        Job.attempts < Job.max_attempts,
+                    ),
+                )
+            )
+            .order_by(Job.priority.desc(), Job.run_at, Job.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.commit()
+            return None
+
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = locked_by
+        job.locked_at = now
+        job.error = None
+        db.commit()
+        db.refresh(job)
+
+        claimed = job_to_dict(job)
+        claimed["payload"] = job.payload
+        claimed["locked_by"] = job.locked_by
+        return claimed
+    finally:
+        db.close()
+
+
+def renew_job_lock(job_id: int, locked_by: str, progress: Optional[int] = None) -> bool:
+    """
+    Renew the lock of a running job (and optionally update its progress)
+
+    Only the worker holding the lock can renew it, so a run that lost its job
+    to another worker does not take it back.
+
+    Returns:
+        bool: False if the job is no longer locked by this worker
+    """
+    values = {Job.locked_at: datetime.utcnow()}
+    if progress is not None:
+        values[Job.progress] = max(0, min(100, int(progress)))
+    db = SessionLocal()
+    try:
+        renewed = (
+            db.query(Job)
+            .filter(
+                Job.id == job_id,
+                Job.status == JobStatus.RUNNING,
+                Job.locked_by == locked_by,
+            )
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return renewed > 0
+    finally:
+        db.close()
+
+
+def set_job_progress(job_id: int, locked_by: str, progress: int):
+    """Update the progress (0 - 100) of a running job, which renews its lock"""
+    renew_job_lock(job_id, locked_by, progress)
+
+
+def finish_job(job_id: int, locked_by: str, result=None, error: Optional[str] = None):
+    """
+    Store the outcome of a job
+
+    Failed jobs are scheduled again with exponential backoff until they reach
+    max_attempts. The outcome is dropped if the job is no longer locked by
+    this worker (its lock expired and another worker claimed it).
+    """
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(Job)
+            .filter(Job.id == job_id, Job.locked_by == locked_by)
+            .with_for_update()
+            .first()
+        )
+        if not job:
+            print(f"[{locked_by}] Lost the lock of job {job_id}, its outcome is dropped")
+            return
+
+        job.locked_by = None
+        job.locked_at = None
+        if error is None:
+            job.status = JobStatus.SUCCEEDED
+            job.progress = 100
+            job.result = result
+            job.error = None
+        elif job.attempts < job.max_attempts:
+            delay = min(JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1), JOB_RETRY_MAX_DELAY)
+            job.status = JobStatus.PENDING
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            job.error = error
+        else:
+            job.status = JobStatus.FAILED
+            job.error = error
+        db.commit()
+    finally:
+        db.close()
+
+
+def _heartbeat(job_id: int, locked_by: str, stop: threading.Event):
+    while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+        try:
+            if not renew_job_lock(job_id, locked_by):
+                return
+        except Exception as e:
+            print(f"[{locked_by}] Error renewing the lock of job {job_id}: {e}")
+
+
+def run_job(job: dict):
+    """
+    Run a claimed job and store its outcome
+
+    A heartbeat thread renews the lock while the task runs, so jobs longer
+    than JOB_LOCK_TIMEOUT are not claimed again by another worker.
+    """
+    job_id, locked_by = job["id"], job["locked_by"]
+    task = TASKS.get(job["name"])
+    if task is None:
+        finish_job(job_id, locked_by, error=f"Unknown task '{job['name']}'")
+        return
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(job_id, locked_by, stop), daemon=True
+    )
+    heartbeat.start()
+    result = error = None
+    try:
+        result = task(
+            job["payload"] or {},
+            lambda progress: set_job_progress(job_id, locked_by, progress),
+        )
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        stop.set()
+        heartbeat.join()
+    finish_job(job_id, locked_by, result=result, error=error)
@@ -0,0 +1,30 @@
+from ..class_views.rollups import update_class_view_rollups
+from ..documents.revisions import compact_revisions
+from ..questions.service import split_exercise_questions
+from ..utils.image_utils import generate_local_derivatives
+from .service import register_task
+
+
+@register_task("image_derivatives")
+def image_derivatives_task(payload: dict, progress):
+    """Generate the resized derivatives of a local image"""
+    generated = generate_local_derivatives(payload["file_path"])
+    return {"generated": len(generated)}
+
+
+@register_task("documents.compact_revisions")
+def compact_revisions_task(payload: dict, progress):
+    """Squash the old revisions of every document"""
+    return compact_revisions(payload.get("days", 90), progress=progress)
+
+
+@register_task("exercises.split_questions")
+def split_questions_task(payload: dict, progress):
+    """Move the questions JSON of the exercises to the question bank"""
+    return split_exercise_questions(progress=progress)
+
+
+@register_task("class_views.rollup")
+def class_view_rollup_task(payload: dict, progress):
+    """Add the new class views to the daily engagement rollups"""
+    return update_class_view_rollups(progress=progress)
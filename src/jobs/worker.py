@@ -0,0 +1,30 @@
+import time
+
+from . import tasks  # noqa: F401 - registers the tasks
+from .service import claim_next_job, run_job, worker_id
+
+
+def run_worker(poll_interval: float = 2.0, once: bool = False) -> int:
+    """
+    Process jobs until interrupted
+
+    Args:
+        poll_interval: Seconds to wait when the queue is empty
+        once: Stop as soon as the queue is empty
+
+    Returns:
+        int: Number of jobs processed
+    """
+    locked_by = worker_id()
+    processed = 0
+    while True:
+        job = claim_next_job(locked_by)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        print(f"[{locked_by}] Running job {job['id']} ({job['name']}), attempt {job['attempts']}")
+        run_job(job)
+        processed += 1
@@ -1,33 +1,61 @@
 # Import all models to ensure SQLAlchemy can resolve relationships
 from .user import User, UserRole
 from .document import Document
+from .document_revision import DocumentRevision
 from .exercise import Exercise
+from .question import Question
+from .choice import Choice
+from .exercise_question import ExerciseQuestion
+from .exercise_attempt import ExerciseAttempt, AttemptStatus
+from .attempt_answer import AttemptAnswer
 from .assignment import Assignment
 from .submission import Submission
 from .subject import Subject
 from .period import Period
 from .class_model import ClassModel
 from .class_view import ClassView
+from .class_view_daily import ClassViewDaily
+from .class_view_student_daily import ClassViewStudentDaily
+from .class_view_bitmap import ClassViewBitmap
+from .rollup_state import RollupState
 from .resource import Resource
 from .book import Book
 from .course import Course
 from .course_student import CourseStudent
 from .course_subject import CourseSubject
+from .stored_file import StoredFile
+from .image_derivative import ImageDerivative
+from .job import Job, JobStatus
 
 __all__ = [
     "User",
     "UserRole",
     "Document",
+    "DocumentRevision",
     "Exercise",
+    "Question",
+    "Choice",
+    "ExerciseQuestion",
+    "ExerciseAttempt",
+    "AttemptStatus",
+    "AttemptAnswer",
     "Assignment",
     "Submission",
     "Subject",
     "Period",
     "ClassModel",
     "ClassView",
+    "ClassViewDaily",
+    "ClassViewStudentDaily",
+    "ClassViewBitmap",
+    "RollupState",
     "Resource",
     "Book",
     "Course",
     "CourseStudent",
     "CourseSubject",
+    "StoredFile",
+    "ImageDerivative",
+    "Job",
+    "JobStatus",
 ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from src.database.database import Base
 
@@ -9,6 +9,7 @@ class Assignment(Base):
     """Assignment model for the application"""
 
     __tablename__ = "assignments"
+    __table_args__ = (Index("idx_assignments_class_due_date", "class_id", "due_date"),)
 
     id = Column(Integer, primary_key=True, index=True)
     class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class AttemptAnswer(Base):
+    """Latest autosaved answer to one question of an exercise attempt"""
+
+    __tablename__ = "attempt_answers"
+    __table_args__ = (
+        UniqueConstraint("attempt_id", "question_id", name="uq_attempt_answers_question"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    attempt_id = Column(Integer, ForeignKey("exercise_attempts.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    answer = Column(JSON, nullable=True)
+    # When the server received the answer, older writes never overwrite newer ones
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    attempt = relationship("ExerciseAttempt", back_populates="answers")
+
+    def __repr__(self):
+        return f"<AttemptAnswer(attempt_id={self.attempt_id}, question_id={self.question_id})>"
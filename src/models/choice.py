@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text, Boolean, Index
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class Choice(Base):
+    """Answer option of a question"""
+
+    __tablename__ = "question_choices"
+    __table_args__ = (
+        Index("idx_question_choices_question_position", "question_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # 0-based, answers refer to it
+    text = Column(Text, nullable=False)
+    is_correct = Column(Boolean, nullable=False, default=False)
+
+    # Relationships
+    question = relationship("Question", back_populates="choices")
+
+    def __repr__(self):
+        return f"<Choice(question_id={self.question_id}, position={self.position})>"
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary
+from src.database.database import Base
+
+
+class ClassViewBitmap(Base):
+    """Students of the course that viewed a class, as a bitmap of their ordinals"""
+
+    __tablename__ = "class_view_bitmaps"
+
+    class_id = Column(Integer, ForeignKey("classes.id"), primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    # Bit n (little endian) is set when the student with ordinal n viewed it
+    bitmap = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClassViewBitmap(class_id={self.class_id}, course_id={self.course_id})>"
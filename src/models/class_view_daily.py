@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index, UniqueConstraint
+from src.database.database import Base
+
+
+class ClassViewDaily(Base):
+    """Daily rollup of the views of a class (maintained from class_views)"""
+
+    __tablename__ = "class_view_daily"
+    __table_args__ = (
+        UniqueConstraint("class_id", "day", name="uq_class_view_daily_class_day"),
+        Index("idx_class_view_daily_course_day", "course_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    views = Column(Integer, nullable=False, default=0)
+    unique_students = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClassViewDaily(class_id={self.class_id}, day={self.day}, views={self.views})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index, UniqueConstraint
+from src.database.database import Base
+
+
+class ClassViewStudentDaily(Base):
+    """Daily rollup of the views of a class by each student"""
+
+    __tablename__ = "class_view_student_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "class_id", "day", "student_id", name="uq_class_view_student_daily"
+        ),
+        Index("idx_class_view_student_daily_course_day", "course_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    views = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<ClassViewStudentDaily(class_id={self.class_id}, "
+            f"student_id={self.student_id}, day={self.day})>"
+        )
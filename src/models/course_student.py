@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from src.database.database import Base
 
@@ -8,10 +8,16 @@ class CourseStudent(Base):
     """Many-to-many relationship between courses and students"""
 
     __tablename__ = "course_students"
+    __table_args__ = (
+        UniqueConstraint("course_id", "ordinal", name="uq_course_students_ordinal"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Position of the student in the course (0-based, never reused); it is
+    # the bit of the student in the class view bitmaps
+    ordinal = Column(Integer, nullable=False)
     enrolled_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
 
@@ -13,6 +13,7 @@ class Document(Base):
     id: int = Column(Integer, primary_key=True, index=True)
     title: str = Column(String(255), nullable=False)
     content: str = Column(Text, nullable=False)
+    excerpt: str = Column(String(300), nullable=True)  # Start of the content for listings
     author_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at: datetime = Column(DateTime, default=datetime.utcnow)
     updated_at: datetime = Column(
@@ -22,3 +23,6 @@ class Document(Base):
 
     # Relationships
     author = relationship("User", back_populates="documents")
+    revisions = relationship(
+        "DocumentRevision", back_populates="document", lazy="dynamic"
+    )
@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    Boolean,
+    LargeBinary,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class DocumentRevision(Base):
+    """Version of a document, stored as a compressed diff or a full snapshot"""
+
+    __tablename__ = "document_revisions"
+    __table_args__ = (
+        UniqueConstraint("document_id", "version", name="uq_document_revisions_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    title = Column(String(255), nullable=False)
+    # Snapshot: zlib(content). Diff: zlib(JSON ops against the previous version)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    data = Column(LargeBinary(length=16777215), nullable=False)  # MEDIUMBLOB
+    size = Column(Integer, nullable=False)  # Length of the content of this version
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    document = relationship("Document", back_populates="revisions")
+
+    def __repr__(self):
+        return f"<DocumentRevision(document_id={self.document_id}, version={self.version})>"
@@ -1,22 +1,29 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import deferred, relationship
 from src.database.database import Base
+from src.database.types import CompressedJSON
 
 
 class Exercise(Base):
     """Exercise model for storing quizzes and tests"""
 
     __tablename__ = "exercises"
+    __table_args__ = (Index("idx_exercises_class_due_date", "class_id", "due_date"),)
 
     id: int = Column(Integer, primary_key=True, index=True)
     title: str = Column(String(255), nullable=False)
     description: str = Column(Text, nullable=False)
-    questions: dict = Column(
-        JSON, nullable=False
-    )  # Store questions and answers in JSON format
+    # Legacy questions blob (compressed JSON), only fetched when accessed. It is
+    # emptied once the questions are moved to the question bank
+    questions = deferred(Column(CompressedJSON, nullable=True))
     author_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
     time_limit: int = Column(Integer, nullable=True)  # Time limit in minutes
+    # Optional class (and so course) the exercise is assigned to, and the
+    # window in which students can take it
+    class_id: int = Column(Integer, ForeignKey("classes.id"), nullable=True)
+    available_from: datetime = Column(DateTime, nullable=True)
+    due_date: datetime = Column(DateTime, nullable=True)
     created_at: datetime = Column(DateTime, default=datetime.utcnow)
     updated_at: datetime = Column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -26,3 +33,9 @@ class Exercise(Base):
     # Relationships
     author = relationship("User", back_populates="exercises")
     submissions = relationship("Submission", back_populates="exercise")
+    question_links = relationship(
+        "ExerciseQuestion",
+        back_populates="exercise",
+        order_by="ExerciseQuestion.position",
+        lazy="dynamic",
+    )
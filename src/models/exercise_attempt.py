@@ -0,0 +1,41 @@
+from datetime import datetime
+from enum import Enum as PyEnum
+from sqlalchemy import Column, Integer, DateTime, Enum, Float, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class AttemptStatus(PyEnum):
+    IN_PROGRESS = "in_progress"
+    SUBMITTED = "submitted"
+
+
+class ExerciseAttempt(Base):
+    """A student taking an exercise, from start until the answers are submitted"""
+
+    __tablename__ = "exercise_attempts"
+    __table_args__ = (
+        Index("idx_exercise_attempts_exercise_student", "exercise_id", "student_id"),
+        Index("idx_exercise_attempts_status_deadline", "status", "deadline"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(AttemptStatus), nullable=False, default=AttemptStatus.IN_PROGRESS)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    # When the time limit (or the due date) of the exercise runs out, the
+    # attempt is submitted by the server at this time
+    deadline = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    score = Column(Float, nullable=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=True)
+
+    # Relationships
+    answers = relationship("AttemptAnswer", back_populates="attempt", lazy="dynamic")
+
+    def __repr__(self):
+        return (
+            f"<ExerciseAttempt(id={self.id}, exercise_id={self.exercise_id}, "
+            f"student_id={self.student_id}, status='{self.status}')>"
+        )
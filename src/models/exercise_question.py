@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class ExerciseQuestion(Base):
+    """Many-to-many relationship between exercises and questions, with order"""
+
+    __tablename__ = "exercise_questions"
+    __table_args__ = (
+        UniqueConstraint(
+            "exercise_id", "question_id", name="uq_exercise_questions_question"
+        ),
+        Index("idx_exercise_questions_position", "exercise_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # 1-based order in the exercise
+
+    # Relationships
+    exercise = relationship("Exercise", back_populates="question_links")
+    question = relationship("Question", back_populates="exercise_links")
+
+    def __repr__(self):
+        return (
+            f"<ExerciseQuestion(exercise_id={self.exercise_id}, "
+            f"question_id={self.question_id}, position={self.position})>"
+        )
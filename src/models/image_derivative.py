@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from src.database.database import Base
+
+
+class ImageDerivative(Base):
+    """Resized versions of a remote image that were uploaded successfully"""
+
+    __tablename__ = "image_derivatives"
+    __table_args__ = (UniqueConstraint("url", name="uq_image_derivatives_url"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(512), nullable=False)  # URL of the original image
+    widths = Column(JSON, nullable=False)  # Widths uploaded in every format
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ImageDerivative(url='{self.url}', widths={self.widths})>"
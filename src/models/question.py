@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, JSON
+from sqlalchemy.orm import relationship
+from src.database.database import Base
+
+
+class Question(Base):
+    """Question of the question bank, can be reused by several exercises"""
+
+    __tablename__ = "questions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    text = Column(Text, nullable=False)
+    format = Column(String(50), nullable=True)
+    points = Column(Float, nullable=False, default=1.0)
+    # Answer key of the questions without choices (compared as is)
+    correct_answer = Column(JSON, nullable=True)
+    feedback = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    is_active = Column(Integer, default=1)
+
+    # Relationships
+    author = relationship("User")
+    choices = relationship(
+        "Choice",
+        back_populates="question",
+        order_by="Choice.position",
+        cascade="all, delete-orphan",
+    )
+    exercise_links = relationship(
+        "ExerciseQuestion", back_populates="question", lazy="dynamic"
+    )
+
+    def __repr__(self):
+        return f"<Question(id={self.id}, author_id={self.author_id})>"
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from src.database.database import Base
+
+
+class RollupState(Base):
+    """Last source row included in a rollup, so it can continue incrementally"""
+
+    __tablename__ = "rollup_state"
+
+    name = Column(String(100), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RollupState(name='{self.name}', last_id={self.last_id})>"
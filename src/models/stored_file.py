@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from src.database.database import Base
+
+
+class StoredFile(Base):
+    """Content-addressed file shared by every row that references it"""
+
+    __tablename__ = "stored_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), index=True, nullable=False)
+    path = Column(String(512), unique=True, nullable=False)  # folder/<sha256>.<ext>
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<StoredFile(path='{self.path}', ref_count={self.ref_count})>"
@@ -1,26 +1,34 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, UniqueConstraint
+from sqlalchemy.orm import deferred, relationship
 from src.database.database import Base
+from src.database.types import CompressedJSON
 
 
 class Submission(Base):
     """Submission model for exercise and assignment submissions"""
 
     __tablename__ = "submissions"
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id", "idempotency_key", name="uq_submissions_student_idempotency_key"
+        ),
+    )
 
     id: int = Column(Integer, primary_key=True, index=True)
     student_id: int = Column(Integer, ForeignKey("users.id"), nullable=False)
     exercise_id: int = Column(Integer, ForeignKey("exercises.id"), nullable=True)
     assignment_id: int = Column(Integer, ForeignKey("assignments.id"), nullable=True)
-    content: dict = Column(
-        JSON, nullable=False
-    )  # Store submission content in JSON format
+    # Compressed JSON, only fetched when the attribute is accessed
+    content = deferred(Column(CompressedJSON, nullable=False))
     score: float = Column(Float, nullable=True)
     feedback: str = Column(Text, nullable=True)
     submitted_at: datetime = Column(DateTime, default=datetime.utcnow)
     is_active: bool = Column(Integer, default=1)
+    # Idempotency-Key sent by the client, retries with the same key replay
+    # the first response instead of creating another submission
+    idempotency_key: str = Column(String(100), nullable=True)
 
     # Relationships
     student = relationship("User", back_populates="submissions")
@@ -0,0 +1,3 @@
+from .router import questions_bp
+
+__all__ = ["questions_bp"]
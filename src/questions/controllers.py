@@ -0,0 +1,99 @@
+from flask import Request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models.user import User, UserRole
+from src.database.database import SessionLocal
+from typing import Dict, Any
+from .service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    create_question_service,
+    get_question_service,
+    get_questions_service,
+    update_question_service,
+    check_answer_service,
+)
+
+
+def get_current_user():
+    """Load the user of the request token"""
+    db = SessionLocal()
+    try:
+        return db.query(User).get(get_jwt_identity())
+    finally:
+        db.close()
+
+
+def is_staff(user) -> bool:
+    return user is not None and user.role in [UserRole.TEACHER, UserRole.ADMIN]
+
+
+@jwt_required()
+def create_question_controller(request: Request) -> tuple[Dict[str, Any], int]:
+    """Add a question to the question bank"""
+    user = get_current_user()
+    if not is_staff(user):
+        return {"error": "Unauthorized"}, 403
+
+    try:
+        return create_question_service(request.get_json() or {}, user.id)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+
+@jwt_required()
+def get_questions_controller(request: Request) -> tuple[Dict[str, Any], int]:
+    """List the questions of the bank (newest first, paginated with a cursor)"""
+    user = get_current_user()
+    if not is_staff(user):
+        return {"error": "Unauthorized"}, 403
+
+    author_id = request.args.get("author_id", type=int)
+    cursor = request.args.get("cursor", type=int)
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return get_questions_service(author_id, cursor, limit)
+
+
+@jwt_required()
+def get_question_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
+    """Get a question by id; the answer key is only shown to teachers"""
+    user = get_current_user()
+    question, status = get_question_service(id, include_answer=is_staff(user))
+    if question is None:
+        return {"error": "Question not found"}, status
+    return question, status
+
+
+@jwt_required()
+def update_question_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
+    """Edit a question of the bank"""
+    user = get_current_user()
+    if not is_staff(user):
+        return {"error": "Unauthorized"}, 403
+
+    try:
+        question, status = update_question_service(id, request.get_json() or {}, user)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if status == 403:
+        return {"error": "Unauthorized"}, 403
+    if question is None:
+        return {"error": "Question not found"}, status
+    return question, status
+
+
+@jwt_required()
+def check_answer_controller(request: Request, id: int) -> tuple[Dict[str, Any], int]:
+    """Grade the answer to a single question (students: practice questions only)"""
+    data = request.get_json() or {}
+    if "answer" not in data:
+        return {"error": "Answer is required"}, 400
+
+    result, status = check_answer_service(
+        id, data["answer"], staff=is_staff(get_current_user())
+    )
+    if status == 403:
+        return {"error": "Unauthorized"}, 403
+    if result is None:
+        return {"error": "Question not found"}, status
+    return result, status
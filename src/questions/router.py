@@ -0,0 +1,35 @@
+from flask import Blueprint, request
+from .controllers import (
+    create_question_controller,
+    get_questions_controller,
+    get_question_controller,
+    update_question_controller,
+    check_answer_controller,
+)
+
+questions_bp = Blueprint("questions", __name__, url_prefix="/api/questions")
+
+
+@questions_bp.route("/", methods=["POST"])
+def create_question():
+    return create_question_controller(request)
+
+
+@questions_bp.route("/", methods=["GET"])
+def get_questions():
+    return get_questions_controller(request)
+
+
+@questions_bp.route("/<int:id>", methods=["GET"])
+def get_question(id):
+    return get_question_controller(request, id)
+
+
+@questions_bp.route("/<int:id>", methods=["PUT"])
+def update_question(id):
+    return update_question_controller(request, id)
+
+
+@questions_bp.route("/<int:id>/check", methods=["POST"])
+def check_answer(id):
+    return check_answer_controller(request, id)
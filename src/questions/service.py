@@ -0,0 +1,680 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+
+from src.database.database import SessionLocal
+from src.models.choice import Choice
+from src.models.exercise import Exercise
+from src.models.exercise_question import ExerciseQuestion
+from src.models.question import Question
+from src.models.user import User, UserRole
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+SPLIT_BATCH_SIZE = 100
+
+
+def parse_question(data: dict) -> dict:
+    """
+    Validate a question payload and normalize it to the bank fields
+
+    Accepts the keys of the exercises.questions JSON ("question" or "text",
+    "options" or "choices", "correct_answer", "points", "feedback", "format").
+    Options are strings or {"text", "is_correct"} objects; when they are
+    strings, correct_answer marks the correct ones by position, by text or
+    with a list of them.
+
+    Raises:
+        ValueError: If the question has no text or an option is empty
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Question must be an object")
+
+    text = data.get("text") or data.get("question")
+    if not text or not str(text).strip():
+        raise ValueError("Question text is required")
+
+    correct_answer = data.get("correct_answer")
+    if isinstance(correct_answer, list):
+        correct = list(correct_answer)
+    else:
+        correct = [correct_answer]
+
+    choices = []
+    for position, option in enumerate(data.get("choices") or data.get("options") or []):
+        if isinstance(option, dict):
+            option_text = option.get("text")
+            is_correct = bool(option.get("is_correct"))
+        else:
+            option_text = option
+            is_correct = any(
+                value == option_text
+                or (isinstance(value, int) and not isinstance(value, bool) and value == position)
+                for value in correct
+            )
+        if option_text is None or not str(option_text).strip():
+            raise ValueError(f"Option {position} is empty")
+        choices.append(
+            {"position": position, "text": str(option_text), "is_correct": is_correct}
+        )
+
+    try:
+        points = float(data.get("points", 1))
+    except (TypeError, ValueError):
+        raise ValueError("Points must be a number")
+    if points < 0:
+        raise ValueError("Points must be positive")
+
+    return {
+        "text": str(text),
+        "format": None if data.get("format") is None else str(data["format"]),
+        "points": points,
+        # Questions graded by their choices do not need the raw answer key
+        "correct_answer": None
+        if any(choice["is_correct"] for choice in choices)
+        else correct_answer,
+        "feedback": data.get("feedback"),
+        "choices": choices,
+    }
+
+
+def build_question(fields: dict, author_id: int) -> Question:
+    """Create a Question (with its choices) from the output of parse_question"""
+    return Question(
+        author_id=author_id,
+        text=fields["text"],
+        format=fields["format"],
+        points=fields["points"],
+        correct_answer=fields["correct_answer"],
+        feedback=fields["feedback"],
+        choices=[Choice(**choice) for choice in fields["choices"]],
+    )
+
+
+def question_to_dict(
+    question, choices: Iterable, include_answer: bool = False
+) -> Dict[str, Any]:
+    result = {
+        "id": question.id,
+        "text": question.text,
+        "format": question.format,
+        "points": question.points,
+        "choices": [
+            {"id": choice.id, "position": choice.position, "text": choice.text}
+            for choice in choices
+        ],
+    }
+    if include_answer:
+        for item, choice in zip(result["choices"], choices):
+            item["is_correct"] = bool(choice.is_correct)
+        result["correct_answer"] = question.correct_answer
+        result["feedback"] = question.feedback
+    return result
+
+
+def _choices_by_question(db, question_ids: List[int]) -> Dict[int, List[Choice]]:
+    """Load the choices of several questions with one indexed query"""
+    grouped: Dict[int, List[Choice]] = {question_id: [] for question_id in question_ids}
+    if not question_ids:
+        return grouped
+    choices = (
+        db.query(Choice)
+        .filter(Choice.question_id.in_(question_ids))
+        .order_by(Choice.question_id, Choice.position)
+        .all()
+    )
+    for choice in choices:
+        grouped[choice.question_id].append(choice)
+    return grouped
+
+
+def _can_edit(user: User, question: Question) -> bool:
+    return user.role == UserRole.ADMIN or question.author_id == user.id
+
+
+def is_correct_answer(question, choices: List, answer) -> bool:
+    """
+    Check an answer against the answer key of a question
+
+    Questions with correct choices expect the position of the chosen option
+    (or its text), or a list of them when several options are correct. The
+    other questions compare the answer with correct_answer.
+    """
+    correct_positions = {choice.position for choice in choices if choice.is_correct}
+    if not correct_positions:
+        return answer == question.correct_answer
+
+    positions = {choice.text: choice.position for choice in choices}
+    selected = set()
+    for value in answer if isinstance(answer, list) else [answer]:
+        if isinstance(value, int) and not isinstance(value, bool):
+            selected.add(value)
+        elif isinstance(value, str) and value in positions:
+            selected.add(positions[value])
+        else:
+            return False
+    return selected == correct_positions
+
+
+def create_question_service(data: dict, author_id: int) -> Tuple[dict, int]:
+    """Add a question to the bank"""
+    fields = parse_question(data)
+    db = SessionLocal()
+    try:
+        question = build_question(fields, author_id)
+        db.add(question)
+        db.commit()
+        db.refresh(question)
+        return question_to_dict(question, question.choices, include_answer=True), 201
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_question_service(
+    question_id: int, include_answer: bool = False
+) -> Tuple[Optional[dict], int]:
+    """Get one question of the bank by id"""
+    db = SessionLocal()
+    try:
+        question = db.query(Question).get(question_id)
+        if not question or not question.is_active:
+            return None, 404
+        choices = _choices_by_question(db, [question.id])[question.id]
+        return question_to_dict(question, choices, include_answer), 200
+    finally:
+        db.close()
+
+
+def get_questions_service(
+    author_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[dict, int]:
+    """List the questions of the bank, newest first, paginated by id"""
+    db = SessionLocal()
+    try:
+        query = db.query(Question).filter(Question.is_active == 1)
+        if author_id:
+            query = query.filter(Question.author_id == author_id)
+        if cursor:
+            query = query.filter(Question.id < cursor)
+        questions = query.order_by(Question.id.desc()).limit(limit + 1).all()
+
+        has_more = len(questions) > limit
+        questions = questions[:limit]
+        choices = _choices_by_question(db, [question.id for question in questions])
+        return {
+            "questions": [
+                question_to_dict(question, choices[question.id], include_answer=True)
+                for question in questions
+            ],
+            "next_cursor": questions[-1].id if has_more else None,
+        }, 200
+    finally:
+        db.close()
+
+
+def update_question_service(
+    question_id: int, data: dict, user: User
+) -> Tuple[Optional[dict], int]:
+    """
+    Edit one question of the bank
+
+    Only the question row and its choices are rewritten; every exercise that
+    uses the question sees the change.
+    """
+    db = SessionLocal()
+    try:
+        question = db.query(Question).get(question_id)
+        if not question or not question.is_active:
+            return None, 404
+        if not _can_edit(user, question):
+            return None, 403
+
+        current = question_to_dict(question, question.choices, include_answer=True)
+        merged = {
+            "text": data.get("text", current["text"]),
+            "format": data.get("format", current["format"]),
+            "points": data.get("points", current["points"]),
+            "feedback": data.get("feedback", current["feedback"]),
+        }
+        if "choices" in data or "options" in data:
+            merged["choices"] = data.get("choices", data.get("options"))
+            merged["correct_answer"] = data.get("correct_answer")
+        elif "correct_answer" in data:
+            # New answer key for the current options
+            merged["choices"] = [choice["text"] for choice in current["choices"]]
+            merged["correct_answer"] = data["correct_answer"]
+        else:
+            merged["choices"] = current["choices"]
+            merged["correct_answer"] = current["correct_answer"]
+        fields = parse_question(merged)
+
+        question.text = fields["text"]
+        question.format = fields["format"]
+        question.points = fields["points"]
+        question.correct_answer = fields["correct_answer"]
+        question.feedback = fields["feedback"]
+        question.choices = [Choice(**choice) for choice in fields["choices"]]
+        db.commit()
+        db.refresh(question)
+        return question_to_dict(question, question.choices, include_answer=True), 200
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def is_practice_question(db, question_id: int) -> bool:
+    """
+    Whether a question is only in closed exercises: it belongs to at least one
+    active exercise, and every active exercise it belongs to is past its due
+    date
+    """
+    due_dates = (
+        db.query(Exercise.due_date)
+        .join(ExerciseQuestion, Exercise.id == ExerciseQuestion.exercise_id)
+        .filter(ExerciseQuestion.question_id == question_id, Exercise.is_active == 1)
+        .all()
+    )
+    now = datetime.utcnow()
+    return bool(due_dates) and all(
+        due_date is not None and due_date <= now for (due_date,) in due_dates
+    )
+
+
+def check_answer_service(
+    question_id: int, answer, staff: bool = False
+) -> Tuple[Optional[dict], int]:
+    """
+    Grade the answer to a single question
+
+    Students can only check practice questions, the ones whose exercises are
+    all closed: a question of an open exercise (or of an attempt in progress,
+    whose deadline is never after the due date), or one a teacher is still
+    drafting outside any exercise, would give them its answer key, so it is a
+    403.
+    """
+    db = SessionLocal()
+    try:
+        question = (
+            db.query(Question.id, Question.correct_answer, Question.feedback)
+            .filter(Question.id == question_id, Question.is_active == 1)
+            .first()
+        )
+        if not question:
+            return None, 404
+        if not staff and not is_practice_question(db, question.id):
+            return None, 403
+        choices = _choices_by_question(db, [question.id])[question.id]
+        correct = is_correct_answer(question, choices, answer)
+        return {"question_id": question.id, "correct": correct}, 200
+    finally:
+        db.close()
+
+
+def add_exercise_questions(
+    db, exercise_id: int, question_ids: List[int], position: Optional[int] = None
+):
+    """
+    Insert questions in an exercise at a 1-based position (default: the end)
+
+    The questions after the position are moved down with one UPDATE.
+    """
+    last = (
+        db.query(func.max(ExerciseQuestion.position))
+        .filter(ExerciseQuestion.exercise_id == exercise_id)
+        .scalar()
+        or 0
+    )
+    if position is None or position > last:
+        position = last + 1
+    position = max(position, 1)
+
+    if position <= last:
+        db.query(ExerciseQuestion).filter(
+            ExerciseQuestion.exercise_id == exercise_id,
+            ExerciseQuestion.position >= position,
+        ).update(
+            {ExerciseQuestion.position: ExerciseQuestion.position + len(question_ids)},
+            synchronize_session=False,
+        )
+    for offset, question_id in enumerate(question_ids):
+        db.add(
+            ExerciseQuestion(
+                exercise_id=exercise_id,
+                question_id=question_id,
+                position=position + offset,
+            )
+        )
+
+
+def get_exercise_questions_service(
+    exercise_id: int,
+    page: int = 1,
+    per_page: int = DEFAULT_PAGE_SIZE,
+    include_answer: bool = False,
+) -> Tuple[Optional[dict], int]:
+    """
+    Get one page of the questions of an exercise, in order
+
+    Only the questions of the page and their choices are read, through the
+    (exercise_id, position) and (question_id, position) indexes. Students
+    (without the answer key) get a 403 until the exercise is available.
+    """
+    db = SessionLocal()
+    try:
+        exercise = (
+            db.query(Exercise.id, Exercise.is_active, Exercise.available_from)
+            .filter(Exercise.id == exercise_id)
+            .first()
+        )
+        if not exercise or not exercise.is_active:
+            return None, 404
+        if (
+            not include_answer
+            and exercise.available_from
+            and datetime.utcnow() < exercise.available_from
+        ):
+            return None, 403
+
+        total = (
+            db.query(func.count(ExerciseQuestion.id))
+            .filter(ExerciseQuestion.exercise_id == exercise_id)
+            .scalar()
+        )
+        rows = (
+            db.query(ExerciseQuestion.position, Question)
+            .join(Question, ExerciseQuestion.question_id == Question.id)
+            .filter(ExerciseQuestion.exercise_id == exercise_id)
+            .order_by(ExerciseQuestion.position)
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
+        choices = _choices_by_question(db, [question.id for _, question in rows])
+
+        items = []
+        for position, question in rows:
+            item = question_to_dict(question, choices[question.id], include_answer)
+            item["position"] = position
+            items.append(item)
+        return {
+            "questions": items,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+        }, 200
+    finally:
+        db.close()
+
+
+def add_exercise_question_service(
+    exercise_id: int, data: dict, user: User
+) -> Tuple[Optional[dict], int]:
+    """
+    Add a question to an exercise
+
+    data has "question_id" to reuse a question of the bank, or the fields of a
+    new question. "position" (1-based) inserts it before the question in that
+    position; by default it is added at the end.
+    """
+    fields = None if data.get("question_id") else parse_question(data)
+    db = SessionLocal()
+    try:
+        exercise = db.query(Exercise).get(exercise_id)
+        if not exercise or not exercise.is_active:
+            return None, 404
+        if user.role != UserRole.ADMIN and exercise.author_id != user.id:
+            return None, 403
+
+        if fields is None:
+            question = db.query(Question).get(data["question_id"])
+            if not question or not question.is_active:
+                return None, 404
+            exists = (
+                db.query(ExerciseQuestion.id)
+                .filter_by(exercise_id=exercise_id, question_id=question.id)
+                .first()
+            )
+            if exists:
+                return None, 409
+        else:
+            question = build_question(fields, user.id)
+            db.add(question)
+            db.flush()
+
+        add_exercise_questions(db, exercise_id, [question.id], data.get("position"))
+        db.commit()
+        db.refresh(question)
+        return question_to_dict(question, question.choices, include_answer=True), 201
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def remove_exercise_question_service(
+    exercise_id: int, question_id: int, user: User
+) -> Tuple[Optional[dict], int]:
+    """Remove a question from an exercise (it stays in the bank)"""
+    db = SessionLocal()
+    try:
+        exercise = db.query(Exercise).get(exercise_id)
+        if not exercise or not exercise.is_active:
+            return None, 404
+        if user.role != UserRole.ADMIN and exercise.author_id != user.id:
+            return None, 403
+
+        link = (
+            db.query(ExerciseQuestion)
+            .filter_by(exercise_id=exercise_id, question_id=question_id)
+            .first()
+        )
+        if not link:
+            return None, 404
+
+        position = link.position
+        db.delete(link)
+        db.flush()
+        db.query(ExerciseQuestion).filter(
+            ExerciseQuestion.exercise_id == exercise_id,
+            ExerciseQuestion.position > position,
+        ).update(
+            {ExerciseQuestion.position: ExerciseQuestion.position - 1},
+            synchronize_session=False,
+        )
+        db.commit()
+        return {"message": "Question removed from exercise"}, 200
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def reorder_exercise_questions_service(
+    exercise_id: int, question_ids: List[int], user: User
+) -> Tuple[Optional[dict], int]:
+    """Set the order of the questions of an exercise"""
+    db = SessionLocal()
+    try:
+        exercise = db.query(Exercise).get(exercise_id)
+        if not exercise or not exercise.is_active:
+            return None, 404
+        if user.role != UserRole.ADMIN and exercise.author_id != user.id:
+            return None, 403
+
+        links = {
+            link.question_id: link
+            for link in db.query(ExerciseQuestion).filter_by(exercise_id=exercise_id)
+        }
+        if sorted(links) != sorted(question_ids):
+            return None, 400
+
+        for position, question_id in enumerate(question_ids, start=1):
+            links[question_id].position = position
+        db.commit()
+        return {"question_ids": question_ids}, 200
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class LegacyQuestion(NamedTuple):
+    """Answer key of a question still in the exercises.questions JSON"""
+
+    id: str
+    points: int
+    correct_answer: Any
+
+
+def _legacy_answer_key(db, exercise_id: int) -> Tuple[list, Dict[str, list]]:
+    """
+    Answer key of an exercise not moved to the bank yet (see
+    split_exercise_questions), graded as before the bank: answers keyed like
+    the JSON (its keys, or positions from 0 for a list), compared with
+    correct_answer, one point each
+    """
+    blob = db.query(Exercise.questions).filter(Exercise.id == exercise_id).scalar()
+    items = blob.items() if isinstance(blob, dict) else enumerate(blob or [])
+    questions = [
+        LegacyQuestion(str(key), 1, item.get("correct_answer"))
+        for key, item in items
+        if isinstance(item, dict)
+    ]
+    return questions, {question.id: [] for question in questions}
+
+
+def load_answer_key(db, exercise_id: int) -> Tuple[list, Dict[int, list]]:
+    """
+    Answer key of an exercise: its questions (id, points, correct_answer) and
+    their choices by question id, with one query for each
+
+    Exercises without questions in the bank fall back to their questions JSON.
+    """
+    questions = (
+        db.query(Question.id, Question.points, Question.correct_answer)
+        .join(ExerciseQuestion, ExerciseQuestion.question_id == Question.id)
+        .filter(ExerciseQuestion.exercise_id == exercise_id)
+        .all()
+    )
+    if not questions:
+        return _legacy_answer_key(db, exercise_id)
+    choices: Dict[int, list] = {question.id: [] for question in questions}
+    if questions:
+        rows = (
+            db.query(Choice.question_id, Choice.position, Choice.text, Choice.is_correct)
+            .join(ExerciseQuestion, ExerciseQuestion.question_id == Choice.question_id)
+            .filter(ExerciseQuestion.exercise_id == exercise_id)
+            .all()
+        )
+        for row in rows:
+            choices[row.question_id].append(row)
+    return questions, choices
+
+
+def score_answers(answer_key: Tuple[list, Dict[int, list]], answers: dict) -> Tuple[float, int]:
+    """
+    Grade answers keyed by question id against an answer key from load_answer_key
+
+    Returns:
+        tuple: (score from 0 to 100 weighted by points, correct answers)
+    """
+    questions, choices = answer_key
+    total_points = sum(question.points for question in questions)
+    earned = 0.0
+    correct_answers = 0
+    for question in questions:
+        key = str(question.id)
+        if key in answers and is_correct_answer(
+            question, choices[question.id], answers[key]
+        ):
+            earned += question.points
+            correct_answers += 1
+
+    score = (earned / total_points) * 100 if total_points else 0.0
+    return score, correct_answers
+
+
+def grade_exercise_answers(db, exercise_id: int, answers: dict) -> Tuple[float, int]:
+    """
+    Grade the answers to an exercise, keyed by question id (or by the keys of
+    the questions JSON for exercises not moved to the bank yet)
+
+    Only the answer keys are read (no question text): one query for the
+    questions of the exercise and one for their choices.
+
+    Returns:
+        tuple: (score from 0 to 100 weighted by points, correct answers)
+    """
+    return score_answers(load_answer_key(db, exercise_id), answers)
+
+
+def split_exercise_questions(progress=None) -> dict:
+    """
+    Move the questions JSON of every exercise to the question bank
+
+    Each question becomes a Question (with its choices) authored by the author
+    of the exercise and linked in the order of the JSON. The blob is emptied
+    once the exercise is split, so running it again only processes exercises
+    created before it.
+
+    Returns:
+        dict: Number of exercises split, questions created and failures
+    """
+    db = SessionLocal()
+    try:
+        exercise_ids = [
+            exercise_id
+            for (exercise_id,) in db.query(Exercise.id)
+            .filter(Exercise.questions.isnot(None))
+            .order_by(Exercise.id)
+        ]
+
+        created = 0
+        failed = []
+        for index, exercise_id in enumerate(exercise_ids, start=1):
+            exercise = db.query(Exercise).get(exercise_id)
+            questions = exercise.questions
+            items = questions.values() if isinstance(questions, dict) else questions
+            try:
+                fields = [parse_question(item) for item in items or []]
+            except ValueError:
+                failed.append(exercise_id)
+                continue
+
+            new_questions = [build_question(item, exercise.author_id) for item in fields]
+            db.add_all(new_questions)
+            db.flush()
+            add_exercise_questions(
+                db, exercise_id, [question.id for question in new_questions]
+            )
+            exercise.questions = None
+            created += len(new_questions)
+
+            if index % SPLIT_BATCH_SIZE == 0:
+                db.commit()
+                db.expunge_all()
+            if progress:
+                progress(index * 100 // len(exercise_ids))
+
+        db.commit()
+        return {
+            "exercises": len(exercise_ids) - len(failed),
+            "questions": created,
+            "failed": failed,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
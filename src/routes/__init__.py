@@ -5,7 +5,13 @@ from src.admin.router import admin_bp
 from src.assignments.router import assignments_bp
 from src.documents.router import documents_bp
 from src.exercises.router import exercises_bp
+from src.questions.router import questions_bp
 from src.courses.router import courses_bp
+from src.files.router import files_bp
+from src.jobs.router import jobs_bp
+from src.class_views.router import class_views_bp
+from src.due_work.router import due_work_bp
+from src.attempts.router import attempts_bp
 
 # from src.academic.router import academic_bp
 from src.subject.router import subjects_bp
@@ -19,6 +25,12 @@ def register_blueprints(app):
     app.register_blueprint(assignments_bp)
     app.register_blueprint(documents_bp)
     app.register_blueprint(exercises_bp)
+    app.register_blueprint(questions_bp)
     app.register_blueprint(courses_bp)
+    app.register_blueprint(files_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(class_views_bp)
+    app.register_blueprint(due_work_bp)
+    app.register_blueprint(attempts_bp)
     # app.register_blueprint(academic_bp)
     app.register_blueprint(subjects_bp)
@@ -0,0 +1,100 @@
+// User Typeahead JavaScript
+// <input data-user-typeahead data-role="teacher" data-target="teacher_id">
+// Busca en /users/search mientras se escribe y guarda el id elegido en el input oculto data-target
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-user-typeahead]').forEach(initializeUserTypeahead);
+});
+
+function initializeUserTypeahead(input) {
+    const hidden = document.getElementById(input.dataset.target);
+    const role = input.dataset.role || '';
+    const searchUrl = input.dataset.url || '/users/search';
+    let controller = null;
+    let timer = null;
+
+    const menu = document.createElement('div');
+    menu.className = 'list-group position-absolute w-100 shadow-sm d-none';
+    menu.style.zIndex = 1056;
+    input.parentNode.classList.add('position-relative');
+    input.parentNode.appendChild(menu);
+
+    function select(user) {
+        input.value = user.full_name || user.username;
+        hidden.value = user.id;
+        input.setCustomValidity('');
+        hideMenu();
+    }
+
+    function hideMenu() {
+        menu.classList.add('d-none');
+        menu.innerHTML = '';
+    }
+
+    function render(users) {
+        menu.innerHTML = '';
+        if (users.length === 0) {
+            const empty = document.createElement('div');
+            empty.className = 'list-group-item text-muted';
+            empty.textContent = 'Sin resultados';
+            menu.appendChild(empty);
+        }
+        users.forEach(user => {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'list-group-item list-group-item-action';
+            item.textContent = `${user.full_name || user.username} · ${user.document}`;
+            item.addEventListener('mousedown', event => {
+                event.preventDefault();
+                select(user);
+            });
+            menu.appendChild(item);
+        });
+        menu.classList.remove('d-none');
+    }
+
+    function search() {
+        const query = input.value.trim();
+        if (!query) {
+            hideMenu();
+            return;
+        }
+        if (controller) {
+            controller.abort();
+        }
+        controller = new AbortController();
+        const params = new URLSearchParams({ q: query, limit: 10 });
+        if (role) {
+            params.append('role', role);
+        }
+        fetch(`${searchUrl}?${params}`, { credentials: 'same-origin', signal: controller.signal })
+            .then(response => response.json())
+            .then(data => render((data.data && data.data.items) || []))
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error searching users:', error);
+                }
+            });
+    }
+
+    // Mientras no se elija un usuario de la lista el campo no es válido
+    if (!hidden.value) {
+        input.setCustomValidity('Seleccione un usuario de la lista');
+    }
+
+    input.addEventListener('input', function() {
+        hidden.value = '';
+        input.setCustomValidity('Seleccione un usuario de la lista');
+        clearTimeout(timer);
+        timer = setTimeout(search, 150);
+    });
+    input.addEventListener('keydown', function(event) {
+        const first = menu.querySelector('button');
+        if (event.key === 'Enter' && first && !menu.classList.contains('d-none')) {
+            event.preventDefault();
+            first.dispatchEvent(new MouseEvent('mousedown'));
+        } else if (event.key === 'Escape') {
+            hideMenu();
+        }
+    });
+    input.addEventListener('blur', hideMenu);
+}
@@ -27,7 +27,7 @@ def get_subjects_api_controller(request: Request) -> Response | Tuple[list, int]
         subjects, total = get_subjects_service(teacher_id=teacher_id)
 
         return ApiResponse.list_response(
-            items=[subject.dict() for subject in subjects],
+            items=subjects,
             total=total,
         )
     except Exception as e:
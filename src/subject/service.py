@@ -1,6 +1,8 @@
+from datetime import datetime
 from typing import List, Optional, Tuple
 
 from flask import Request
+from sqlalchemy import select
 
 from src.database.database import SessionLocal
 from src.models.course import Course
@@ -17,28 +19,30 @@ from .validation import (
 
 def get_subjects_service(
     teacher_id: Optional[int] = None,
-) -> Tuple[List[SubjectResponseSchema], int]:
-    """Obtener lista de materias con filtros opcionales"""
+) -> Tuple[List[dict], int]:
+    """Obtener lista de materias con filtros opcionales (dicts con los campos de SubjectResponseSchema)"""
     db = SessionLocal()
     try:
-        query = db.query(Subject)
+        query = select(
+            Subject.id, Subject.name, Subject.teacher_id, Subject.created_at, Subject.updated_at
+        )
 
         # Aplicar filtros
         if teacher_id:
-            query = query.filter(Subject.teacher_id == teacher_id)
+            query = query.where(Subject.teacher_id == teacher_id)
 
-        subjects = query.order_by(Subject.name).all()
+        rows = db.execute(query.order_by(Subject.name)).all()
 
         return [
-            SubjectResponseSchema(
-                id=subject.id,
-                name=subject.name,
-                teacher_id=subject.teacher_id,
-                created_at=subject.created_at,
-                updated_at=subject.updated_at,
-            )
-            for subject in subjects
-        ], len(subjects)
+            {
+                "id": subject_id,
+                "name": name,
+                "teacher_id": subject_teacher_id,
+                "created_at": created_at,
+                "updated_at": updated_at,
+            }
+            for subject_id, name, subject_teacher_id, created_at, updated_at in rows
+        ], len(rows)
     finally:
         db.close()
 
@@ -170,6 +174,13 @@ def delete_subject_service(
         for course_subject in course_subjects:
             db.delete(course_subject)
 
+        # The courses change too (their cached pages are keyed on updated_at)
+        course_ids = {course_subject.course_id for course_subject in course_subjects}
+        if course_ids:
+            db.query(Course).filter(Course.id.in_(course_ids)).update(
+                {Course.updated_at: datetime.utcnow()}, synchronize_session=False
+            )
+
         # Then delete the subject itself
         db.delete(subject)
         db.commit()
@@ -182,20 +193,20 @@ def delete_subject_service(
         db.close()
 
 
-def get_teachers_for_form_service() -> List[dict]:
-    """Obtener lista de profesores para formularios"""
+def get_teacher_for_form_service(teacher_id: Optional[int]) -> Optional[dict]:
+    """Obtener el profesor seleccionado en un formulario (el resto se busca con /users/search)"""
+    if not teacher_id:
+        return None
     db = SessionLocal()
     try:
-        teachers = (
+        t = (
             db.query(User)
-            .filter(User.role == UserRole.TEACHER)
-            .order_by(User.full_name, User.username)
-            .all()
+            .filter(User.id == teacher_id, User.role == UserRole.TEACHER)
+            .first()
         )
-        return [
-            {"id": t.id, "name": (t.full_name or t.username or f"Profesor {t.id}")}
-            for t in teachers
-        ]
+        if not t:
+            return None
+        return {"id": t.id, "name": (t.full_name or t.username or f"Profesor {t.id}")}
     finally:
         db.close()
 
@@ -209,13 +220,13 @@ def get_course_by_id_service(course_id: int) -> Optional[Course]:
         db.close()
 
 
-def get_subject_with_teachers_service(
+def get_subject_with_teacher_service(
     subject_id: int, request: Request
-) -> Tuple[Optional[SubjectResponseSchema], List[dict], int]:
-    """Obtener una materia con la lista de profesores para formularios"""
+) -> Tuple[Optional[SubjectResponseSchema], Optional[dict], int]:
+    """Obtener una materia con su profesor para formularios"""
     subject, status_code = get_subject_service(subject_id, request)
     if status_code != 200:
-        return None, [], status_code
+        return None, None, status_code
 
-    teachers = get_teachers_for_form_service()
-    return subject, teachers, 200
+    teacher = get_teacher_for_form_service(subject.teacher_id)
+    return subject, teacher, 200
@@ -10,8 +10,8 @@ from .service import (
     delete_subject_service,
     get_course_by_id_service,
     get_subject_service,
-    get_subject_with_teachers_service,
-    get_teachers_for_form_service,
+    get_subject_with_teacher_service,
+    get_teacher_for_form_service,
     update_subject_service,
 )
 from .validation import SubjectCreateSchema, SubjectUpdateSchema
@@ -29,13 +29,11 @@ def create_subject_controller(request: Request) -> Response:
             else None
         )
 
-        # Load teachers list and course info from service
-        teachers = get_teachers_for_form_service()
+        # Load course info from service (teachers are searched from the form)
         course = get_course_by_id_service(course_id) if course_id else None
 
         return render_template(
             "admin/create_subject.html",
-            teachers=teachers,
             course=course,
             course_id=course_id,
         )
@@ -79,23 +77,21 @@ def create_subject_controller(request: Request) -> Response:
             flash("Error al crear la materia", "danger")
 
         # Re-load form data for error display
-        teachers = get_teachers_for_form_service()
+        teacher = get_teacher_for_form_service(validated.teacher_id)
         course = get_course_by_id_service(course_id) if course_id else None
         return render_template(
             "admin/create_subject.html",
-            teachers=teachers,
+            teacher=teacher,
             course=course,
             course_id=course_id,
         )
 
     except ValidationError as e:
         flash(f"Datos inválidos: {str(e)}", "danger")
-        teachers = get_teachers_for_form_service()
-        return render_template("admin/create_subject.html", teachers=teachers)
+        return render_template("admin/create_subject.html")
     except Exception as e:
         flash(f"Error interno: {str(e)}", "danger")
-        teachers = get_teachers_for_form_service()
-        return render_template("admin/create_subject.html", teachers=teachers)
+        return render_template("admin/create_subject.html")
 
 
 @jwt_required()
@@ -104,7 +100,7 @@ def edit_subject_controller(subject_id: int, request: Request) -> Response:
     """View to edit a subject"""
     if request.method == "GET":
         try:
-            subject, teachers, status_code = get_subject_with_teachers_service(
+            subject, teacher, status_code = get_subject_with_teacher_service(
                 subject_id, request
             )
             if status_code == 404:
@@ -112,7 +108,7 @@ def edit_subject_controller(subject_id: int, request: Request) -> Response:
                 return redirect(url_for("courses.courses_management"))
 
             return render_template(
-                "admin/edit_subject.html", subject=subject, teachers=teachers
+                "admin/edit_subject.html", subject=subject, teacher=teacher
             )
         except Exception as e:
             flash(f"Error al cargar la materia: {str(e)}", "danger")
@@ -144,23 +140,29 @@ def edit_subject_controller(subject_id: int, request: Request) -> Response:
         else:
             flash("Error al actualizar la materia", "danger")
 
-        # Load teachers for the form
-        teachers = get_teachers_for_form_service()
+        # Load the selected teacher for the form
+        teacher = get_teacher_for_form_service(
+            subject_data.teacher_id if subject_data else None
+        )
         return render_template(
-            "admin/edit_subject.html", subject=result, teachers=teachers
+            "admin/edit_subject.html", subject=result, teacher=teacher
         )
 
     except ValidationError as e:
         flash(f"Datos inválidos: {str(e)}", "danger")
-        teachers = get_teachers_for_form_service()
+        teacher = get_teacher_for_form_service(
+            subject_data.teacher_id if subject_data else None
+        )
         return render_template(
-            "admin/edit_subject.html", subject=subject_data, teachers=teachers
+            "admin/edit_subject.html", subject=subject_data, teacher=teacher
         )
     except Exception as e:
         flash(f"Error interno: {str(e)}", "danger")
-        teachers = get_teachers_for_form_service()
+        teacher = get_teacher_for_form_service(
+            subject_data.teacher_id if subject_data else None
+        )
         return render_template(
-            "admin/edit_subject.html", subject=subject_data, teachers=teachers
+            "admin/edit_subject.html", subject=subject_data, teacher=teacher
         )
 
 
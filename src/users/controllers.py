@@ -17,6 +17,7 @@ from .service import (
     get_users_service,
     update_user_service,
 )
+from .search import user_index
 from .validation import UserCreateSchema, UserResponseSchema, UserUpdateSchema
 
 
@@ -27,7 +28,7 @@ def get_users_controller(request: Request) -> Response | Tuple[list, int]:
         # Solo obtener usuarios con rol TEACHER
         users, total = get_users_service(role=UserRole.TEACHER)
         return ApiResponse.list_response(
-            items=[user.dict() for user in users],
+            items=users,
             total=total,
         )
     except Exception as e:
@@ -38,6 +39,30 @@ def get_users_controller(request: Request) -> Response | Tuple[list, int]:
         )
 
 
+@jwt_required()
+@role_required([UserRole.ADMIN])
+def search_users_controller(request: Request) -> Response | Tuple[list, int]:
+    """Búsqueda por prefijo (typeahead) de usuarios por usuario, nombre o documento"""
+    try:
+        role = request.args.get("role")
+        if role and role not in [r.value for r in UserRole]:
+            return ApiResponse.error(message="Rol inválido", status_code=400)
+
+        # active=1 (por defecto) solo activos, active=0 solo inactivos, active=all ambos
+        active = request.args.get("active", "1")
+        is_active = None if active == "all" else active not in ("0", "false")
+
+        limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+        users = user_index.search(
+            request.args.get("q", ""), role=role, is_active=is_active, limit=limit
+        )
+        return ApiResponse.list_response(items=users, total=len(users), per_page=limit)
+    except Exception as e:
+        return ApiResponse.error(
+            message="Error al buscar usuarios", details=str(e), status_code=500
+        )
+
+
 @jwt_required()
 def get_user_controller(
     user_id: int, request: Request
@@ -1,6 +1,7 @@
 from flask import Blueprint, request
 from .controllers import (
     get_users_controller,
+    search_users_controller,
     get_user_controller,
     create_user_controller,
     update_user_controller,
@@ -21,6 +22,11 @@ def get_users():
     return get_users_controller(request)
 
 
+@users_bp.route("/search", methods=["GET"])
+def search_users():
+    return search_users_controller(request)
+
+
 @users_bp.route("/<int:user_id>", methods=["GET"])
 def get_user(user_id):
     return get_user_controller(user_id, request)
@@ -0,0 +1,232 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.database.database import SessionLocal
+from src.models.user import User, UserRole
+from src.utils.text_utils import fold
+
+# Seconds between checks for users changed by other workers
+SYNC_INTERVAL = 2.0
+BUILD_BATCH_SIZE = 1000
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def user_keys(username: str, full_name: Optional[str], document: str) -> List[str]:
+    """Searchable keys of a user: each word of the username, document and name"""
+    keys = set()
+    for value in (username, document, full_name):
+        keys.update(TOKEN_RE.findall(fold(value or "")))
+    return sorted(keys)
+
+
+class UserPrefixIndex:
+    """
+    Sorted prefix index of users for typeahead searches
+
+    Every key of a user is stored as (key, user_id) in a sorted list, so the
+    users whose key starts with a prefix are a contiguous range found with
+    bisect. Users changed in this process are updated directly, and changes
+    made by other workers are picked up through users.updated_at.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Only one build or sync reads the database at a time
+        self._sync_lock = threading.Lock()
+        self._entries: List[Tuple[str, int]] = []
+        self._users: Dict[int, dict] = {}
+        self._built = False
+        self._watermark: Optional[datetime] = None
+        self._last_sync = 0.0
+
+    def _add(self, user: dict, sort: bool = True):
+        self._remove(user["id"])
+        user["keys"] = user_keys(user["username"], user["full_name"], user["document"])
+        self._users[user["id"]] = user
+        for key in user["keys"]:
+            if sort:
+                insort(self._entries, (key, user["id"]))
+            else:
+                self._entries.append((key, user["id"]))
+
+    def _remove(self, user_id: int):
+        user = self._users.pop(user_id, None)
+        if user is None:
+            return
+        for key in user["keys"]:
+            index = bisect_left(self._entries, (key, user_id))
+            if index < len(self._entries) and self._entries[index] == (key, user_id):
+                del self._entries[index]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        # "\uffff" sorts after any character, so it closes the prefix range
+        return (
+            bisect_left(self._entries, (prefix, -1)),
+            bisect_left(self._entries, (prefix + "\uffff", -1)),
+        )
+
+    def add(self, user: User):
+        """Index (or re-index) a user"""
+        with self._lock:
+            if self._built:
+                self._add(self._user_to_entry(user))
+
+    def remove(self, user_id: int):
+        """Remove a user from the index"""
+        with self._lock:
+            self._remove(user_id)
+
+    @staticmethod
+    def _user_to_entry(user) -> dict:
+        return {
+            "id": user.id,
+            "username": user.username,
+            "full_name": user.full_name,
+            "document": user.document,
+            "role": user.role.value if isinstance(user.role, UserRole) else user.role,
+            "is_active": bool(user.is_active),
+        }
+
+    def _read(self, watermark: Optional[datetime], apply) -> Optional[datetime]:
+        """
+        Read the users (or those changed since the watermark) and pass their
+        entries to apply
+
+        Returns:
+            The new watermark
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(
+                User.id,
+                User.username,
+                User.full_name,
+                User.document,
+                User.role,
+                User.is_active,
+                User.updated_at,
+            )
+            if watermark is not None:
+                # >= because updated_at may have a resolution of one second
+                query = query.filter(User.updated_at >= watermark)
+
+            for user in query.yield_per(BUILD_BATCH_SIZE):
+                apply(self._user_to_entry(user))
+                if user.updated_at and (watermark is None or user.updated_at > watermark):
+                    watermark = user.updated_at
+            return watermark
+        finally:
+            db.close()
+
+    def _due(self) -> bool:
+        return not self._built or time.monotonic() - self._last_sync >= SYNC_INTERVAL
+
+    def sync(self, force: bool = False, wait: bool = True):
+        """
+        Build the index or apply the users changed since the last sync
+
+        The database is read without holding the index lock, which is only
+        taken to apply the result. With wait=False the call returns at once
+        when another build or sync is in progress, and the current index is
+        used.
+        """
+        if not force and not self._due():
+            return
+        if not self._sync_lock.acquire(blocking=wait):
+            return
+        try:
+            if not force and not self._due():
+                return
+
+            if not self._built:
+                # Built apart and swapped in; the first build appends the keys
+                # and sorts them once at the end. The changes made meanwhile
+                # have updated_at >= the watermark and are applied next sync
+                fresh = UserPrefixIndex()
+                watermark = self._read(None, lambda user: fresh._add(user, sort=False))
+                fresh._entries.sort()
+                with self._lock:
+                    self._entries = fresh._entries
+                    self._users = fresh._users
+                    self._watermark = watermark
+                    self._built = True
+            else:
+                changes: List[dict] = []
+                watermark = self._read(self._watermark, changes.append)
+                with self._lock:
+                    for user in changes:
+                        self._add(user)
+                    self._watermark = watermark
+
+            self._last_sync = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def search(
+        self,
+        query: str,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = True,
+        limit: int = 10,
+    ) -> List[dict]:
+        """
+        Find the users whose keys start with every word of the query
+
+        The narrowest prefix range is scanned in key order and the other words
+        are checked against the keys of each candidate, so a search costs the
+        bisect plus the candidates skipped until `limit` users are found.
+
+        Args:
+            query: Text typed by the user
+            role: Only users with this role ('student', 'teacher', 'admin')
+            is_active: Only active (True) or inactive (False) users, None for both
+            limit: Maximum number of users returned
+
+        Returns:
+            list: Matching users
+        """
+        # Only the first build is waited for, later syncs are skipped while
+        # another thread runs one
+        self.sync(wait=not self._built)
+        words = TOKEN_RE.findall(fold(query or ""))
+        if not words:
+            return []
+
+        with self._lock:
+            ranges = sorted(
+                ((self._range(word), word) for word in words),
+                key=lambda item: item[0][1] - item[0][0],
+            )
+            (start, end), _ = ranges[0]
+            others = [word for _, word in ranges[1:]]
+
+            results = []
+            seen = set()
+            for index in range(start, end):
+                user_id = self._entries[index][1]
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+
+                user = self._users[user_id]
+                if role and user["role"] != role:
+                    continue
+                if is_active is not None and user["is_active"] != is_active:
+                    continue
+                if not all(
+                    any(key.startswith(word) for key in user["keys"]) for word in others
+                ):
+                    continue
+
+                results.append({k: v for k, v in user.items() if k != "keys"})
+                if len(results) >= limit:
+                    break
+            return results
+
+
+user_index = UserPrefixIndex()
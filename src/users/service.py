@@ -1,39 +1,71 @@
+from datetime import datetime
 from flask import Request
 from typing import List, Optional, Tuple
 
+from sqlalchemy import func, select
+
 # from sqlalchemy.orm import Session
 from src.database.database import SessionLocal
 from src.models.user import User, UserRole
+from src.utils.user_cache import invalidate_user_caches
 from werkzeug.security import generate_password_hash
+from .search import user_index
 from .validation import UserCreateSchema, UserUpdateSchema, UserResponseSchema
 
 
 def get_users_service(
     role: Optional[UserRole] = None,
-) -> Tuple[List[UserResponseSchema], int]:
+) -> Tuple[List[dict], int]:
+    """
+    Active users as dicts with the fields of UserResponseSchema
+
+    Lists are read as plain rows (no ORM objects) and the dicts are built
+    from them directly, without a pydantic model per row.
+    """
     db = SessionLocal()
     try:
-        query = db.query(User)
-
-        # Only active users
-        query = query.filter(User.is_active == 1)
+        query = select(
+            User.id, User.username, User.document, User.full_name, User.role
+        ).where(User.is_active == 1)
 
         if role:
-            query = query.filter(User.role == role)
+            query = query.where(User.role == role)
 
-        users = query.all()
+        rows = db.execute(query).all()
 
         return [
-            UserResponseSchema(
-                id=user.id,
-                username=user.username,
-                document=user.document,
-                full_name=user.full_name,
-                role=user.role.value,
-                is_active=bool(user.is_active),
-            )
-            for user in users
-        ], len(users)
+            {
+                "id": user_id,
+                "username": username,
+                "document": document,
+                "full_name": full_name,
+                "role": user_role.value,
+                "is_active": True,
+            }
+            for user_id, username, document, full_name, user_role in rows
+        ], len(rows)
+    finally:
+        db.close()
+
+
+def get_users_version_service(
+    role: Optional[UserRole] = None,
+) -> Tuple[int, Optional[datetime]]:
+    """
+    Count and last updated_at of the active users, a cheap version of the
+    list of get_users_service to key its cached fragments on
+    """
+    db = SessionLocal()
+    try:
+        query = select(func.count(User.id), func.max(User.updated_at)).where(
+            User.is_active == 1
+        )
+
+        if role:
+            query = query.where(User.role == role)
+
+        total, last_updated = db.execute(query).one()
+        return total, last_updated
     finally:
         db.close()
 
@@ -85,6 +117,7 @@ def create_user_service(
         db.add(user)
         db.commit()
         db.refresh(user)
+        user_index.add(user)
 
         # Convertir el usuario a UserResponseSchema antes de retornarlo
         user_response = UserResponseSchema(
@@ -148,6 +181,8 @@ def update_user_service(
 
         db.commit()
         db.refresh(user)
+        user_index.add(user)
+        invalidate_user_caches(user.id)
 
         return (
             UserResponseSchema(
@@ -177,6 +212,8 @@ def delete_user_service(user_id: int, request: Request) -> Tuple[Optional[dict],
         # Soft delete: mark as inactive to avoid FK constraint issues
         user.is_active = 0
         db.commit()
+        user_index.add(user)
+        invalidate_user_caches(user.id)
 
         return {"message": "User deleted successfully"}, 200
     except Exception:
@@ -10,6 +10,7 @@ from .service import (
     delete_user_service,
     get_user_service,
     get_users_service,
+    get_users_version_service,
     update_user_service,
 )
 from .validation import UserCreateSchema, UserUpdateSchema
@@ -21,13 +22,22 @@ from .validation import UserCreateSchema, UserUpdateSchema
 def teachers_management_controller(request: Request) -> Response:
     """View to manage teachers"""
     try:
-        users, total = get_users_service(role=UserRole.TEACHER)
+        # The list is only read when its version is not in the fragment cache
+        total, version = get_users_version_service(role=UserRole.TEACHER)
         return render_template(
-            "admin/teachers_management.html", teachers=users, total=total
+            "admin/teachers_management.html",
+            teachers_version=(total, version),
+            load_teachers=lambda: get_users_service(role=UserRole.TEACHER)[0],
+            total=total,
         )
     except Exception as e:
         flash(f"Error al cargar la lista de docentes: {str(e)}", "danger")
-        return render_template("admin/teachers_management.html", teachers=[], total=0)
+        return render_template(
+            "admin/teachers_management.html",
+            teachers_version=None,
+            load_teachers=list,
+            total=0,
+        )
 
 
 @jwt_required()
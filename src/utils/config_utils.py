@@ -7,11 +7,14 @@ from azure.storage.blob import BlobServiceClient
 from werkzeug.utils import secure_filename
 
 from app.utils.responses import Response
+from src.utils.file_utils import stream_to_disk
 
 # load environment variables
 load_dotenv('../../.env')
 
 directory_local = 'recursos'
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB -> MB to KB -> KB to Bytes
+MULTIPART_OVERHEAD = 64 * 1024  # Room for the multipart boundaries and other fields
 
 # create one class manege connection with database
 class HelperSie:
@@ -85,6 +88,20 @@ class HelperSie:
             return Response.tuple_response("Error al intentar subir el archivo a Azure Blob Storage", 400)
 
 
+    def upload_bytes_to_azure(self, container_name: str, blob_name: str, data: bytes, content_type: str) -> tuple:
+        """Method to upload content already in memory to Azure Blob Storage with a fixed name"""
+        try:
+            blob_service_client = self.get_blob_service_client_account_key()
+            if blob_service_client[1] != 200:
+                return Response.tuple_response(blob_service_client[0], blob_service_client[1])
+
+            blob_client = blob_service_client[0].get_blob_client(container_name, blob_name)
+            blob_client.upload_blob(data, content_type=content_type, overwrite=True)
+
+            return Response.tuple_response({"url": blob_client.url, "nombre": blob_client.blob_name}, 200)
+        except Exception as e:
+            return Response.tuple_response("Error al intentar subir el archivo a Azure Blob Storage", 400)
+
     def delete_resource_azure(self, container_name: str, name_cheild: str) -> tuple:
         """Method to delete a resource from Azure Blob Storage"""
         try:
@@ -116,11 +133,13 @@ class HelperSie:
             # Define the complete file path
             file_path = path.join(directory_local, filename)
 
-            # Save the file
-            with open(file_path, 'wb') as folder:
-                folder.write(file.read())
+            # Save the file in chunks validating size and type on the fly
+            extension = filename.rsplit('.', 1)[-1].lower()
+            stream_to_disk(file.stream, file_path, extension, MAX_FILE_SIZE)
 
             return Response.tuple_response("File saved successfully", 200)
+        except ValueError as e:
+            return Response.tuple_response(str(e), 400)
         except Exception as e:
             return Response.tuple_response("Error al intentar guardar el archivo", 400)
 
@@ -149,8 +168,12 @@ class HelperSie:
             if not self.extension_file(file.filename):
                 return Response.tuple_response("The file does not have a valid extension", 200)
 
-            # Verify the maximum file size
-            MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB -> MB to KB -> KB to Bytes
+            # Verify the maximum file size with the request headers, before touching the body
+            content_length = getattr(request, "content_length", None)
+            if content_length is not None and content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+                return Response.tuple_response("The file exceeds the maximum allowed size", 200)
+
+            # The upload is spooled to disk, so seeking does not load it in memory
             file.seek(0, 2) # Seek to the end of the file
             file_size = file.tell() # Get the position of EOF
             file.seek(0) # Reset the file position to the beginning
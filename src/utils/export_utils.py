@@ -0,0 +1,111 @@
+import csv
+import io
+import os
+import tempfile
+from typing import Iterable, Iterator, Sequence
+
+from flask import Response
+
+try:
+    import xlsxwriter
+except ImportError:  # XlsxWriter is optional, without it only CSV exports are available
+    xlsxwriter = None
+
+# Rows fetched per round trip when streaming query results
+EXPORT_BATCH_SIZE = 500
+# Bytes buffered before a chunk is sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def available_export_formats() -> list:
+    """Formats that can be exported with the installed libraries"""
+    return [fmt for fmt in EXPORT_MIMETYPES if fmt != "xlsx" or xlsxwriter is not None]
+
+
+def iter_csv(header: Sequence, rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Encode rows as CSV in chunks of about EXPORT_CHUNK_SIZE bytes
+
+    Args:
+        header: Column names
+        rows: Iterable of rows, consumed lazily
+
+    Yields:
+        bytes: Chunks of the CSV file (UTF-8 with BOM so Excel reads the accents)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(header: Sequence, rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Write rows to an XLSX file in constant memory and stream it
+
+    XLSX is a zip file, so it is built in a temporary file (each row is flushed
+    to disk as it is written) and sent once it is complete.
+
+    Args:
+        header: Column names
+        rows: Iterable of rows, consumed lazily
+
+    Yields:
+        bytes: Chunks of the XLSX file
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(tmp_path, {"constant_memory": True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, header)
+        for index, row in enumerate(rows, start=1):
+            worksheet.write_row(index, 0, row)
+        workbook.close()
+
+        with open(tmp_path, "rb") as xlsx_file:
+            while True:
+                chunk = xlsx_file.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(tmp_path)
+
+
+def export_response(
+    filename: str, header: Sequence, rows: Iterable[Sequence], export_format: str = "csv"
+) -> Response:
+    """
+    Build a streamed download response
+
+    Args:
+        filename: Name of the file without extension
+        header: Column names
+        rows: Iterable of rows, consumed while the response is sent
+        export_format: 'csv' or 'xlsx'
+
+    Returns:
+        Response: Response whose body is generated row by row
+    """
+    body = iter_xlsx(header, rows) if export_format == "xlsx" else iter_csv(header, rows)
+    return Response(
+        body,
+        content_type=EXPORT_MIMETYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
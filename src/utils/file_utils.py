@@ -1,12 +1,28 @@
+import hashlib
 import os
 from werkzeug.utils import secure_filename
 import uuid
+from sqlalchemy.exc import IntegrityError
+from src.database.database import SessionLocal
+from src.models.stored_file import StoredFile
+from src.utils.image_utils import delete_local_derivatives
 
 # Directories for file storage
 BOOKS_DIR = "src/static/books"
 COVERS_DIR = "src/static/covers"
+DOCUMENTS_DIR = "src/static/documents"
 os.makedirs(BOOKS_DIR, exist_ok=True)
 os.makedirs(COVERS_DIR, exist_ok=True)
+# Uploads spooled by DiskUploadRequest, on the same file system as the storage
+# folders so a stored upload is linked into place instead of copied
+UPLOADS_TMP_DIR = "src/.uploads"
+os.makedirs(DOCUMENTS_DIR, exist_ok=True)
+os.makedirs(UPLOADS_TMP_DIR, exist_ok=True)
+
+# Size of the blocks read from the upload stream
+CHUNK_SIZE = 64 * 1024
+# Room for the form fields and multipart headers of an upload request
+MULTIPART_OVERHEAD = 64 * 1024
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
@@ -15,6 +31,41 @@ ALLOWED_EXTENSIONS = {
     "document": ["pdf", "doc", "docx"],
 }
 
+# Maximum size in bytes per file type
+MAX_FILE_SIZES = {
+    "book": 16 * 1024 * 1024,
+    "cover": 5 * 1024 * 1024,
+    "document": 10 * 1024 * 1024,
+}
+
+# Signatures (offset, bytes) that the first chunk of each extension must contain
+MAGIC_BYTES = {
+    "epub": [(0, b"PK\x03\x04")],
+    "jpg": [(0, b"\xff\xd8\xff")],
+    "jpeg": [(0, b"\xff\xd8\xff")],
+    "png": [(0, b"\x89PNG\r\n\x1a\n")],
+    "webp": [(0, b"RIFF"), (8, b"WEBP")],
+    "gif": [(0, b"GIF8")],
+    "bmp": [(0, b"BM")],
+    "pdf": [(0, b"%PDF")],
+    "doc": [(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")],
+    "xls": [(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")],
+    "ppt": [(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")],
+    "docx": [(0, b"PK\x03\x04")],
+    "xlsx": [(0, b"PK\x03\x04")],
+    "pptx": [(0, b"PK\x03\x04")],
+    "odt": [(0, b"PK\x03\x04")],
+    "ods": [(0, b"PK\x03\x04")],
+    "key": [(0, b"PK\x03\x04")],
+    "zip": [(0, b"PK\x03\x04")],
+    "rar": [(0, b"Rar!")],
+    "gz": [(0, b"\x1f\x8b")],
+    "mp4": [(4, b"ftyp")],
+    "mov": [(4, b"ftyp")],
+    "avi": [(0, b"RIFF"), (8, b"AVI ")],
+    "mkv": [(0, b"\x1a\x45\xdf\xa3")],
+}
+
 
 def save_file(file, file_type):
     """
@@ -31,27 +82,158 @@ def save_file(file, file_type):
         ValueError: If the file is invalid or the type is not supported
     """
     if file_type == "book":
-        return save_file_locally(file, BOOKS_DIR, ALLOWED_EXTENSIONS["book"])
+        return save_file_locally(
+            file, BOOKS_DIR, ALLOWED_EXTENSIONS["book"], MAX_FILE_SIZES["book"]
+        )
     elif file_type == "cover":
-        return save_file_locally(file, COVERS_DIR, ALLOWED_EXTENSIONS["cover"])
+        return save_file_locally(
+            file, COVERS_DIR, ALLOWED_EXTENSIONS["cover"], MAX_FILE_SIZES["cover"]
+        )
+    elif file_type == "document":
+        return save_file_locally(
+            file,
+            DOCUMENTS_DIR,
+            ALLOWED_EXTENSIONS["document"],
+            MAX_FILE_SIZES["document"],
+        )
     else:
         raise ValueError(f"Tipo de archivo no soportado: {file_type}")
 
 
-def save_file_locally(file, folder, allowed_exts):
+def upload_too_large(content_length, *file_types):
+    """
+    Whether a request body is larger than its files can be, so it is rejected
+    before it is read
+
+    Args:
+        content_length: Content-Length of the request, None if unknown
+        file_types: Types of the files the request may carry ('book', 'cover', etc.)
+    """
+    if content_length is None:
+        return False
+    limit = sum(MAX_FILE_SIZES[file_type] for file_type in file_types)
+    return content_length > limit + MULTIPART_OVERHEAD
+
+
+def matches_magic_bytes(header, ext):
+    """
+    Check that the first bytes of a file match the signature of its extension
+
+    Args:
+        header: First chunk of the file
+        ext: Extension of the file without the dot
+
+    Returns:
+        bool: True if it matches or there is no known signature for the extension
+    """
+    signatures = MAGIC_BYTES.get(ext)
+    if not signatures:
+        return True
+    return all(
+        header[offset : offset + len(signature)] == signature
+        for offset, signature in signatures
+    )
+
+
+def digest_upload(stream, ext, max_size=None, write=None):
+    """
+    Read an upload stream in fixed-size chunks validating it on the fly
+
+    Only one chunk is held in memory. The type is checked on the first chunk
+    and the size on every chunk, so an invalid file is rejected as soon as
+    the problem is seen instead of after reading it completely.
+
+    Args:
+        stream: Readable binary stream of the upload
+        ext: Extension of the file without the dot
+        max_size: Maximum size in bytes, None for no limit
+        write: Optional function called with every chunk
+
+    Returns:
+        tuple: (sha256 hex digest, size in bytes)
+
+    Raises:
+        ValueError: If the file is empty, too large or its content does not match its extension
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if size == 0 and not matches_magic_bytes(chunk, ext):
+            raise ValueError(
+                f"El contenido del archivo no corresponde a un archivo {ext}"
+            )
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise ValueError(
+                f"El archivo supera el tamaño máximo de {max_size // (1024 * 1024)}MB"
+            )
+        digest.update(chunk)
+        if write:
+            write(chunk)
+    if size == 0:
+        raise ValueError("Archivo no válido o vacío")
+    return digest.hexdigest(), size
+
+
+def stream_to_disk(stream, dest_path, ext, max_size=None):
+    """
+    Copy an upload stream to disk validating it on the fly (see digest_upload)
+
+    Args:
+        stream: Readable binary stream of the upload
+        dest_path: Path where the content is written
+        ext: Extension of the file without the dot
+        max_size: Maximum size in bytes, None for no limit
+
+    Returns:
+        tuple: (sha256 hex digest, size in bytes)
+
+    Raises:
+        ValueError: If the file is empty, too large or its content does not match its extension
+    """
+    try:
+        with open(dest_path, "wb") as dest_file:
+            return digest_upload(stream, ext, max_size, dest_file.write)
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)  # Clean up partial file
+        raise
+
+
+def spooled_upload_path(stream):
+    """Path of an upload spooled to disk by DiskUploadRequest, None otherwise"""
+    name = getattr(stream, "name", None)
+    if not isinstance(name, str):
+        return None
+    if os.path.dirname(os.path.abspath(name)) != os.path.abspath(UPLOADS_TMP_DIR):
+        return None
+    return name
+
+
+def save_file_locally(file, folder, allowed_exts, max_size=None):
     """
     Save a file securely in the local file system
 
+    Files are content-addressed: the upload is hashed while it is streamed to
+    disk and stored once as folder/<sha256>.<ext>. Uploading the same content
+    again only increments its reference count in stored_files. An upload
+    already spooled to disk is hashed in place and hard-linked into the
+    folder, so it is not written twice.
+
     Args:
         file: The Flask file object
         folder: Directory where to save the file
         allowed_exts: List of allowed extensions
+        max_size: Maximum size in bytes, None for no limit
 
     Returns:
         The path of the saved file
 
     Raises:
-        ValueError: If the file is invalid or its extension is not allowed
+        ValueError: If the file is invalid, too large or its extension is not allowed
     """
     if not file or not hasattr(file, "filename") or not file.filename:
         raise ValueError("Archivo no válido o vacío")
@@ -70,33 +252,179 @@ def save_file_locally(file, folder, allowed_exts):
             f"Formato no permitido: {ext}. Formatos permitidos: {', '.join(allowed_exts)}"
         )
 
-    # Generate a unique filename to avoid overwrites
-    unique_filename = f"{uuid.uuid4()}_{filename}"
-    file_path = os.path.join(folder, unique_filename)
-
-    # Save the file securely
+    tmp_path = os.path.join(folder, f".{uuid.uuid4()}.tmp")
     try:
-        file.save(file_path)
+        spooled_path = spooled_upload_path(file.stream)
+        if spooled_path:
+            try:
+                os.link(spooled_path, tmp_path)
+            except OSError:
+                spooled_path = None  # E.g. another file system, copy it
+        if spooled_path:
+            file.stream.seek(0)
+            sha256, size = digest_upload(file.stream, ext, max_size)
+        else:
+            # Stream the upload to a temporary file computing its digest on the fly
+            sha256, size = stream_to_disk(file.stream, tmp_path, ext, max_size)
+
+        file_path = os.path.join(folder, f"{sha256}.{ext}")
+        add_file_reference(file_path, tmp_path, sha256, size)
         return file_path
+    except ValueError:
+        raise
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)  # Clean up partial file if failed
         raise ValueError(f"Error al guardar el archivo: {str(e)}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # Clean up partial or duplicated file
+
+
+def add_file_reference(file_path, tmp_path, sha256, size):
+    """
+    Register a new reference to a content-addressed file
+
+    The blob is only moved into place when it is not stored yet, so a
+    repeated upload never writes the same content twice. If the row cannot be
+    stored the blob is moved back to tmp_path.
+
+    Args:
+        file_path: Final path of the file (folder/<sha256>.<ext>)
+        tmp_path: Temporary file with the uploaded content
+        sha256: Hex digest of the content
+        size: Size of the content in bytes
+    """
+    for attempt in range(2):
+        db = SessionLocal()
+        moved = False
+        try:
+            # Lock the row so a concurrent delete cannot remove the blob meanwhile
+            stored = (
+                db.query(StoredFile)
+                .filter(StoredFile.path == file_path)
+                .with_for_update()
+                .first()
+            )
+            if stored:
+                stored.ref_count += 1
+            else:
+                stored = StoredFile(sha256=sha256, path=file_path, size=size, ref_count=1)
+                db.add(stored)
+
+            if not os.path.exists(file_path):
+                os.replace(tmp_path, file_path)
+                moved = True
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if moved:
+                _unmove_blob(db, file_path, tmp_path)
+            # Another upload of the same content registered it first, count this one
+            if isinstance(e, IntegrityError) and attempt == 0:
+                continue
+            raise
+        finally:
+            db.close()
+
+        # The upload whose blob this one found in place may have failed and
+        # moved it back meanwhile
+        if not os.path.exists(file_path):
+            os.replace(tmp_path, file_path)
+        return
+
+
+def _unmove_blob(db, file_path, tmp_path):
+    # The row of a blob moved into place was not stored: move it back, unless
+    # another upload of the same content registered the path meanwhile
+    try:
+        if not db.query(StoredFile.id).filter(StoredFile.path == file_path).first():
+            os.replace(file_path, tmp_path)
+    except Exception as e:
+        print(f"Error al revertir el archivo {file_path}: {e}")
+
+
+def release_file_reference(file_path):
+    """
+    Drop one reference to a content-addressed file
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        bool | None: True if it was the last reference, False if other rows still use
+        the file, None if the file is not content-addressed
+    """
+    db = SessionLocal()
+    try:
+        stored = (
+            db.query(StoredFile)
+            .filter(StoredFile.path == file_path)
+            .with_for_update()
+            .first()
+        )
+        if not stored:
+            return None
+
+        stored.ref_count -= 1
+        if stored.ref_count > 0:
+            db.commit()
+            return False
+
+        db.delete(stored)
+        # Move the blob aside while the row is still locked, and only remove
+        # it once the delete is committed
+        trash_path = os.path.join(os.path.dirname(file_path), f".{uuid.uuid4()}.tmp")
+        if os.path.exists(file_path):
+            os.replace(file_path, trash_path)
+        try:
+            db.commit()
+        except Exception:
+            if os.path.exists(trash_path):
+                os.replace(trash_path, file_path)
+            raise
+
+        if os.path.exists(trash_path):
+            os.remove(trash_path)
+        delete_local_derivatives(file_path)
+        return True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
 def delete_file(file_path):
     """
     Delete a file from the file system
 
+    Content-addressed files are only removed when the last row that
+    references them is gone.
+
     Args:
         file_path: Path to the file to delete
 
     Returns:
-        bool: True if the file was deleted, False if it did not exist or there was an error
+        bool: True if the reference was released or the file was deleted, False if
+        it did not exist or there was an error
     """
-    if file_path and os.path.exists(file_path):
+    if not file_path:
+        return False
+
+    try:
+        released = release_file_reference(file_path)
+        if released is not None:
+            return True
+    except Exception as e:
+        print(f"Error releasing file {file_path}: {str(e)}")
+        return False
+
+    # Files stored before the content-addressed store have no reference count
+    if os.path.exists(file_path):
         try:
             os.remove(file_path)
+            # Remove the resized versions of images as well
+            delete_local_derivatives(file_path)
             return True
         except Exception as e:
             print(f"Error deleting file {file_path}: {str(e)}")
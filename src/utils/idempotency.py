@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from src.models.submission import Submission
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 100
+# Seconds and number of recent responses kept in memory. Older keys are still
+# found through the unique index, this only saves the query on quick retries
+IDEMPOTENCY_CACHE_TTL = 10 * 60
+IDEMPOTENCY_CACHE_SIZE = 10000
+REPLAY_HEADERS = {"Idempotent-Replayed": "true"}
+
+
+def get_idempotency_key(request) -> Optional[str]:
+    """
+    Read the Idempotency-Key header of a request
+
+    Raises:
+        ValueError: If the key is empty or longer than MAX_KEY_LENGTH
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"{IDEMPOTENCY_HEADER} must have 1 to {MAX_KEY_LENGTH} characters")
+    return key
+
+
+class IdempotencyCache:
+    """
+    Recent responses by (user, key), so retries are answered without a query
+
+    Each entry remembers the resource the key was used for, so reusing a key
+    for another request is detected instead of replayed.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_CACHE_TTL, size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[int, str], tuple]" = OrderedDict()
+
+    def get(self, user_id: int, key: str) -> Optional[Tuple[Hashable, dict, int]]:
+        """Return (target, body, status) of the first response for the key"""
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[(user_id, key)]
+                return None
+            return entry[1:]
+
+    def set(self, user_id: int, key: str, target: Hashable, body: dict, status: int):
+        with self._lock:
+            self._entries[(user_id, key)] = (time.monotonic() + self.ttl, target, body, status)
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+submission_idempotency = IdempotencyCache()
+
+
+def replay_response(entry: Tuple[Hashable, dict, int], target: Hashable):
+    """
+    Response for a retry: the first response if the key was used for the same
+    target, 422 if it was used for something else
+    """
+    used_for, body, status = entry
+    if used_for != target:
+        return {"error": f"{IDEMPOTENCY_HEADER} already used for another request"}, 422
+    return body, status, REPLAY_HEADERS
+
+
+def submission_target(submission: Submission) -> Tuple[str, int]:
+    if submission.assignment_id:
+        return "assignment", submission.assignment_id
+    return "exercise", submission.exercise_id
+
+
+def submission_response(submission: Submission) -> dict:
+    """Body of the 201 response of the submit endpoints"""
+    body = {"id": submission.id}
+    if submission.exercise_id:
+        body["score"] = submission.score
+    body["submitted_at"] = submission.submitted_at.isoformat()
+    return body
+
+
+def remember_submission(user_id: int, key: Optional[str], submission: Submission) -> dict:
+    """Response for a new submission, cached for the retries with the same key"""
+    body = submission_response(submission)
+    if key:
+        submission_idempotency.set(user_id, key, submission_target(submission), body, 201)
+    return body
+
+
+def replay_submission(db, user_id: int, key: str, target: Tuple[str, int]):
+    """
+    Response of the submission already stored with this key, None if the key
+    was not used yet
+    """
+    existing = (
+        db.query(Submission)
+        .filter(Submission.student_id == user_id, Submission.idempotency_key == key)
+        .first()
+    )
+    if not existing:
+        return None
+    used_for = submission_target(existing)
+    body = remember_submission(user_id, key, existing)
+    return replay_response((used_for, body, 201), target)
@@ -0,0 +1,418 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from ..database.database import SessionLocal
+from ..models.image_derivative import ImageDerivative
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, without it only the originals are served
+    Image = None
+
+STATIC_DIR = "src/static"
+
+# Fixed widths (px) and output formats of the derivatives
+DERIVATIVE_WIDTHS = [320, 640, 1024]
+DERIVATIVE_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+DERIVATIVE_QUALITY = 80
+
+# Derivatives are generated by the job worker, this pool is the fallback
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-derivatives")
+_pending = set()
+_pending_lock = threading.Lock()
+
+# Remote images whose derivatives are being uploaded, and those of them that
+# were deleted meanwhile (their derivatives must not be recorded)
+_uploading = set()
+_cancelled = set()
+_uploading_lock = threading.Lock()
+
+# Derivative widths of the local images whose derivatives are all generated.
+# Stored paths are content-addressed, so the result only changes when the
+# image is deleted; the TTL bounds deletions made by other processes
+LOCAL_WIDTHS_CACHE_SIZE = 10000
+LOCAL_WIDTHS_CACHE_TTL = 10 * 60
+_local_widths = OrderedDict()
+_local_widths_lock = threading.Lock()
+
+
+def variant_name(filename, width, ext):
+    """
+    Build the name of a derivative from the name of the original image
+
+    Args:
+        filename: Name or path of the original image
+        width: Width of the derivative
+        ext: Extension of the derivative ('webp' or 'jpg')
+
+    Returns:
+        The name (or path) of the derivative, e.g. 'cover_w320.webp'
+    """
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_w{width}.{ext}"
+
+
+def build_srcset(url, widths=None):
+    """
+    Build the srcset strings of an image from its URL
+
+    Args:
+        url: URL of the original image
+        widths: Widths to include, defaults to DERIVATIVE_WIDTHS
+
+    Returns:
+        dict: One srcset string per format, e.g. {'webp': 'a_w320.webp 320w, ...'}
+    """
+    widths = DERIVATIVE_WIDTHS if widths is None else widths
+    if not url or not widths:
+        return {}
+    return {
+        ext: ", ".join(f"{variant_name(url, width, ext)} {width}w" for width in widths)
+        for ext in DERIVATIVE_FORMATS
+    }
+
+
+def widths_for(original_width):
+    """Derivative widths that fit in an image of the given width"""
+    return [width for width in DERIVATIVE_WIDTHS if width <= original_width]
+
+
+def render_derivatives(data):
+    """
+    Resize an image to the fixed widths in every derivative format
+
+    Widths greater than the original width are skipped (an upscaled or
+    re-encoded copy would be advertised with a width it does not have), so a
+    small image may have fewer derivatives or none.
+
+    Args:
+        data: Bytes of the original image
+
+    Returns:
+        list: Tuples (width, ext, bytes), empty if Pillow is not installed
+    """
+    if Image is None:
+        return []
+
+    derivatives = []
+    with Image.open(BytesIO(data)) as original:
+        original.load()
+        for width in widths_for(original.width):
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            for ext, pil_format in DERIVATIVE_FORMATS.items():
+                image = resized
+                if pil_format == "JPEG" and image.mode != "RGB":
+                    image = image.convert("RGB")
+                elif image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA")
+                buffer = BytesIO()
+                image.save(buffer, pil_format, quality=DERIVATIVE_QUALITY)
+                derivatives.append((width, ext, buffer.getvalue()))
+    return derivatives
+
+
+def generate_local_derivatives(file_path):
+    """
+    Generate the derivatives of a local image and store them next to the original
+
+    Args:
+        file_path: Path to the original image
+
+    Returns:
+        list: Paths of the generated derivatives
+    """
+    if not file_path or not os.path.exists(file_path):
+        return []
+
+    with open(file_path, "rb") as original:
+        derivatives = render_derivatives(original.read())
+
+    generated = []
+    for width, ext, content in derivatives:
+        derivative_path = variant_name(file_path, width, ext)
+        # Write to a temporary file first so a half written derivative is never served
+        tmp_path = f"{derivative_path}.tmp"
+        with open(tmp_path, "wb") as derivative:
+            derivative.write(content)
+        os.replace(tmp_path, derivative_path)
+        generated.append(derivative_path)
+    return generated
+
+
+def schedule_local_derivatives(file_path):
+    """
+    Queue the generation of the derivatives of a local image in the background
+
+    The work is enqueued as an 'image_derivatives' job for the worker. The
+    idempotency key includes the modification time of the image, so an image
+    requested many times before the worker processes it is enqueued only once.
+    If the job cannot be enqueued it runs in the local image pool instead.
+
+    Args:
+        file_path: Path to the original image
+    """
+    if Image is None or not file_path or not os.path.exists(file_path):
+        return
+
+    key = f"image_derivatives:{file_path}:{int(os.path.getmtime(file_path))}"
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+
+    try:
+        from ..jobs.service import enqueue_job
+
+        enqueue_job("image_derivatives", {"file_path": file_path}, idempotency_key=key)
+        # The idempotency key of the job dedupes it from now on
+        with _pending_lock:
+            _pending.discard(key)
+        return
+    except Exception as e:
+        print(f"Error enqueuing derivatives for {file_path}: {str(e)}")
+
+    def task():
+        try:
+            generate_local_derivatives(file_path)
+        except Exception as e:
+            print(f"Error generating derivatives for {file_path}: {str(e)}")
+        finally:
+            with _pending_lock:
+                _pending.discard(key)
+
+    _executor.submit(task)
+
+
+def schedule_task(fn, *args):
+    """
+    Run any derivative related task in the background image pool
+
+    Args:
+        fn: Function to run
+        *args: Arguments of the function
+    """
+    _executor.submit(fn, *args)
+
+
+def get_local_derivative_widths(file_path):
+    """
+    Get the widths of the derivatives of a local image that already exist
+
+    Images uploaded before the pipeline existed have no derivatives, they are
+    generated lazily the first time they are requested. Once every derivative
+    exists the result is cached, so list pages do not read the disk again.
+
+    Args:
+        file_path: Path to the original image
+
+    Returns:
+        list: Widths with every format already generated
+    """
+    if not file_path:
+        return []
+    with _local_widths_lock:
+        cached = _local_widths.get(file_path)
+        if cached is not None and cached[0] > time.monotonic():
+            _local_widths.move_to_end(file_path)
+            return cached[1]
+
+    if not os.path.exists(file_path):
+        return []
+
+    expected = DERIVATIVE_WIDTHS
+    if Image is not None:
+        # Only the header is read; derivatives wider than the original (left
+        # by older versions) are not advertised
+        try:
+            with Image.open(file_path) as original:
+                expected = widths_for(original.width)
+        except Exception:
+            expected = []
+
+    widths = [
+        width
+        for width in expected
+        if all(
+            os.path.exists(variant_name(file_path, width, ext))
+            for ext in DERIVATIVE_FORMATS
+        )
+    ]
+    if widths == expected:
+        with _local_widths_lock:
+            _local_widths[file_path] = (time.monotonic() + LOCAL_WIDTHS_CACHE_TTL, widths)
+            _local_widths.move_to_end(file_path)
+            while len(_local_widths) > LOCAL_WIDTHS_CACHE_SIZE:
+                _local_widths.popitem(last=False)
+    elif not widths:
+        schedule_local_derivatives(file_path)
+    return widths
+
+
+def record_derivative_widths(url, widths):
+    """
+    Record the derivatives of a remote image once every one of them is uploaded
+
+    Args:
+        url: URL of the original image
+        widths: Widths uploaded in every format
+    """
+    db = SessionLocal()
+    try:
+        record = db.query(ImageDerivative).filter(ImageDerivative.url == url).first()
+        if record is None:
+            db.add(ImageDerivative(url=url, widths=sorted(widths)))
+        else:
+            record.widths = sorted(widths)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def track_remote_derivatives(url):
+    """Mark the derivatives of a remote image as being uploaded"""
+    with _uploading_lock:
+        _uploading.add(url)
+
+
+def untrack_remote_derivatives(url):
+    """The upload of the derivatives of a remote image is over"""
+    with _uploading_lock:
+        _uploading.discard(url)
+        _cancelled.discard(url)
+
+
+def cancel_remote_derivatives(urls):
+    """
+    Cancel the derivative uploads of remote images that are being deleted
+
+    Must be called before deleting them: an upload still running stops, and
+    one that already finished cannot record its derivatives any more.
+    """
+    with _uploading_lock:
+        _cancelled.update(url for url in urls if url in _uploading)
+
+
+def remote_derivatives_cancelled(url):
+    """Whether the image of a derivative upload was deleted"""
+    with _uploading_lock:
+        return url in _cancelled
+
+
+def record_remote_derivatives(url, widths):
+    """
+    Record the uploaded derivatives of a remote image unless it was deleted
+
+    Returns:
+        bool: False if the upload was cancelled, its derivatives must be deleted
+    """
+    # The lock makes the check and the record atomic with cancel_remote_derivatives
+    with _uploading_lock:
+        if url in _cancelled:
+            return False
+        if widths:
+            record_derivative_widths(url, widths)
+        return True
+
+
+def get_derivative_widths(urls):
+    """
+    Get the recorded derivative widths of several remote images with one query
+
+    Images uploaded before derivatives existed, or whose derivatives are not
+    uploaded yet (or failed), have no record and must be served without srcset.
+
+    Args:
+        urls: URLs of the original images
+
+    Returns:
+        dict: Widths by URL, only for the images with derivatives
+    """
+    urls = [url for url in set(urls) if url]
+    if not urls:
+        return {}
+    db = SessionLocal()
+    try:
+        return {
+            url: widths
+            for url, widths in db.query(ImageDerivative.url, ImageDerivative.widths).filter(
+                ImageDerivative.url.in_(urls)
+            )
+        }
+    finally:
+        db.close()
+
+
+def forget_derivatives(urls):
+    """Delete the derivative records of remote images that were deleted"""
+    urls = [url for url in urls if url]
+    if not urls:
+        return
+    db = SessionLocal()
+    try:
+        db.query(ImageDerivative).filter(ImageDerivative.url.in_(urls)).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def delete_local_derivatives(file_path):
+    """
+    Delete every derivative of a local image
+
+    Args:
+        file_path: Path to the original image
+    """
+    if not file_path:
+        return
+    with _local_widths_lock:
+        _local_widths.pop(file_path, None)
+    for width in DERIVATIVE_WIDTHS:
+        for ext in DERIVATIVE_FORMATS:
+            derivative_path = variant_name(file_path, width, ext)
+            if os.path.exists(derivative_path):
+                try:
+                    os.remove(derivative_path)
+                except Exception as e:
+                    print(f"Error deleting file {derivative_path}: {str(e)}")
+
+
+def to_static_url(file_path):
+    """
+    Convert a path inside the static folder to its public URL
+
+    Args:
+        file_path: Path of the file, e.g. 'src/static/covers/a.jpg'
+
+    Returns:
+        The URL of the file, e.g. '/static/covers/a.jpg'
+    """
+    if not file_path:
+        return None
+    relative_path = os.path.relpath(file_path, STATIC_DIR).replace(os.sep, "/")
+    return f"/static/{relative_path}"
+
+
+def local_srcset(file_path):
+    """
+    Build the srcset strings of a local image with the derivatives already generated
+
+    Args:
+        file_path: Path to the original image
+
+    Returns:
+        dict: One srcset string per format, empty while there are no derivatives
+    """
+    return build_srcset(to_static_url(file_path), get_local_derivative_widths(file_path))
@@ -0,0 +1,70 @@
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, without it the stdlib json module is used
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Types the encoders do not handle natively"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for jsonify() and the dict / list responses
+
+    Uses orjson when it is installed: it encodes datetimes (ISO 8601), enums
+    (their value), dataclasses and UUIDs natively and writes bytes, so a
+    response is encoded once without an intermediate str. Without orjson it
+    falls back to the stdlib encoder with the same output for those types
+    (ISO 8601 dates instead of Flask's HTTP dates). Other types go through
+    _default (pydantic models, sets, Decimal).
+    """
+
+    default = staticmethod(_default)
+
+    def _options(self, pretty: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Arguments for the stdlib encoder (indent, separators...) need it
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(
+            obj,
+            default=_default,
+            option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE,
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,250 @@
+import math
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from flask import current_app, flash, jsonify, redirect, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from src.database.database import pool_wait
+
+try:
+    import redis
+except ImportError:  # only needed with a redis:// RATE_LIMIT_STORAGE_URL
+    redis = None
+
+# Buckets kept in memory before the full ones are pruned
+MEMORY_BUCKETS_MAX = 10000
+# Retry-After (seconds) of the requests shed because the database is saturated
+SHED_RETRY_AFTER = 5
+
+
+class Limit(NamedTuple):
+    """Token bucket: `burst` requests at once, refilled at `rate` per second"""
+
+    scope: str  # "ip", "user" or "global"
+    rate: float
+    burst: int
+
+
+# Logins: a classroom behind one NAT can log in at once, but one account only
+# gets a few password checks per minute from each address (so attempts from
+# elsewhere cannot lock its owner out)
+LOGIN_LIMITS = [
+    Limit("ip", rate=1.0, burst=60),
+    Limit("user", rate=5 / 60, burst=5),
+    Limit("global", rate=50.0, burst=100),
+]
+SUBMIT_LIMITS = [
+    Limit("ip", rate=2.0, burst=120),
+    Limit("user", rate=0.5, burst=10),
+    Limit("global", rate=100.0, burst=200),
+]
+# Autosaves are buffered, so the limit only stops runaway clients
+AUTOSAVE_LIMITS = [
+    Limit("user", rate=5.0, burst=30),
+    Limit("global", rate=1000.0, burst=2000),
+]
+
+
+class MemoryBackend:
+    """Token buckets of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}
+
+    def _prune(self, now: float):
+        # A bucket that has refilled completely is the same as a missing one
+        for key, (tokens, updated_at, rate, burst) in list(self._buckets.items()):
+            if tokens + (now - updated_at) * rate >= burst:
+                del self._buckets[key]
+
+    def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Take a token, return (allowed, seconds until one is available)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MEMORY_BUCKETS_MAX:
+                    self._prune(now)
+                bucket = self._buckets[key] = [burst, now, rate, burst]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (1 - tokens) / rate
+
+
+class RedisBackend:
+    """Token buckets shared by every worker through Redis"""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = self.script(
+                keys=[f"rate_limit:{key}"], args=[rate, burst, time.time()]
+            )
+        except redis.RedisError as e:
+            # Without Redis the limits are not enforced rather than failing requests
+            print(f"Error checking rate limit: {str(e)}")
+            return True, 0.0
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(url: str):
+    """
+    Backend for a RATE_LIMIT_STORAGE_URL
+
+    Raises:
+        RuntimeError: If the URL is redis:// but the redis client is not installed
+    """
+    if not url.startswith("redis"):
+        return MemoryBackend()
+    if redis is None:
+        raise RuntimeError(
+            "RATE_LIMIT_STORAGE_URL usa Redis pero el paquete redis no está instalado"
+        )
+    return RedisBackend(url)
+
+
+def init_rate_limit(app):
+    """Create the backend at startup, so a misconfigured storage fails at once"""
+    global _backend
+    with _backend_lock:
+        _backend = create_backend(app.config.get("RATE_LIMIT_STORAGE_URL", "memory://"))
+
+
+def get_backend():
+    """Backend selected by RATE_LIMIT_STORAGE_URL, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(
+                    current_app.config.get("RATE_LIMIT_STORAGE_URL", "memory://")
+                )
+    return _backend
+
+
+def jwt_user_key(req) -> Optional[str]:
+    """Id of the user of the access token, if any"""
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return None
+    identity = get_jwt_identity()
+    return str(identity) if identity is not None else None
+
+
+def login_user_key(req) -> Optional[str]:
+    """Username the login is attempted for (JSON or form) and the client address"""
+    data = req.get_json(silent=True) if req.is_json else req.form
+    username = (data or {}).get("username")
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return f"{username.strip().lower()}:{req.remote_addr}"
+
+
+def _bucket_key(name: str, limit: Limit, user_key: Optional[Callable]) -> Optional[str]:
+    if limit.scope == "global":
+        return f"{name}:global"
+    if limit.scope == "ip":
+        # The client address behind nginx when TRUSTED_PROXY_HOPS is set (ProxyFix)
+        return f"{name}:ip:{request.remote_addr}"
+    user = user_key(request) if user_key else None
+    return f"{name}:user:{user}" if user else None
+
+
+def _rejected(message: str, status: int, retry_after: float):
+    retry_after = max(1, math.ceil(retry_after))
+    headers = {"Retry-After": str(retry_after)}
+    if request.is_json or request.path.startswith("/api/"):
+        return jsonify({"error": message, "retry_after": retry_after}), status, headers
+    flash(message, "danger")
+    return redirect(request.url), 303, headers
+
+
+def rate_limited(
+    name: str,
+    limits: List[Limit],
+    user_key: Optional[Callable] = None,
+    methods: Tuple[str, ...] = ("POST",),
+):
+    """
+    Decorator to limit an endpoint with token buckets per IP, per user and global
+
+    The buckets are taken in the order of `limits`, so a client over its own
+    limit does not use the global one. Requests are also rejected with 503
+    when the average wait for a database connection exceeds DB_POOL_SHED_WAIT,
+    so retries do not pile up on a saturated pool. Rejections carry a
+    Retry-After header.
+
+    Args:
+        name: Prefix of the bucket keys
+        limits: Buckets to take a token from
+        user_key: Function that returns the user key of the request
+        methods: Methods that are limited (others pass through)
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method not in methods:
+                return fn(*args, **kwargs)
+
+            shed_wait = current_app.config.get("DB_POOL_SHED_WAIT")
+            if shed_wait and pool_wait.current() > shed_wait:
+                return _rejected(
+                    "El servidor está ocupado, intente de nuevo en unos segundos",
+                    503,
+                    SHED_RETRY_AFTER,
+                )
+
+            backend = get_backend()
+            for limit in limits:
+                key = _bucket_key(name, limit, user_key)
+                if key is None:
+                    continue
+                allowed, retry_after = backend.take(key, limit.rate, limit.burst)
+                if not allowed:
+                    return _rejected(
+                        "Demasiadas solicitudes, intente de nuevo más tarde",
+                        429,
+                        retry_after,
+                    )
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
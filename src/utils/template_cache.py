@@ -0,0 +1,144 @@
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+# Rendered fragments kept in memory at most (least recently used are dropped)
+FRAGMENT_CACHE_SIZE = 2000
+
+
+class FragmentCache:
+    """Rendered HTML fragments by (template, key), with a TTL per entry"""
+
+    def __init__(self, size: int = FRAGMENT_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, html, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _freeze(value: Any) -> Hashable:
+    # Keys written as lists or dicts in the template are made hashable
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache key, ttl %}...{% endcache %}: render a block once and reuse its
+    HTML while the key does not change, for up to ttl seconds
+
+    The key should carry the version of the data the block shows (for
+    example ("course", course.id, course.updated_at)), so a change renders
+    it again right away; the TTL only bounds data that is not in the key.
+    Without a ttl the environment's fragment_cache_ttl is used, and a ttl of
+    0 disables the cache. The block must not show per request data (flashed
+    messages, the current user) unless it is part of the key. Expensive work
+    (queries) should be done inside the block, so a hit skips it.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache(), fragment_cache_ttl=300)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        ttl = parser.parse_expression() if parser.stream.skip_if("comma") else nodes.Const(None)
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.Const(parser.name), key, ttl]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    def _render_cached(self, template_name: Optional[str], key, ttl, caller):
+        if ttl is None:
+            ttl = self.environment.fragment_cache_ttl
+        if not ttl:
+            return caller()
+
+        cache_key = (template_name, _freeze(key))
+        html = self.environment.fragment_cache.get(cache_key)
+        if html is None:
+            html = caller()
+            self.environment.fragment_cache.set(cache_key, html, ttl)
+        return html
+
+
+def _private_directory(directory: str) -> str:
+    """
+    Create a cache directory only the current user can access
+
+    Loading bytecode runs it, so a directory another user can write to (or
+    created beforehand by someone else) is refused.
+
+    Raises:
+        RuntimeError: If the directory is not owned by the user or is open to others
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"{directory} no es un directorio")
+    if hasattr(os, "getuid") and (
+        info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+    ):
+        raise RuntimeError(
+            f"{directory} debe pertenecer al usuario del proceso y tener permisos 0700"
+        )
+    return directory
+
+
+def init_template_cache(app):
+    """
+    Compile templates through an on-disk bytecode cache shared by the workers
+    and enable the {% cache %} tag
+
+    With TEMPLATE_BYTECODE_CACHE the compiled templates are stored in
+    TEMPLATE_BYTECODE_CACHE_DIR, or in Jinja's private per-user directory when
+    it is empty; a new worker loads them instead of compiling the templates
+    again. Entries are checked against the template source, so an edited
+    template is compiled again. TEMPLATE_FRAGMENT_CACHE_TTL is the default
+    TTL of the fragments (0 disables them).
+    """
+    if app.config.get("TEMPLATE_BYTECODE_CACHE", True):
+        directory = app.config.get("TEMPLATE_BYTECODE_CACHE_DIR")
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+            _private_directory(directory) if directory else None
+        )
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache_ttl = app.config.get("TEMPLATE_FRAGMENT_CACHE_TTL", 300)
@@ -0,0 +1,24 @@
+import unicodedata
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(char: str) -> str:
+    """Lower case a character and remove its accent, keeping one character"""
+    decomposed = unicodedata.normalize("NFKD", char.lower())
+    for base in decomposed:
+        if not unicodedata.combining(base):
+            return base
+    return char.lower()
+
+
+def fold(text: str) -> str:
+    """
+    Lower case a text and remove its accents (e.g. 'Canción' -> 'cancion')
+
+    Each character is folded to exactly one character, so positions in the
+    folded text match positions in the original text.
+    """
+    if text.isascii():
+        return text.lower()
+    return "".join(map(_fold_char, text))
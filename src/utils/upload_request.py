@@ -0,0 +1,24 @@
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
+
+from flask import Request
+
+from src.utils.file_utils import CHUNK_SIZE, UPLOADS_TMP_DIR
+
+
+class DiskUploadRequest(Request):
+    """
+    Request that spools uploaded files to disk.
+
+    Werkzeug keeps up to 500KB of every file part in memory by default. With
+    this class each upload holds at most one chunk in RAM while the multipart
+    body is parsed: bodies up to one chunk stay in memory, larger ones go
+    straight to a file in UPLOADS_TMP_DIR, which save_file_locally links into
+    the storage instead of copying it.
+    """
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if total_content_length is not None and total_content_length <= CHUNK_SIZE:
+            return SpooledTemporaryFile(max_size=CHUNK_SIZE, mode="rb+")
+        return NamedTemporaryFile(mode="rb+", dir=UPLOADS_TMP_DIR)
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+from src.models.class_model import ClassModel
+
+
+class UserCache:
+    """
+    Per user data with a short TTL and invalidation by user or by course
+
+    Every entry remembers the courses it was computed from, so a change in a
+    course drops the entries of all its students and teachers. Invalidation
+    only reaches this process; other workers see the change after the TTL.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, FrozenSet[int], object]] = {}
+        _caches.append(self)
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[2]
+
+    def set(self, key: Hashable, data, course_ids: Iterable[int]):
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + self.ttl,
+                frozenset(course_ids),
+                data,
+            )
+
+    def invalidate_user(self, user_id: int):
+        # Keys are the user id or a tuple starting with it
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key == user_id or (isinstance(key, tuple) and key[0] == user_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def invalidate_course(self, course_id: int):
+        with self._lock:
+            stale = [
+                key
+                for key, (_, course_ids, _) in self._entries.items()
+                if course_id in course_ids
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_caches: List[UserCache] = []
+
+
+def invalidate_user_caches(user_id: int):
+    """Drop the cached data of a user (profile, enrollment or submission change)"""
+    for cache in _caches:
+        cache.invalidate_user(int(user_id))
+
+
+def invalidate_course_caches(course_id: Optional[int]):
+    """Drop the cached data of every user related to a course"""
+    if course_id is None:
+        return
+    for cache in _caches:
+        cache.invalidate_course(course_id)
+
+
+def invalidate_class_caches(db, class_id: Optional[int]):
+    """Drop the cached data of the course of a class (new work, submissions, grades)"""
+    if class_id is None:
+        return
+    invalidate_course_caches(
+        db.query(ClassModel.course_id).filter(ClassModel.id == class_id).scalar()
+    )